@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+AI 비서 자동 분석 캐시 / 백그라운드 스트리밍 생성 (스캐너 / 앱 공용)
+
+같은 종목, 같은 포착일, 같은 프롬프트의 자동 분석은 결과가 같으므로 (종목코드, 일자, 프롬프트) 단위로
+outputs/analysis/YYYYMMDD/<종목코드>_<키>.json 에 저장하고 ANALYSIS_TTL_HOURS 동안 재사용합니다.
+스캐너는 포착 종목 전체를 미리 생성(pregenerate)해 두고, 앱은 캐시가 없을 때만 백그라운드 스레드로
+스트리밍 생성(submit)하면서 받은 토큰을 바로 화면에 흘립니다. 생성 도중 다른 종목으로 옮겨도 스레드는
+끝까지 받아 캐시에 저장하고, 같은 키를 여러 사용자가 동시에 요청하면 생성 작업 하나를 공유합니다.
+
+GROQ_BASE_URL 환경 변수로 chat completions 엔드포인트를 바꿀 수 있어 로컬 스텁 서버로 검증할 수 있습니다.
+
+    python analysis.py              # 최신 final_result CSV 포착 종목 자동 분석 사전 생성
+    python analysis.py --date 20260403
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+OUT_DIR = "outputs"
+ANALYSIS_DIR = os.path.join(OUT_DIR, "analysis")
+MODEL = "llama-3.3-70b-versatile"
+ANALYSIS_TTL_HOURS = float(os.getenv("ANALYSIS_TTL_HOURS", "72"))   # 금요일 포착분이 주말 동안 유지되도록
+ANALYSIS_WORKERS = 4       # 동시 생성 스레드 수 (앱 백그라운드 / 스캐너 사전 생성 공용)
+STREAM_POLL_SEC = 0.05
+
+def make_client(api_key=None, base_url=None):
+    """Groq 클라이언트 (키가 없으면 None). base_url 기본값은 GROQ_BASE_URL 환경 변수"""
+    api_key = (api_key or os.getenv("GROQ_API_KEY") or "").strip()
+    if not api_key:
+        return None
+    from groq import Groq
+    return Groq(api_key=api_key, base_url=base_url or os.getenv("GROQ_BASE_URL") or None)
+
+def auto_prompt(name, date_label):
+    """종목 선택 시 자동으로 보내는 분석 요청 (date_label: 포착일 YYYY-MM-DD)"""
+    return f"전문가로서 {date_label} 기준 {name}의 전략을 설명해줘. 한자 금지."
+
+# =========================
+# 1. 디스크 캐시
+# =========================
+def cache_key(code, date_key, prompt, model=MODEL):
+    return hashlib.sha1(json.dumps([str(code), str(date_key), prompt, model], ensure_ascii=False).encode()).hexdigest()[:16]
+
+def cache_path(code, date_key, prompt, model=MODEL, cache_dir=ANALYSIS_DIR):
+    return os.path.join(cache_dir, str(date_key), f"{code}_{cache_key(code, date_key, prompt, model)}.json")
+
+def load_cached(code, date_key, prompt, model=MODEL, ttl_hours=ANALYSIS_TTL_HOURS, cache_dir=ANALYSIS_DIR):
+    """TTL 안의 저장된 분석 본문 또는 None"""
+    path = cache_path(code, date_key, prompt, model, cache_dir)
+    try:
+        with open(path, encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - doc.get("created", 0) > ttl_hours * 3600:
+        return None
+    return doc.get("content") or None
+
+def save_cached(code, date_key, prompt, content, model=MODEL, cache_dir=ANALYSIS_DIR):
+    path = cache_path(code, date_key, prompt, model, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    doc = {"code": str(code), "date": str(date_key), "prompt": prompt, "model": model,
+           "content": content, "created": time.time()}
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=1)
+    os.replace(f"{path}.tmp", path)
+    return path
+
+# =========================
+# 2. 스트리밍 생성
+# =========================
+def stream_chat(client, messages, model=MODEL):
+    """chat completions 스트리밍 응답의 토큰 조각을 차례로 반환"""
+    for chunk in client.chat.completions.create(model=model, messages=messages, stream=True):
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+class Job:
+    """백그라운드 생성 작업 1건 (받은 토큰을 쌓아 두고 여러 화면이 동시에 읽음)"""
+
+    def __init__(self, content=None):
+        self.tokens = [content] if content else []
+        self.error = None
+        self.done = threading.Event()
+        if content is not None:
+            self.done.set()
+
+    @property
+    def text(self):
+        return "".join(self.tokens)
+
+    def stream(self, poll=STREAM_POLL_SEC):
+        """지금까지 받은 토큰부터 생성이 끝날 때까지 새 토큰을 차례로 반환 (생성 실패 시 마지막에 예외)"""
+        sent = 0
+        while True:
+            finished = self.done.is_set()
+            while sent < len(self.tokens):
+                yield self.tokens[sent]
+                sent += 1
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            self.done.wait(poll)
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS)
+
+def _run(job, key, client, code, date_key, prompt, model, cache_dir):
+    try:
+        for token in stream_chat(client, [{"role": "user", "content": prompt}], model):
+            job.tokens.append(token)
+        if job.tokens:
+            save_cached(code, date_key, prompt, job.text, model, cache_dir)
+    except Exception as e:
+        job.error = e
+    finally:
+        job.done.set()
+        with _jobs_lock:
+            _jobs.pop(key, None)
+
+def submit(client, code, date_key, prompt, model=MODEL, cache_dir=ANALYSIS_DIR):
+    """캐시가 있으면 완료된 Job, 같은 키를 생성 중이면 그 Job, 아니면 새 백그라운드 생성 Job"""
+    cached = load_cached(code, date_key, prompt, model, cache_dir=cache_dir)
+    if cached is not None:
+        return Job(cached)
+    key = cache_path(code, date_key, prompt, model, cache_dir)
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is None:
+            job = _jobs[key] = Job()
+            _pool.submit(_run, job, key, client, code, date_key, prompt, model, cache_dir)
+    return job
+
+def pregenerate(result, date_key, client=None, model=MODEL, cache_dir=ANALYSIS_DIR):
+    """
+    포착 리스트 전체의 자동 분석을 미리 생성합니다 (이미 캐시에 있는 종목은 건너뜀).
+    반환: 캐시에 준비된 종목 수
+    """
+    client = client or make_client()
+    if client is None or result is None or result.empty:
+        return 0
+    date_label = f"{date_key[:4]}-{date_key[4:6]}-{date_key[6:]}"
+    jobs = [submit(client, str(row["종목코드"]).zfill(6), date_key, auto_prompt(row["종목명"], date_label), model, cache_dir)
+            for _, row in result.iterrows()]
+    ready = 0
+    for job in jobs:
+        job.done.wait()
+        ready += job.error is None and bool(job.tokens)
+    failed = sum(job.error is not None for job in jobs)
+    print(f"🤖 [분석] {date_key} 자동 분석 {ready}/{len(jobs)}개 준비" + (f" (실패 {failed}개)" if failed else ""))
+    return ready
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="포착 종목 AI 자동 분석 사전 생성")
+    parser.add_argument("--date", help="YYYYMMDD (기본: 최신 final_result CSV)")
+    args = parser.parse_args()
+    import results_index
+    date_key = args.date or results_index.latest_date()
+    if date_key is None:
+        print("⚠️ [분석] 포착 결과가 없습니다.")
+    else:
+        import result_table
+        pregenerate(result_table.load(date_key, OUT_DIR), date_key)
@@ -1,19 +1,18 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import pandas_ta as ta
-import yfinance as yf
 import plotly.graph_objects as go
-import requests
-from bs4 import BeautifulSoup
-from groq import Groq
-from datetime import datetime, timedelta
-import os
+from datetime import datetime
 import warnings
 import logging
-import joblib
 import re
 import numpy as np
+import inference
+import bundles
+import macro_store
+import results_index
+import result_table
+import analysis
 
 # 1) 페이지 설정 및 세션 초기화
 st.set_page_config(page_title="AI STOCK COMMANDER", layout="wide")
@@ -97,123 +96,49 @@ st.markdown(f"""
 
 # 3) 기능 함수 정의
 def load_data():
-    out_dir = "outputs"
-    if not os.path.exists(out_dir): return None, None
-    files = [f for f in os.listdir(out_dir) if f.startswith("final_result_") and f.endswith(".csv")]
-    if not files: return None, None
-    latest_file = sorted(files)[-1]
-    date_str = latest_file.split("_")[-1].replace(".csv", "")
+    # 최신 일자는 포착 이력 인덱스에서 바로 조회 (outputs/ 목록을 훑지 않음)
+    date_str = results_index.latest_date()
+    if date_str is None: return None, None, None
     formatted_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
-    df = pd.read_csv(os.path.join(out_dir, latest_file))
-    if "시장" in df.columns:
-        df["시장"] = df["시장"].astype(str).str.strip()
-        df.loc[df["시장"].str.contains("유가|KOSPI", na=False), "시장"] = "KOSPI"
-        df.loc[df["시장"].str.contains("코스닥|KOSDAQ", na=False), "시장"] = "KOSDAQ"
-    if "종목코드" in df.columns: df["종목코드"] = df["종목코드"].astype(str).str.zfill(6)
-    return df, formatted_date
+    # 컬럼형 결과 파일(타입 고정, 종목코드/시장 정규화 완료)을 우선 읽고, 없으면 CSV 를 같은 규칙으로 정규화
+    df = result_table.load(date_str)
+    if df is None: return None, None, None
+    # 일괄 채점 결과(inference.py)가 있으면 AI 확률 높은 순으로 정렬
+    if "AI확률(%)" in df.columns: df = df.sort_values("AI확률(%)", ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+    return df, formatted_date, date_str
 
-@st.cache_data(ttl=1800)
-def get_investor_trend(code):
-    try:
-        url = f"https://finance.naver.com/item/frgn.naver?code={code}"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(res.text, 'html.parser')
-        rows = soup.find_all('tr', {'onmouseover': 'mouseOver(this)'})
-        data_list = []
-        for row in rows[:5]:
-            cols = row.find_all('td')
-            if len(cols) < 9: continue
-            date, inst, fore = cols[0].text.strip()[-5:], int(cols[5].text.replace(',', '')), int(cols[6].text.replace(',', ''))
-            data_list.append({"날짜": date, "기관": inst, "외인": fore})
-        return pd.DataFrame(data_list)
-    except: return None
-
-# [v1.7] 실시간 매크로 데이터 수집 엔진 (시간대 제거 로직 포함)
-@st.cache_data(ttl=3600)
+# [v1.7] 매크로 스냅샷 (스캐너가 매일 갱신하는 로컬 저장소의 최신 행, 요청 경로에서 네트워크 없음)
+@st.cache_data(ttl=300)
 def get_macro_data():
-    try:
-        end = datetime.now()
-        start = end - timedelta(days=30)
-        tickers = ["^IXIC", "^VIX", "DX-Y.NYB", "^TNX", "GC=F", "NQ=F"]
-        macro = yf.download(tickers, start=start, end=end, progress=False)['Close'].ffill()
-        # [해결] 모든 인덱스의 시간대 정보 강제 제거 (tz-naive로 통일)
-        macro.index = macro.index.tz_localize(None)
-        
-        last = macro.iloc[-1]
-        n_ret = macro["^IXIC"].pct_change().iloc[-1]
-        v_cls = last["^VIX"]
-        d_ret = macro["DX-Y.NYB"].pct_change().iloc[-1]
-        t_cls = last["^TNX"]
-        g_ret = macro["GC=F"].pct_change().iloc[-1]
-        nf_ret = macro["NQ=F"].pct_change().iloc[-1]
-        return n_ret, v_cls, d_ret, t_cls, g_ret, nf_ret
-    except: return 0.0, 15.0, 0.0, 4.0, 0.0, 0.0
+    return macro_store.snapshot()
+
+# [성능] 스캔 때 만든 번들이 있으면 로컬 파일만으로 화면 구성, 없거나 오래됐으면 실시간 조회
+@st.cache_data(ttl=600)
+def get_stock_view(date_key, code, market):
+    bundle = bundles.load(date_key, code)
+    if bundle is not None:
+        return bundle, "번들"
+    return bundles.collect(code, market, date_key), "실시간"
+
+MODEL_PATH = "stock_model.pkl"
+
+# [성능] 모델은 프로세스당 1회만 로드 (파일 내용 해시가 바뀌면 새로 로드해 재학습 결과 즉시 반영)
+@st.cache_resource(max_entries=1)
+def load_model(path, signature):
+    return inference.load_model(path)
 
 # [수리 완료] v1.7 65.25% 모델 22개 피처 실시간 연산
-def calculate_ai_probability(df, market_df):
+def calculate_ai_probability(df, market_df, macro=None):
     try:
-        if not os.path.exists("stock_model.pkl"): return 50.0, "모델 파일 미발견", []
-        model = joblib.load("stock_model.pkl")
-        
-        # [해결] 주식 데이터 시간대 제거
-        df.index = df.index.tz_localize(None)
-        
-        # 1. 기술적 지표 생성 (22개 피처 완벽 복원)
-        df['rsi'] = ta.rsi(df['Close'], length=14)
-        bb = ta.bbands(df['Close'], length=20, std=2)
-        l_col, u_col = [c for c in bb.columns if 'BBL' in c][0], [c for c in bb.columns if 'BBU' in c][0]
-        df['bb_per'] = (df['Close'] - bb[l_col]) / (bb[u_col] - bb[l_col])
-        df['ma_diff'] = (ta.sma(df['Close'], 5) - ta.sma(df['Close'], 20)) / ta.sma(df['Close'], 20)
-        vol_up = (df['Volume'] > df['Volume'].shift(1)).astype(int)
-        df['vol_consecutive_days'] = vol_up.groupby((vol_up != vol_up.shift()).cumsum()).cumsum()
-        df['vol_spike_ratio'] = df['Volume'] / ta.sma(df['Volume'], 20)
-        df['candle_body'] = (df['Close'] - df['Open']) / (df['High'] - df['Low'] + 1e-9)
-        
-        # [해결] market_df Series로 변환 및 시간대 제거
-        m_series = market_df.squeeze()
-        if isinstance(m_series, pd.DataFrame): m_series = m_series.iloc[:, 0]
-        m_series.index = m_series.index.tz_localize(None)
-        m_series.name = "market_close"
-        
-        df = df.join(m_series, how='left').ffill()
-        df['relative_strength'] = df['Close'].pct_change(5) - df['market_close'].pct_change(5)
+        signature = inference.model_signature(MODEL_PATH)
+        if signature is None: return 50.0, "모델 파일 미발견", []
+        model, forest, load_ms = load_model(MODEL_PATH, signature)
         
-        df['macd_hist'] = ta.macd(df['Close'])['MACDh_12_26_9']
-        df['mfi'] = ta.mfi(df['High'], df['Low'], df['Close'], df['Volume'], length=14)
-        df['atr_ratio'] = ta.atr(df['High'], df['Low'], df['Close'], length=14) / df['Close']
-        df['stoch_k'] = ta.stoch(df['High'], df['Low'], df['Close'])['STOCHk_14_3_3']
-        df['disparity_60'] = (df['Close'] / ta.sma(df['Close'], 60)) * 100
-        df['price_range'] = (df['High'] - df['Low']) / df['Close']
-        df['vol_roc'] = ta.roc(df['Volume'], length=5)
-        df['range_roc'] = ta.roc(df['price_range'], length=5) 
-        df['day_of_week'] = df.index.dayofweek
-        
-        # 2. 실시간 매크로 데이터 병합
-        n_ret, v_cls, d_ret, t_cls, g_ret, nf_ret = get_macro_data()
-        df['nasdaq_return'], df['vix_close'], df['dxy_return'] = n_ret, v_cls, d_ret
-        df['tnx_close'], df['gold_return'], df['nasdaq_f_return'] = t_cls, g_ret, nf_ret
-        
-        # 3. 모델 피처 정렬
-        feature_cols = [
-            'rsi', 'bb_per', 'ma_diff', 'vol_consecutive_days', 'vol_spike_ratio', 
-            'candle_body', 'relative_strength', 'macd_hist', 'mfi', 'atr_ratio',
-            'stoch_k', 'disparity_60', 'price_range', 'vol_roc', 'range_roc',
-            'day_of_week', 'nasdaq_return', 'vix_close', 'dxy_return', 'tnx_close', 
-            'gold_return', 'nasdaq_f_return'
-        ]
-        
-        last_features = df[feature_cols].tail(1).fillna(0)
-        prob = model.predict_proba(last_features)[0][1] * 100
-        last = df.iloc[-1]
-        
-        reasons = [
-            {"label": "나스닥 선물", "val": f"{nf_ret*100:.2f}%", "desc": "호조" if nf_ret > 0 else "불안"},
-            {"label": "상대강도 (RS)", "val": f"{round(float(last['relative_strength'])*100, 1)}%", "desc": "시장 주도" if last['relative_strength'] > 0 else "하회"},
-            {"label": "에너지 가속도", "val": f"{round(float(last['range_roc']), 1)}%", "desc": "가속화" if last['range_roc'] > 0 else "수렴"},
-            {"label": "VIX 공포지수", "val": f"{v_cls:.1f}", "desc": "안정" if v_cls < 18 else "주의"}
-        ]
-        return round(prob, 1), "v1.7 분석 엔진 정상 작동 중", reasons
+        # 공용 피처 엔진으로 22개 피처 계산 (학습과 동일한 계산식, 실시간 매크로 스냅샷 병합)
+        macro = macro or get_macro_data()
+        prob, reasons, feat_ms, infer_us = inference.score_latest(model, forest, df, market_df, macro)
+        latency = f"피처 {feat_ms:.1f}ms · 추론 {infer_us:.0f}µs · 모델 로드 {load_ms:.0f}ms(캐시)"
+        return prob, f"v1.7 분석 엔진 정상 작동 중 | {latency}", reasons
     except Exception as e: return 50.0, f"분석 대기 중 ({str(e)})", []
 
 def draw_finance_chart(dates, values, unit, is_debt=False):
@@ -225,9 +150,9 @@ def draw_finance_chart(dates, values, unit, is_debt=False):
     return fig
 
 # 4) 메인 로직 실행
-data, data_date = load_data()
+data, data_date, data_key = load_data()
 groq_api_key = st.secrets.get("GROQ_API_KEY", "").strip()
-client = Groq(api_key=groq_api_key) if groq_api_key and len(groq_api_key) > 10 else None
+client = analysis.make_client(groq_api_key) if groq_api_key and len(groq_api_key) > 10 else None
 
 if data is not None:
     if st.session_state.selected_stock is None:
@@ -243,24 +168,32 @@ if data is not None:
                 st.markdown(f'<div class="market-header">{m_name} ({len(m_df)}개)</div>', unsafe_allow_html=True)
                 for i, row in m_df.iterrows():
                     is_sel = st.session_state.selected_stock['종목명'] == row['종목명']
-                    if st.button(f"● {row['종목명']}" if is_sel else f"  {row['종목명']}", key=f"btn_{m_name}_{i}"):
+                    label = row['종목명'] + (f"  {row['AI확률(%)']:.1f}%" if pd.notna(row.get('AI확률(%)')) else "")
+                    if st.button(f"● {label}" if is_sel else f"  {label}", key=f"btn_{m_name}_{i}"):
                         st.session_state.selected_stock = row.to_dict()
                         st.session_state.messages = []
                         st.rerun()
 
+        # [이력] 포착 이력 인덱스(results_index)에서 선택 종목 / 기간별 포착 이력 조회
+        with st.expander("🗂️ 포착 이력"):
+            sel = st.session_state.selected_stock
+            picks = results_index.picks_for(sel["종목코드"])
+            st.caption(f"{sel['종목명']} 누적 포착 {len(picks)}회")
+            st.dataframe(picks[["날짜", "최근거래일거래대금(억)", "AI확률(%)"]].iloc[::-1], hide_index=True, use_container_width=True)
+            days = results_index.dates()
+            start, end = st.select_slider("기간", options=days, value=(days[max(0, len(days) - 5)], days[-1]))
+            ranged = results_index.picks_between(start, end)
+            freq = ranged.groupby(["종목코드", "종목명"]).size().rename("포착횟수").reset_index()
+            st.dataframe(freq.sort_values("포착횟수", ascending=False, kind="stable"), hide_index=True, use_container_width=True)
+
     with col_main:
         stock = st.session_state.selected_stock
         st.markdown(f'<div class="section-header">📈 {stock["종목명"]}</div>', unsafe_allow_html=True)
-        ticker_sym = stock['종목코드'] + (".KS" if stock['시장'] == "KOSPI" else ".KQ")
-        market_idx = "^KS11" if stock['시장'] == "KOSPI" else "^KQ11"
-        tk = yf.Ticker(ticker_sym)
+        view, view_source = get_stock_view(data_key, stock['종목코드'], stock['시장'])
+        hist, m_hist = view["hist"], view["market_close"]
         c1, c2 = st.columns([7, 3])
         with c1:
             try:
-                hist = tk.history(period="6mo")
-                if isinstance(hist.columns, pd.MultiIndex): hist.columns = hist.columns.get_level_values(0)
-                m_hist = yf.download(market_idx, period="6mo", progress=False)['Close']
-                
                 fig = go.Figure(data=[go.Candlestick(x=hist.index, open=hist['Open'], high=hist['High'], low=hist['Low'], close=hist['Close'], increasing_line_color='#ff3366', decreasing_line_color='#00e5ff')])
                 
                 # [디자인 고정] 날짜 숫자(01.19), 가격 콤마, 흐린 격자선
@@ -273,7 +206,7 @@ if data is not None:
                 st.plotly_chart(fig, use_container_width=True)
             except: st.error("차트 데이터 로드 실패")
         with c2:
-            inv = get_investor_trend(stock['종목코드'])
+            inv = view["investor"]
             if inv is not None:
                 html = '<table class="investor-table"><tr><th>날짜</th><th>외인</th><th>기관</th></tr>'
                 for _, r in inv.iterrows():
@@ -284,19 +217,26 @@ if data is not None:
         st.markdown(f"""<div class="report-box"><div class="info-line"><span class="highlight-mint">종목:</span> {stock["종목명"]} ({stock['종목코드']}) | <span class="highlight-mint">거래대금:</span> {stock.get('최근거래일거래대금(억)', 0):,}억</div></div>""", unsafe_allow_html=True)
 
         f1, f2 = st.columns(2)
-        try:
-            income = tk.financials.loc['Operating Income'].sort_index() / 1e8
-            debt = (tk.balance_sheet.loc['Total Debt'] / tk.balance_sheet.loc['Stockholders Equity'] * 100).sort_index()
+        income, debt = view["income"], view["debt"]
+        if income is not None and debt is not None:
             with f1:
                 st.markdown('<div class="finance-header-box"><span class="finance-label-compact">💰 영업이익 (억)</span></div>', unsafe_allow_html=True)
-                st.plotly_chart(draw_finance_chart(income.index.year, income.values, "억"), use_container_width=True)
+                st.plotly_chart(draw_finance_chart(income.index, income.values, "억"), use_container_width=True)
             with f2:
                 st.markdown('<div class="finance-header-box"><span class="finance-label-compact">📉 부채비율 (%)</span></div>', unsafe_allow_html=True)
-                st.plotly_chart(draw_finance_chart(debt.index.year, debt.values, "%", is_debt=True), use_container_width=True)
-        except: pass
+                st.plotly_chart(draw_finance_chart(debt.index, debt.values, "%", is_debt=True), use_container_width=True)
 
         # [실전 적용] v1.7 65.25% 모델 상승 확률 연동
-        prob, msg, reasons = calculate_ai_probability(hist, m_hist)
+        ai = view.get("ai")
+        if ai and ai.get("model_signature") == inference.model_signature(MODEL_PATH):
+            prob, reasons = ai["prob"], ai["reasons"]
+            msg = f"v1.7 분석 엔진 정상 작동 중 | 사전 계산 번들 ({view['created']})"
+        elif hist is not None and m_hist is not None:
+            # 모델이 바뀌었거나 번들에 확률이 없으면 번들 일봉 + 번들 당시 매크로로 재채점
+            prob, msg, reasons = calculate_ai_probability(hist, m_hist, view.get("macro"))
+            msg += f" | 데이터: {view_source}"
+        else:
+            prob, msg, reasons = 50.0, "분석 대기 중 (일봉 데이터 없음)", []
         st.markdown('<div class="section-header" style="margin-top:30px;">🚀 AI PREDICTIVE STRATEGY: 5개년 데이터 모델링 기반 익일 기대수익 확률</div>', unsafe_allow_html=True)
         prob_col, reason_col = st.columns([4, 6])
         with prob_col:
@@ -321,17 +261,25 @@ if data is not None:
         st.markdown('<div class="section-header">🤖 AI 비서</div>', unsafe_allow_html=True)
         chat_container = st.container(height=800)
         with chat_container:
-            if not st.session_state.messages and client:
-                with st.spinner("전문가 분석 중..."):
-                    auto_prompt = f"전문가로서 {today_real_date} 기준 {stock['종목명']}의 전략을 설명해줘. 한자 금지."
-                    try:
-                        res = client.chat.completions.create(model="llama-3.3-70b-versatile", messages=[{"role": "user", "content": auto_prompt}])
-                        ans = clean_foreign_languages(res.choices[0].message.content)
-                        st.session_state.messages.append({"role": "assistant", "content": ans})
-                    except: pass
             for m in st.session_state.messages:
                 with st.chat_message(m["role"], avatar="🤖" if m["role"] == "assistant" else None):
                     st.markdown(m["content"], unsafe_allow_html=True)
+            # [성능] 자동 분석은 (종목, 포착일, 프롬프트) 캐시 우선 -> 없으면 백그라운드 생성 토큰을 스트리밍 표시
+            # 후속 질문은 대화 맥락이 달라 캐시 없이 스트리밍 응답
+            stream = None
+            if not st.session_state.messages and client:
+                auto_prompt = analysis.auto_prompt(stock['종목명'], data_date)
+                stream = analysis.submit(client, stock['종목코드'], data_key, auto_prompt).stream()
+            elif st.session_state.messages and st.session_state.messages[-1]["role"] == "user" and client:
+                stream = analysis.stream_chat(client, st.session_state.messages)
+            if stream is not None:
+                try:
+                    with st.chat_message("assistant", avatar="🤖"):
+                        ans = st.write_stream(clean_foreign_languages(token) for token in stream)
+                    if ans:
+                        st.session_state.messages.append({"role": "assistant", "content": ans})
+                except Exception:
+                    st.caption("AI 비서 응답을 받지 못했습니다.")
         if prompt := st.chat_input("전략을 질문하세요..."):
             st.session_state.messages.append({"role": "user", "content": prompt})
             st.rerun()
\ No newline at end of file
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+워크포워드(walk-forward) 검증 및 백테스트
+
+행을 섞는 train_test_split 은 같은 날짜의 다른 종목/미래 봉이 학습에 섞여 정확도가 부풀려집니다.
+여기서는 일자 기준으로 시간순 폴드를 나누고, 검증 구간 직전의 정답 기간(purge)과 엠바고 구간을 학습에서 제외합니다.
+폴드는 프로세스 풀로 병렬 실행하며, 피처 데이터셋과 폴드별 결과를 data/backtest 에 캐시해
+같은 설정을 다시 평가할 때는 피처 계산과 학습을 건너뜁니다.
+
+    python backtest.py --folds 5 --workers 4
+"""
+import os
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+import data_provider
+import features
+import result_files
+
+CACHE_DIR = os.path.join("data", "backtest")
+OUTPUT_DIR = "outputs"
+PURGE_DAYS = 1        # 정답(target)이 다음 거래일 종가를 보므로 검증 시작 직전 1일은 학습 제외
+EMBARGO_DAYS = 5      # 자기상관 누수를 막기 위한 추가 공백 거래일 수
+
+# =========================
+# 1. 시간순 분할
+# =========================
+def walk_forward_splits(dates, n_folds=5, test_frac=0.5, purge=PURGE_DAYS, embargo=EMBARGO_DAYS):
+    """
+    행별 일자(dates)로 확장 윈도우 워크포워드 폴드를 만듭니다.
+    최근 test_frac 비율의 거래일을 n_folds 개 연속 구간으로 나눠 차례로 검증하고,
+    각 폴드의 학습은 검증 시작일보다 purge + embargo 거래일 앞선 일자까지만 사용합니다.
+    반환: [(train_mask, test_mask, info dict), ...]
+    """
+    dates = pd.DatetimeIndex(dates)
+    days = dates.unique().sort_values()
+    n_test = max(n_folds, int(len(days) * test_frac))
+    first_test = len(days) - n_test
+    bounds = np.linspace(first_test, len(days), n_folds + 1).astype(int)
+
+    folds = []
+    for k in range(n_folds):
+        lo, hi = bounds[k], bounds[k + 1]
+        train_end = lo - purge - embargo
+        if train_end <= 0 or hi <= lo:
+            continue
+        test_mask = (dates >= days[lo]) & (dates <= days[hi - 1])
+        train_mask = dates < days[train_end]
+        folds.append((train_mask, test_mask, {
+            "fold": k, "train_end": str(days[train_end - 1].date()),
+            "test_start": str(days[lo].date()), "test_end": str(days[hi - 1].date()),
+        }))
+    return folds
+
+def holdout_split(dates, test_frac=0.2, purge=PURGE_DAYS, embargo=EMBARGO_DAYS):
+    """최근 test_frac 거래일을 검증으로 쓰는 단일 시간순 분할 (train_mask, test_mask)"""
+    train_mask, test_mask, _ = walk_forward_splits(dates, 1, test_frac, purge, embargo)[0]
+    return train_mask, test_mask
+
+# =========================
+# 2. 데이터셋 / 스캐너 포착 이력 캐시
+# =========================
+def _key(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+def load_picks(output_dir=OUTPUT_DIR):
+    """outputs/final_result_YYYYMMDD.csv 전체의 (date, code) 포착 이력"""
+    rows = []
+    for key in result_files.result_dates(output_dir):
+        date = pd.Timestamp(key)
+        codes = pd.read_csv(os.path.join(output_dir, f"final_result_{key}.csv"), dtype={"종목코드": str})["종목코드"].str.zfill(6)
+        rows.extend((date, c) for c in codes)
+    return pd.DataFrame(rows, columns=["date", "code"])
+
+def load_dataset(codes, end_date, years, cache_dir=CACHE_DIR):
+    """학습 데이터셋을 만들거나 캐시에서 읽어 (캐시 경로, 키)를 반환합니다."""
+    key = _key({"codes": sorted(codes), "end": str(end_date.date()), "years": years,
+                "feature_version": features.FEATURE_VERSION})
+    path = os.path.join(cache_dir, f"dataset_{key}.pkl")
+    if os.path.exists(path):
+        print(f"📦 [캐시] 피처 데이터셋 재사용: {path}")
+        return path, key
+    import train_model   # 학습 스크립트와 동일한 데이터셋 구성 (순환 import 방지를 위해 지연 로드)
+    data = train_model.build_training_set(codes, end_date=end_date, years=years)
+    if data is None:
+        return None, key
+    os.makedirs(cache_dir, exist_ok=True)
+    data.to_pickle(path)
+    return path, key
+
+# =========================
+# 3. 폴드 실행 (프로세스 풀 워커)
+# =========================
+def run_fold(dataset_path, train_mask, test_mask, info, params, picks):
+    from lightgbm import LGBMClassifier
+    from sklearn.metrics import accuracy_score, roc_auc_score
+
+    data = pd.read_pickle(dataset_path)
+    cols = features.FEATURE_COLUMNS
+    train, test = data[train_mask], data[test_mask]
+    model = LGBMClassifier(**params)
+    model.fit(train[cols], train["target"])
+    prob = model.predict_proba(test[cols])[:, 1]
+    pred = (prob > 0.5).astype(int)
+
+    result = dict(info, train_rows=len(train), test_rows=len(test),
+                  accuracy=round(float(accuracy_score(test["target"], pred)), 4))
+    result["auc"] = round(float(roc_auc_score(test["target"], prob)), 4) if test["target"].nunique() > 1 else None
+
+    # 스캐너 포착 종목의 익일 상승 비율 (전체 / 모델이 상승으로 본 종목)
+    scored = test.assign(prob=prob).reset_index().rename(columns={test.index.name or "index": "date"})
+    hits = scored.merge(picks, on=["date", "code"])
+    result["picks"] = len(hits)
+    result["pick_hit_rate"] = round(float(hits["target"].mean()), 4) if len(hits) else None
+    chosen = hits[hits["prob"] > 0.5]
+    result["model_picks"] = len(chosen)
+    result["model_pick_hit_rate"] = round(float(chosen["target"].mean()), 4) if len(chosen) else None
+    return result
+
+def evaluate(dataset_path, data_key, picks, n_folds=5, test_frac=0.5, purge=PURGE_DAYS, embargo=EMBARGO_DAYS,
+             params=None, workers=4, cache_dir=CACHE_DIR):
+    """워크포워드 폴드를 병렬로 평가해 폴드별 결과 DataFrame을 반환합니다. (폴드 결과 캐시 사용)"""
+    import train_model
+    params = params or train_model.MODEL_PARAMS
+    dates = pd.read_pickle(dataset_path).index
+    folds = walk_forward_splits(dates, n_folds, test_frac, purge, embargo)
+
+    results, pending = {}, []
+    for train_mask, test_mask, info in folds:
+        path = os.path.join(cache_dir, f"fold_{_key({'data': data_key, 'fold': info, 'params': params, 'purge': purge, 'embargo': embargo})}.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                results[info["fold"]] = json.load(f)
+        else:
+            pending.append((path, train_mask, test_mask, info))
+    print(f"🧪 [검증] 폴드 {len(folds)}개 | 캐시 적중 {len(results)}개 | 신규 실행 {len(pending)}개")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [(path, pool.submit(run_fold, dataset_path, tr, te, info, params, picks))
+                       for path, tr, te, info in pending]
+            for path, fut in futures:
+                res = fut.result()
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(res, f, ensure_ascii=False)
+                results[res["fold"]] = res
+    return pd.DataFrame([results[k] for k in sorted(results)])
+
+# =========================
+# 4. 실행부
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description="워크포워드 검증 / 스캐너 포착 백테스트")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--test-frac", type=float, default=0.5, help="검증에 쓰는 최근 거래일 비율")
+    parser.add_argument("--purge", type=int, default=PURGE_DAYS)
+    parser.add_argument("--embargo", type=int, default=EMBARGO_DAYS)
+    parser.add_argument("--workers", type=int, default=4, help="폴드 병렬 프로세스 수")
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    picks = load_picks()
+    codes = sorted(picks["code"].unique())
+    print(f"🚀 [진행] 포착 이력 {len(picks)}건 / {len(codes)}개 종목 기반 워크포워드 검증")
+    end_date = pd.Timestamp(data_provider.now().date())
+    dataset_path, data_key = load_dataset(codes, end_date, args.years)
+    if dataset_path is None:
+        print("❌ [에러] 유효 데이터 수집 실패.")
+        return
+
+    report = evaluate(dataset_path, data_key, picks, args.folds, args.test_frac, args.purge, args.embargo,
+                      workers=args.workers)
+    print(report.to_string(index=False))
+    print(f"\n🎯 [평균] 정확도 {report['accuracy'].mean() * 100:.2f}% | AUC {report['auc'].mean():.4f}")
+    path = os.path.join(CACHE_DIR, f"report_{data_key}.csv")
+    report.to_csv(path, index=False, encoding="utf-8-sig")
+    print(f"✅ [완료] 폴드별 결과 저장: {path}")
+
+if __name__ == "__main__":
+    main()
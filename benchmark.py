@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+오프라인 성능 측정 스위트 (네트워크 불필요)
+
+재현 가능한 합성 일봉(KRX 규모: 약 2,700종목 x 320봉, 학습용 5년 이력)으로 핫패스의 처리 시간을 재고,
+기존 구현과 결과가 같은지 함께 확인합니다. 측정값은 benchmark_baseline.json 과 비교해
+허용 비율(--threshold)보다 느려진 항목이 있으면 종료 코드 1로 실패합니다.
+
+    python benchmark.py                   # 측정 + 기준값 비교
+    python benchmark.py --save-baseline   # 현재 측정값을 기준값으로 저장
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import numpy as np
+import pandas as pd
+
+import scanner
+import screener
+import features
+import inference
+
+BASELINE_PATH = "benchmark_baseline.json"
+REGRESSION_THRESHOLD = 0.25     # 기준값 대비 25% 넘게 느려지면 실패
+KRX_CODES = 2700
+TRAIN_BARS = 1250               # 5년 일봉
+# train_model.MODEL_PARAMS 와 같은 크기의 모델 (streamlit 등 학습 스크립트 의존성 없이 구성)
+BENCH_MODEL_PARAMS = dict(n_estimators=1000, learning_rate=0.01, max_depth=10,
+                          num_leaves=127, min_child_samples=20, random_state=42, verbosity=-1)
+
+def synthetic_frames(n_codes, n_bars, seed=42):
+    """재현 가능한 합성 일봉 (상승 추세 + 간헐적 거래량 급증 종목 섞음)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2026-04-03", periods=n_bars)
+    frames = []
+    for _ in range(n_codes):
+        drift = rng.choice([-0.002, 0.0, 0.004])
+        close = np.maximum((np.cumprod(1 + rng.normal(drift, 0.02, n_bars)) * rng.uniform(2e3, 2e5)).astype(np.int64), 1)
+        spread = np.maximum((close * rng.uniform(0, 0.03, n_bars)).astype(np.int64), 1)
+        volume = rng.integers(5e4, 5e6, n_bars)
+        if rng.random() < 0.5:
+            volume[-rng.integers(1, 20)] *= rng.integers(3, 12)
+        frames.append(pd.DataFrame({
+            "Open": close, "High": close + spread, "Low": np.maximum(close - spread, 1),
+            "Close": close, "Volume": volume,
+        }, index=pd.DatetimeIndex(dates, name="Date")))
+    return frames
+
+def timed(fn, *args, repeat=5):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+def sise_xml(df, code="005930"):
+    """합성 일봉을 fchart sise 응답 형식으로 직렬화"""
+    items = "".join(
+        f'\t\t<item data="{d:%Y%m%d}|{r.Open}|{r.High}|{r.Low}|{r.Close}|{r.Volume}" />\n'
+        for d, r in zip(df.index, df.itertuples())
+    )
+    return (f'<?xml version="1.0" encoding="EUC-KR" ?>\n<protocol>\n\t<chartdata symbol="{code}" '
+            f'count="{len(df)}" timeframe="day">\n{items}\t</chartdata>\n</protocol>')
+
+def bench_xml_parse(n_docs, n_bars):
+    docs = [sise_xml(df) for df in synthetic_frames(n_docs, n_bars, seed=7)]
+    t_soup, ref = timed(lambda: [scanner.parse_sise_xml_soup(x) for x in docs], repeat=1)
+    t_fast, out = timed(lambda: [scanner.parse_sise_xml(x) for x in docs])
+    for a, b in zip(out, ref):
+        pd.testing.assert_frame_equal(a, b, check_exact=True)
+    print(f"[XML PARSE] {n_docs}건 x {n_bars}봉 | BeautifulSoup {t_soup / n_docs * 1000:.2f}ms/건 "
+          f"| 정규식 {t_fast / n_docs * 1000:.3f}ms/건 | x{t_soup / t_fast:.0f}")
+    return {"xml_parse_per_doc": t_fast / n_docs}
+
+def bench_screener(n_codes, n_bars):
+    frames = synthetic_frames(n_codes, n_bars)
+    t_loop, ref = timed(lambda: np.array([scanner.check_all_conditions(df) for df in frames]), repeat=1)
+    t_panel, panel = timed(screener.build_panel, frames, n_bars)
+    t_screen, mask = timed(screener.screen_panel, panel, scanner.CONDITION_PARAMS)
+    assert (mask == ref).all(), "일괄 스크리너 결과가 check_all_conditions 와 다릅니다"
+    print(f"[SCREENER] {n_codes}x{n_bars} | 종목별 {t_loop*1000:.0f}ms | 패널 구성 {t_panel*1000:.1f}ms "
+          f"| 일괄 평가 {t_screen*1000:.1f}ms | x{t_loop / t_screen:.0f} | 통과 {int(mask.sum())}개")
+    return {"screener_build_panel": t_panel, "screener_screen_panel": t_screen}
+
+def bench_indicator_state(n_codes, n_bars):
+    """전날까지의 증분 지표 상태를 새 봉 1개만큼 진행시켜 평가 (저장소 읽기/쓰기 포함) vs 패널 전체 평가"""
+    import tempfile
+    import indicator_state
+    params = scanner.CONDITION_PARAMS
+    frames = synthetic_frames(n_codes, n_bars + 1, seed=13)
+    codes = [f"{i:06d}" for i in range(n_codes)]
+    today = [df.iloc[1:] for df in frames]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "indicator_state.pkl")
+        indicator_state.advance_all(codes, [df.iloc[:-1] for df in frames], params, path=path)
+        prev = open(path, "rb").read()
+
+        def advance():
+            with open(path, "wb") as f:
+                f.write(prev)
+            return screener.screen_metrics(indicator_state.metric_arrays(
+                indicator_state.advance_all(codes, today, params, path=path)), params)
+        t_state, mask = timed(advance, repeat=3)
+    t_panel, ref = timed(lambda: screener.screen_panel(screener.build_panel(today, n_bars), params), repeat=3)
+    assert (mask == ref).all(), "증분 지표 상태 결과가 screen_panel 과 다릅니다"
+    print(f"[STATE] {n_codes}종목 새 봉 1개 | 증분 상태 {t_state*1000:.0f}ms (저장소 포함) | 패널 구성+평가 {t_panel*1000:.0f}ms")
+    return {"indicator_state_advance": t_state}
+
+def synthetic_market(n_bars, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2026-04-03", periods=n_bars)
+    return pd.Series(np.cumprod(1 + rng.normal(0, 0.01, n_bars)) * 2500, index=dates)
+
+def bench_features(n_tickers, n_bars):
+    frames = synthetic_frames(n_tickers, n_bars, seed=11)
+    markets = [synthetic_market(n_bars)] * n_tickers
+    t_vec, out = timed(features.extract_features, frames, markets, None, False)
+    n_values = n_tickers * n_bars * len(features.STOCK_FEATURES)
+    metrics = {"features_extract": t_vec}
+    line = f"[FEATURES] {n_tickers}종목 x {n_bars}봉 | 일괄 계산 {t_vec*1000:.0f}ms ({n_values / t_vec / 1e6:.1f}M 피처/초)"
+    try:
+        import pandas_ta  # noqa: F401  기준 구현이 있을 때만 정합성/속도 비교
+    except ImportError:
+        print(line + " | pandas_ta 미설치로 정합성 비교 생략")
+        return metrics
+    t_ref, ref = timed(lambda: [features.pandas_ta_reference(df, m) for df, m in zip(frames, markets)], repeat=1)
+    for o, r in zip(out, ref):
+        pd.testing.assert_frame_equal(o[features.STOCK_FEATURES], r, check_dtype=False, check_names=False, rtol=1e-6)
+    print(line + f" | pandas_ta {t_ref*1000:.0f}ms | x{t_ref / t_vec:.0f}")
+    return metrics
+
+def synthetic_model(n_tickers=40, n_bars=TRAIN_BARS):
+    """합성 5년 이력 피처로 학습한 운영 크기 모델 (매크로 피처는 고정 난수)"""
+    from lightgbm import LGBMClassifier
+    frames = synthetic_frames(n_tickers, n_bars, seed=21)
+    rng = np.random.default_rng(5)
+    macro = pd.DataFrame(rng.normal(size=(n_bars, len(features.MACRO_FEATURES) - 1)),
+                         index=frames[0].index, columns=features.MACRO_FEATURES[:-1])
+    data = pd.concat([df.assign(target=(df["Close"].shift(-1) > df["Close"]).astype(int)).iloc[:-1]
+                      for df in features.extract_features(frames, [synthetic_market(n_bars)] * n_tickers, macro)])
+    X = data[features.FEATURE_COLUMNS]
+    return LGBMClassifier(**BENCH_MODEL_PARAMS).fit(X, data["target"]), X
+
+def bench_inference(batch=KRX_CODES):
+    model, X = synthetic_model()
+    forest = inference.CompiledForest(model.booster_)
+    row, rows = X.iloc[[-1]], X.iloc[:batch] if len(X) >= batch else X.sample(batch, replace=True, random_state=0)
+    np.testing.assert_allclose(forest.predict_proba(rows.to_numpy()), model.predict_proba(rows), rtol=0, atol=1e-9)
+
+    def per_call(fn, n=200):
+        return timed(lambda: [fn() for _ in range(n)])[0] / n
+    t_row = per_call(lambda: model.predict_proba(row))
+    t_row_c = per_call(lambda: forest.predict_proba(row.to_numpy()))
+    t_batch, _ = timed(model.predict_proba, rows)
+    t_batch_c, _ = timed(forest.predict_proba, rows.to_numpy())
+    print(f"[INFERENCE] 트리 {model.n_estimators}개 | 1행 LightGBM {t_row*1e6:.0f}µs / 컴파일 {t_row_c*1e6:.0f}µs "
+          f"| {len(rows)}행 LightGBM {t_batch*1000:.1f}ms / 컴파일 {t_batch_c*1000:.1f}ms")
+    return {"predict_row_lightgbm": t_row, "predict_row_compiled": t_row_c,
+            "predict_batch_lightgbm": t_batch, "predict_batch_compiled": t_batch_c}
+
+# =========================
+# 기준값 비교
+# =========================
+def calibrate():
+    """기계 속도 보정용 고정 작업량 (NumPy 정렬 + 파이썬 루프) 소요 시간"""
+    data = np.random.default_rng(0).random(1_000_000)
+    return timed(lambda: (np.sort(data), sum(i * i for i in range(200_000))), repeat=7)[0]
+
+def environment():
+    import lightgbm
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "lightgbm": lightgbm.__version__, "machine": platform.machine(), "cpus": os.cpu_count()}
+
+def compare(metrics, baseline, threshold=REGRESSION_THRESHOLD, calibration=None):
+    """
+    기준값보다 threshold 비율 넘게 느려진 항목 목록 [(이름, 기준, 현재)]
+    양쪽에 보정값(calibrate)이 있으면 보정값 대비 상대 시간으로 비교해 기계 속도/부하 차이를 상쇄합니다.
+    """
+    scale = 1.0
+    if calibration and baseline.get("calibration"):
+        scale = baseline["calibration"] / calibration
+        print(f"  (기계 속도 보정 x{scale:.2f})")
+    regressions = []
+    for name, sec in metrics.items():
+        base = baseline.get("metrics", {}).get(name)
+        if base is None:
+            print(f"  {name:<26} {sec*1000:10.3f}ms | 기준값 없음")
+            continue
+        ratio = sec * scale / base
+        flag = "❌ 회귀" if ratio > 1 + threshold else "✅"
+        print(f"  {name:<26} {sec*1000:10.3f}ms | 기준 {base*1000:10.3f}ms | x{ratio:.2f} {flag}")
+        if ratio > 1 + threshold:
+            regressions.append((name, base, sec))
+    return regressions
+
+def run_suite(codes=KRX_CODES, bars=None):
+    """전체 측정. 반환: ({항목: 초}, 보정값 초) — 보정은 측정 앞뒤로 재서 빠른 쪽을 사용"""
+    bars = bars or scanner.FULL_COUNT
+    calibration = calibrate()
+    metrics = {}
+    metrics.update(bench_screener(codes, bars))
+    metrics.update(bench_indicator_state(codes, bars))
+    metrics.update(bench_xml_parse(200, bars))
+    metrics.update(bench_features(50, TRAIN_BARS))
+    metrics.update(bench_inference(codes))
+    return metrics, min(calibration, calibrate())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="오프라인 성능 측정 / 기준값 회귀 검사")
+    parser.add_argument("--codes", type=int, default=KRX_CODES)
+    parser.add_argument("--bars", type=int, default=scanner.FULL_COUNT)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="허용 지연 비율 (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="현재 측정값을 기준값 파일로 저장")
+    args = parser.parse_args()
+    metrics, calibration = run_suite(args.codes, args.bars)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "codes": args.codes, "bars": args.bars,
+                       "environment": environment(), "calibration": calibration, "metrics": metrics}, f, ensure_ascii=False, indent=2)
+        print(f"✅ [기준값] 저장: {args.baseline}")
+        sys.exit(0)
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ [기준값] {args.baseline} 없음 (--save-baseline 으로 생성)")
+        sys.exit(0)
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n📏 [비교] 기준값 {args.baseline} ({baseline.get('created')}) | 허용 +{args.threshold * 100:.0f}%")
+    regressions = compare(metrics, baseline, args.threshold, calibration)
+    if regressions:
+        print(f"❌ [회귀] {len(regressions)}개 항목이 기준값보다 느려졌습니다.")
+        sys.exit(1)
+    print("✅ [통과] 성능 회귀 없음")
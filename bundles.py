@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+포착 종목 대시보드 번들 (스캔 직후 사전 계산)
+
+final_result_YYYYMMDD.csv 가 쓰이면 후보 종목이 고정되므로, app.py 가 종목 선택 때마다 실시간으로 받던
+6개월 일봉, 시장 지수, 영업이익, 부채비율, 수급(외인/기관), AI 상승 확률과 근거를
+outputs/bundles/YYYYMMDD/<종목코드>.json 으로 미리 만들어 둡니다.
+app.py 는 번들이 있으면 로컬 파일만으로 그리고, 없거나 오래된 번들이면 같은 수집 함수로 실시간 조회합니다.
+
+    python bundles.py              # 최신 final_result CSV 기준으로 번들 생성
+    python bundles.py --date 20260403
+"""
+import os
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+import data_provider
+import features
+import history_cache
+import macro_store
+import result_files
+import result_table
+from result_files import normalize_market
+
+OUT_DIR = "outputs"
+BUNDLE_DIR = os.path.join(OUT_DIR, "bundles")
+BUNDLE_VERSION = 1        # 번들 구조가 바뀌면 올려서 기존 번들을 오래된 것으로 취급
+HISTORY_DAYS = 183        # app 차트의 period="6mo" 와 같은 구간
+BUNDLE_WORKERS = 4        # 재무/수급 동시 수집 스레드 수
+MODEL_PATH = "stock_model.pkl"
+
+def to_ticker(code, market):
+    return str(code).zfill(6) + (".KS" if market == "KOSPI" else ".KQ")
+
+def market_index(market):
+    return "^KS11" if market == "KOSPI" else "^KQ11"
+
+# =========================
+# 1. 실시간 수집 (번들 생성 / 앱 폴백 공용)
+# =========================
+def fetch_history(ticker):
+    hist = data_provider.get().history(ticker, period="6mo")
+    if isinstance(hist.columns, pd.MultiIndex): hist.columns = hist.columns.get_level_values(0)
+    return hist if not hist.empty else None
+
+def fetch_market(index_ticker):
+    return features.to_series(data_provider.get().download(index_ticker, period="6mo", progress=False)['Close'])
+
+def fetch_financials(ticker):
+    """(연도별 영업이익(억), 연도별 부채비율(%)) Series. 실패하면 (None, None)"""
+    try:
+        financials, balance_sheet = data_provider.get().financials(ticker)
+        income = financials.loc['Operating Income'].sort_index() / 1e8
+        debt = (balance_sheet.loc['Total Debt'] / balance_sheet.loc['Stockholders Equity'] * 100).sort_index()
+        income.index, debt.index = income.index.year, debt.index.year
+        return income.dropna(), debt.dropna()
+    except Exception:
+        return None, None
+
+def fetch_investor_trend(code):
+    """네이버 금융 최근 5일 외인/기관 순매매량 DataFrame(날짜, 기관, 외인). 실패하면 None"""
+    try:
+        text = data_provider.get().investor_html(code)
+        soup = BeautifulSoup(text, 'html.parser')
+        rows = soup.find_all('tr', {'onmouseover': 'mouseOver(this)'})
+        data_list = []
+        for row in rows[:5]:
+            cols = row.find_all('td')
+            if len(cols) < 9: continue
+            date, inst, fore = cols[0].text.strip()[-5:], int(cols[5].text.replace(',', '')), int(cols[6].text.replace(',', ''))
+            data_list.append({"날짜": date, "기관": inst, "외인": fore})
+        return pd.DataFrame(data_list)
+    except Exception:
+        return None
+
+def market_closes(markets, start, end, downloader=None):
+    """시장 지수 종가 {지수 티커: Series}. 매크로 저장소(macro_store)에 있으면 로컬에서, 없으면 history_cache 로 수집"""
+    wanted = sorted({market_index(m) for m in markets})
+    frame = macro_store.load_frame(start, end)
+    out = {t: frame[t].dropna() for t in wanted if frame is not None and t in frame and frame[t].notna().any()}
+    missing = [t for t in wanted if t not in out]
+    if missing:
+        out.update({t: df["Close"] for t, df in history_cache.get_histories(missing, start, end, downloader=downloader).items()})
+    return out
+
+# =========================
+# 2. 번들 구성 / 직렬화
+# =========================
+def collect(code, market, date_key, hist=None, market_close=None, macro=None, model=None, forest=None,
+            model_signature=None):
+    """
+    종목 1개의 번들 dict 를 만듭니다. hist / market_close / macro 를 넘기면 그 값을 쓰고, 없으면 실시간 조회합니다.
+    model, forest 를 넘기면 AI 확률과 근거까지 계산해 넣습니다. 항목별 실패는 None 으로 남깁니다.
+    """
+    ticker = to_ticker(code, market)
+    try:
+        hist = hist if hist is not None else fetch_history(ticker)
+    except Exception:
+        hist = None
+    try:
+        if market_close is None:
+            market_close = market_closes([market], None, None).get(market_index(market))
+        market_close = market_close if market_close is not None else fetch_market(market_index(market))
+    except Exception:
+        market_close = None
+    income, debt = fetch_financials(ticker)
+
+    bundle = {
+        "version": BUNDLE_VERSION, "date": date_key, "code": str(code).zfill(6), "market": market,
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "hist": hist, "market_close": market_close, "income": income, "debt": debt,
+        "investor": fetch_investor_trend(str(code).zfill(6)),
+        "macro": macro, "ai": None,
+    }
+    if model is not None and hist is not None and market_close is not None:
+        import inference
+        bundle["macro"] = macro = macro or macro_store.snapshot()
+        try:
+            prob, reasons, _, _ = inference.score_latest(model, forest, hist, market_close, macro)
+            bundle["ai"] = {"prob": prob, "reasons": reasons, "model_signature": model_signature}
+        except Exception as e:
+            print(f"⚠️ [번들] {code} AI 확률 계산 실패: {e}")
+    return bundle
+
+def _frame_to_json(df):
+    if df is None: return None
+    return {"index": [str(i) for i in df.index], "columns": list(df.columns),
+            "data": np.where(pd.isna(df.to_numpy(dtype=float)), None, df.to_numpy(dtype=float)).tolist()}
+
+def _frame_from_json(obj, parse_dates=True):
+    if obj is None: return None
+    index = pd.DatetimeIndex(obj["index"]) if parse_dates else obj["index"]
+    return pd.DataFrame(np.array(obj["data"], dtype=float), index=index, columns=obj["columns"])
+
+def _series_to_json(s):
+    if s is None: return None
+    return {"index": [int(i) if isinstance(i, (int, np.integer)) else str(i) for i in s.index],
+            "values": [float(v) for v in s.to_numpy(dtype=float)]}
+
+def _series_from_json(obj):
+    if obj is None: return None
+    index = obj["index"]
+    if index and isinstance(index[0], str): index = pd.DatetimeIndex(index)
+    return pd.Series(obj["values"], index=index, dtype=float)
+
+def bundle_path(date_key, code, bundle_dir=BUNDLE_DIR):
+    return os.path.join(bundle_dir, date_key, f"{str(code).zfill(6)}.json")
+
+def save(bundle, bundle_dir=BUNDLE_DIR):
+    hist = bundle["hist"]
+    if hist is not None:
+        hist = hist[[c for c in features.OHLCV if c in hist.columns]].copy()
+        hist.index = features.strip_tz(hist.index)
+    doc = dict(bundle,
+               hist=_frame_to_json(hist),
+               market_close=_series_to_json(bundle["market_close"]),
+               income=_series_to_json(bundle["income"]),
+               debt=_series_to_json(bundle["debt"]),
+               investor=bundle["investor"].to_dict("records") if bundle["investor"] is not None else None)
+    path = bundle_path(bundle["date"], bundle["code"], bundle_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(f"{path}.tmp", path)
+    return path
+
+def load(date_key, code, bundle_dir=BUNDLE_DIR):
+    """번들이 없거나, 구조 버전이 다르거나, 일봉이 스캔일까지 오지 않은 오래된 번들이면 None"""
+    path = bundle_path(date_key, code, bundle_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            doc = json.load(f)
+    except Exception:
+        return None
+    if doc.get("version") != BUNDLE_VERSION or doc.get("date") != date_key:
+        return None
+    hist = _frame_from_json(doc["hist"])
+    if hist is None or hist.empty or hist.index[-1] < pd.Timestamp(date_key):
+        return None
+    inv = doc["investor"]
+    return dict(doc, hist=hist,
+                market_close=_series_from_json(doc["market_close"]),
+                income=_series_from_json(doc["income"]),
+                debt=_series_from_json(doc["debt"]),
+                investor=pd.DataFrame(inv) if inv is not None else None)
+
+# =========================
+# 3. 스캔 후처리 단계
+# =========================
+def build_all(result, date_key, workers=BUNDLE_WORKERS, model_path=MODEL_PATH, bundle_dir=BUNDLE_DIR,
+              downloader=None):
+    """
+    포착 결과 DataFrame(종목코드, 시장) 전체의 번들을 만들어 저장하고 저장 개수를 반환합니다.
+    6개월 일봉과 지수는 history_cache 로 한 번에 묶어 받고, 재무/수급은 종목별로 스레드에서 받습니다.
+    """
+    if result is None or result.empty:
+        return 0
+    rows = [(str(r["종목코드"]).zfill(6), normalize_market(r["시장"])) for _, r in result.iterrows()]
+    end = pd.Timestamp(date_key) + pd.Timedelta(days=1)
+    start = end - pd.Timedelta(days=HISTORY_DAYS + 1)
+    histories = history_cache.get_histories([to_ticker(c, m) for c, m in rows], start, end, downloader=downloader)
+    indices = market_closes([m for _, m in rows], start, end, downloader=downloader)
+
+    model = forest = signature = None
+    try:
+        import inference
+        signature = inference.model_signature(model_path)
+        if signature is not None:
+            model, forest, _ = inference.load_model(model_path)
+    except Exception as e:
+        print(f"⚠️ [번들] 모델 로드 실패, AI 확률 없이 생성: {e}")
+    macro = macro_store.snapshot() if model is not None else None
+
+    # AI 확률은 포착 종목 전체를 한 번에 채점 (inference.score_batch)
+    scores = {}
+    ready = [(c, m) for c, m in rows if to_ticker(c, m) in histories and market_index(m) in indices]
+    if model is not None and ready:
+        prob, X = inference.score_batch(model, forest, [histories[to_ticker(c, m)] for c, m in ready],
+                                        [indices[market_index(m)] for _, m in ready], macro)
+        for (code, _), p, (_, x) in zip(ready, prob, X.iterrows()):
+            scores[code] = {"prob": float(p), "reasons": inference.explain(x, macro), "model_signature": signature}
+
+    def job(row):
+        code, market = row
+        bundle = collect(code, market, date_key, hist=histories.get(to_ticker(code, market)),
+                         market_close=indices.get(market_index(market)), macro=macro)
+        if bundle["hist"] is None:
+            return None
+        bundle["ai"] = scores.get(code)
+        return save(bundle, bundle_dir)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        saved = [p for p in pool.map(job, rows) if p]
+    print(f"📦 [번들] {len(saved)}/{len(rows)}개 종목 대시보드 번들 저장: {os.path.join(bundle_dir, date_key)}")
+    return len(saved)
+
+def latest_result(out_dir=OUT_DIR):
+    date_key = result_files.latest_result_date(out_dir)
+    if date_key is None: return None, None
+    return result_table.load(date_key, out_dir), date_key
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="포착 종목 대시보드 번들 생성")
+    parser.add_argument("--date", help="YYYYMMDD (기본: 최신 final_result CSV)")
+    parser.add_argument("--workers", type=int, default=BUNDLE_WORKERS)
+    args = parser.parse_args()
+    if args.date:
+        result, date_key = result_table.load(args.date, OUT_DIR), args.date
+    else:
+        result, date_key = latest_result()
+    build_all(result, date_key, workers=args.workers)
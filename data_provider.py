@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+데이터 공급자 계층 (스캐너 / 채점 / 번들 / 학습 / 앱 공용)
+
+외부 데이터는 모두 이 모듈의 공급자를 거쳐 받습니다.
+    listing_html()                      KRX KIND 상장 종목 목록
+    ohlcv_xml(code, count, timeframe)   Naver fchart 일/주/분봉
+    investor_html(code)                 Naver 금융 외인/기관 순매매 페이지
+    download(tickers, start, end)       yfinance 일봉 (종목 이력 / 시장 지수 / 매크로, yf.download 형태)
+    history(ticker, period)             yfinance 종목 일봉 (기간 지정)
+    financials(ticker)                  yfinance 손익계산서 / 재무상태표
+
+공급자 종류 (환경 변수 DATA_PROVIDER 또는 scanner.py --provider)
+    live    실제 소스에 요청 (기본)
+    record  live 와 같이 요청하면서 응답을 DATA_REPLAY_DIR(data/replay) 에 저장
+    replay  저장된 응답만으로 동작 (네트워크 없음, 속도 제한/대기 없음). 없는 응답은 ReplayMiss
+
+재생은 녹화 세션의 시각(now)을 그대로 써서 같은 날짜 / 구간으로 요청하므로 결과가 녹화 때와 같습니다.
+봉 요청은 종목별로 가장 긴 응답을 저장해 두고 더 짧은 요청은 최근 봉만 잘라 돌려주며,
+yfinance 일봉은 티커별로 받은 구간을 합쳐 두고 그 안의 구간 요청을 잘라 돌려줍니다.
+로컬 저장소(data/ohlcv, data/history 등)가 비어 있는 상태에서 녹화하면 어떤 저장소 상태에서도 재생할 수 있습니다.
+
+    DATA_PROVIDER=record python scanner.py --workers 8    # 녹화
+    DATA_PROVIDER=replay python scanner.py --profile      # 오프라인 재생 (같은 결과, 네트워크 없음)
+"""
+import os
+import re
+import json
+import pickle
+import threading
+from datetime import datetime
+
+import http_client
+
+DATA_PROVIDER = os.getenv("DATA_PROVIDER", "live")
+REPLAY_DIR = os.getenv("DATA_REPLAY_DIR", os.path.join("data", "replay"))
+PROVIDERS = ["live", "record", "replay"]
+
+NAVER_HEADERS = {"Referer": "https://finance.naver.com/"}
+LISTING_URL = "https://kind.krx.co.kr/corpgeneral/corpList.do"
+FCHART_URL = "https://fchart.stock.naver.com/sise.nhn"
+INVESTOR_URL = "https://finance.naver.com/item/frgn.naver"
+SISE_ITEM_RE = re.compile(r'<item\s+data="[^"]*"\s*/>')
+
+class ReplayMiss(LookupError):
+    """재생 저장소에 해당 요청의 응답이 없음"""
+
+# =========================
+# 1. 실제 소스
+# =========================
+class LiveProvider:
+    name = "live"
+    throttled = True     # 요청 속도 제한 / 대기 적용 여부 (scanner)
+
+    def __init__(self, client=None):
+        self.client = client or http_client.default_client()
+
+    def now(self):
+        return datetime.now()
+
+    def listing_html(self):
+        return self.client.get_text(LISTING_URL, params={"method": "download"}, timeout=15, conditional=True)
+
+    def ohlcv_xml(self, code, count, timeframe="day", policy=None, throttle=None):
+        params = {"symbol": code, "timeframe": timeframe, "count": str(count), "requestType": "0"}
+        return self.client.get_text(FCHART_URL, params=params, headers=NAVER_HEADERS, timeout=15, policy=policy,
+                                    throttle=throttle)
+
+    def investor_html(self, code):
+        return self.client.get_text(INVESTOR_URL, params={"code": code}, timeout=10, conditional=True)
+
+    def download(self, tickers, start=None, end=None, period=None, **kwargs):
+        import yfinance as yf
+        if period is not None:
+            return yf.download(tickers, period=period, **kwargs)
+        return yf.download(tickers, start=start, end=end, **kwargs)
+
+    def history(self, ticker, period="6mo"):
+        import yfinance as yf
+        return yf.Ticker(ticker).history(period=period)
+
+    def financials(self, ticker):
+        """(손익계산서, 재무상태표) DataFrame"""
+        import yfinance as yf
+        tk = yf.Ticker(ticker)
+        return tk.financials, tk.balance_sheet
+
+    def metrics(self):
+        return {"provider": self.name}
+
+# =========================
+# 2. 녹화 / 재생 저장소
+# =========================
+def _safe(name):
+    return re.sub(r"[^0-9A-Za-z]", "_", str(name))
+
+def _trim_items(xml, count):
+    """fchart 응답에서 최근 count 개 <item> 만 남김 (항목은 시간순)"""
+    items = list(SISE_ITEM_RE.finditer(xml))
+    if count >= len(items):
+        return xml
+    return xml[:items[0].start()] + "\n".join(m.group(0) for m in items[-count:]) + xml[items[-1].end():]
+
+def _item_count(xml):
+    return len(SISE_ITEM_RE.findall(xml))
+
+class ReplayStore:
+    """
+    replay_dir/<종류>/<키>.pkl 에 응답을 저장합니다.
+    manifest.json 의 recorded_at 은 마지막 녹화 세션 시각으로, 재생 때 now() 로 씁니다.
+    """
+
+    def __init__(self, replay_dir=REPLAY_DIR):
+        self.dir = replay_dir
+        self.lock = threading.Lock()
+
+    def path(self, kind, key):
+        return os.path.join(self.dir, kind, f"{_safe(key)}.pkl")
+
+    def read(self, kind, key):
+        path = self.path(kind, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def write(self, kind, key, value):
+        path = self.path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def manifest(self):
+        path = os.path.join(self.dir, "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_manifest(self, recorded_at):
+        os.makedirs(self.dir, exist_ok=True)
+        path = os.path.join(self.dir, "manifest.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"recorded_at": recorded_at.isoformat(timespec="seconds")}, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+class RecordingProvider:
+    """inner 공급자의 응답을 저장하며 그대로 반환"""
+    name = "record"
+    throttled = True
+
+    def __init__(self, inner=None, replay_dir=REPLAY_DIR):
+        self.inner = inner or LiveProvider()
+        self.store = ReplayStore(replay_dir)
+        self.counts = {"recorded": 0}
+        self.started = self.inner.now()
+        self.store.write_manifest(self.started)
+
+    def now(self):
+        return self.inner.now()
+
+    def _put(self, kind, key, value):
+        self.store.write(kind, key, value)
+        with self.store.lock:
+            self.counts["recorded"] += 1
+
+    def listing_html(self):
+        text = self.inner.listing_html()
+        self._put("listing", "kind", text)
+        return text
+
+    def ohlcv_xml(self, code, count, timeframe="day", policy=None, throttle=None):
+        text = self.inner.ohlcv_xml(code, count, timeframe, policy, throttle)
+        key = f"{timeframe}_{code}"
+        with self.store.lock:
+            old = self.store.read("ohlcv", key)
+            # 종목별로 가장 긴 요청의 응답을 남김 (짧은 요청은 재생 때 잘라서 제공)
+            keep = old is None or count >= old["count"]
+        if keep:
+            self._put("ohlcv", key, {"count": int(count), "text": text})
+        return text
+
+    def investor_html(self, code):
+        text = self.inner.investor_html(code)
+        self._put("investor", code, text)
+        return text
+
+    def download(self, tickers, start=None, end=None, period=None, **kwargs):
+        raw = self.inner.download(tickers, start=start, end=end, period=period, **kwargs)
+        if period is not None:
+            self._put("download_period", f"{'_'.join(_as_list(tickers))}_{period}", raw)
+            return raw
+        import pandas as pd
+        import history_cache
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        got = history_cache.split_download(raw, _as_list(tickers))
+        for t in _as_list(tickers):
+            new = got.get(t, pd.DataFrame())
+            with self.store.lock:
+                old = self.store.read("download", t)
+                if old is not None and old["start"] <= end and start <= old["end"]:
+                    # 겹치거나 맞닿은 구간은 합쳐서 하나로 유지 (겹치는 날은 새 값)
+                    data = pd.concat([old["data"], new])
+                    data = data[~data.index.duplicated(keep="last")].sort_index()
+                    entry = {"start": min(start, old["start"]), "end": max(end, old["end"]), "data": data}
+                else:
+                    entry = {"start": start, "end": end, "data": new}
+                self.store.write("download", t, entry)
+                self.counts["recorded"] += 1
+        return raw
+
+    def history(self, ticker, period="6mo"):
+        hist = self.inner.history(ticker, period)
+        self._put("history", f"{ticker}_{period}", hist)
+        return hist
+
+    def financials(self, ticker):
+        out = self.inner.financials(ticker)
+        self._put("financials", ticker, out)
+        return out
+
+    def metrics(self):
+        return {"provider": self.name, "replay_dir": self.store.dir, **self.counts}
+
+def _as_list(tickers):
+    return [tickers] if isinstance(tickers, str) else list(tickers)
+
+class ReplayProvider:
+    """녹화된 응답만으로 동작하는 공급자 (네트워크 없음)"""
+    name = "replay"
+    throttled = False
+
+    def __init__(self, replay_dir=REPLAY_DIR):
+        self.store = ReplayStore(replay_dir)
+        manifest = self.store.manifest()
+        self.recorded_at = datetime.fromisoformat(manifest["recorded_at"]) if manifest else None
+        self.lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0}
+
+    def now(self):
+        return self.recorded_at or datetime.now()
+
+    def _count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def _get(self, kind, key):
+        value = self.store.read(kind, key)
+        if value is None:
+            self._count("misses")
+            raise ReplayMiss(f"{kind}/{key}")
+        self._count("hits")
+        return value
+
+    def listing_html(self):
+        return self._get("listing", "kind")
+
+    def ohlcv_xml(self, code, count, timeframe="day", policy=None, throttle=None):
+        entry = self.store.read("ohlcv", f"{timeframe}_{code}")
+        # 녹화 응답이 요청보다 짧고 그 요청 수만큼 꽉 차 있으면 더 오래된 봉이 빠져 있으므로 제공할 수 없음
+        if entry is None or (count > entry["count"] and _item_count(entry["text"]) >= entry["count"]):
+            self._count("misses")
+            raise ReplayMiss(f"ohlcv/{timeframe}_{code} (count {count})")
+        self._count("hits")
+        return _trim_items(entry["text"], int(count))
+
+    def investor_html(self, code):
+        return self._get("investor", code)
+
+    def download(self, tickers, start=None, end=None, period=None, **kwargs):
+        if period is not None:
+            return self._get("download_period", f"{'_'.join(_as_list(tickers))}_{period}")
+        import pandas as pd
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        frames = {}
+        for t in _as_list(tickers):
+            entry = self.store.read("download", t)
+            if entry is None or entry["start"] > start or entry["end"] < end:
+                self._count("misses")
+                continue
+            self._count("hits")
+            df = entry["data"]
+            df = df[(df.index >= start) & (df.index < end)]
+            if not df.empty:
+                frames[t] = df
+        if not frames:
+            if any(self.store.read("download", t) is None for t in _as_list(tickers)):
+                raise ReplayMiss(f"download/{','.join(_as_list(tickers)[:3])} [{start.date()}, {end.date()})")
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def history(self, ticker, period="6mo"):
+        return self._get("history", f"{ticker}_{period}")
+
+    def financials(self, ticker):
+        return self._get("financials", ticker)
+
+    def metrics(self):
+        return {"provider": self.name, "replay_dir": self.store.dir, **self.counts}
+
+# =========================
+# 3. 프로세스 공용 공급자
+# =========================
+_current = None
+_current_lock = threading.Lock()
+
+def make(name=DATA_PROVIDER, replay_dir=REPLAY_DIR):
+    if name == "live":
+        return LiveProvider()
+    if name == "record":
+        return RecordingProvider(LiveProvider(), replay_dir)
+    if name == "replay":
+        return ReplayProvider(replay_dir)
+    raise ValueError(f"알 수 없는 데이터 공급자: {name} (live / record / replay)")
+
+def get():
+    """프로세스 공용 공급자 (최초 호출 시 DATA_PROVIDER 로 생성)"""
+    global _current
+    with _current_lock:
+        if _current is None:
+            _current = make()
+        return _current
+
+def use(provider):
+    """공용 공급자를 교체하고 이전 공급자를 반환"""
+    global _current
+    with _current_lock:
+        previous, _current = _current, provider
+        return previous
+
+def now():
+    """현재 시각 (재생 중이면 녹화 세션 시각)"""
+    return get().now()
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+AI 모델 피처 엔진 (학습 train_model.py / 서빙 app.py 공용)
+
+여러 종목의 일봉을 (일자 x 종목) 2차원 배열로 쌓아 22개 피처를 NumPy 커널로 한 번에 계산합니다.
+각 종목의 봉은 0번 행부터 왼쪽 정렬로 채우고 남는 뒷부분은 NaN으로 둡니다.
+지표 정의는 pandas_ta 기본값(rsi/atr=RMA, bbands ddof=0, macd=SMA 시드 EMA, stoch=SMA 평활)을 그대로 따릅니다.
+피처 목록이나 계산식이 바뀌면 FEATURE_VERSION 을 올려 기존 모델과 섞이지 않게 합니다.
+"""
+import numpy as np
+import pandas as pd
+
+FEATURE_VERSION = "1.7"
+
+# 종목 일봉에서 계산하는 피처
+STOCK_FEATURES = [
+    'rsi', 'bb_per', 'ma_diff', 'vol_consecutive_days', 'vol_spike_ratio',
+    'candle_body', 'relative_strength', 'macd_hist', 'mfi', 'atr_ratio',
+    'stoch_k', 'disparity_60', 'price_range', 'vol_roc', 'range_roc',
+    'day_of_week'
+]
+# 글로벌 매크로 피처 (학습: 일자별 시계열 / 서빙: 최신 스냅샷 값)
+MACRO_FEATURES = ['nasdaq_return', 'vix_close', 'dxy_return', 'tnx_close', 'gold_return', 'nasdaq_f_return']
+FEATURE_COLUMNS = STOCK_FEATURES + MACRO_FEATURES
+
+EPS = 1e-9
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+def strip_tz(index):
+    """시간대 정보를 제거해 tz-naive 인덱스로 통일"""
+    return index.tz_localize(None) if getattr(index, "tz", None) is not None else index
+
+def to_series(obj):
+    """yf.download 결과(단일 컬럼 DataFrame 포함)를 tz-naive Series로 변환"""
+    s = obj.squeeze() if isinstance(obj, pd.DataFrame) else obj
+    if isinstance(s, pd.DataFrame): s = s.iloc[:, 0]
+    s = s.copy()
+    s.index = strip_tz(s.index)
+    return s
+
+# =========================
+# 1. 배열 커널 (axis 0 = 일자, axis 1 = 종목)
+# =========================
+def shift(x, n):
+    out = np.full_like(x, np.nan)
+    if n > 0: out[n:] = x[:-n]
+    elif n < 0: out[:n] = x[-n:]
+    else: out[:] = x
+    return out
+
+def rolling_sum(x, n):
+    """min_periods=n 롤링 합계 (창 안에 NaN이 있으면 NaN)"""
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    ccnt = np.cumsum(valid, axis=0)
+    out = np.full_like(x, np.nan)
+    out[n - 1:] = csum[n - 1:] - np.vstack([np.zeros((1,) + x.shape[1:]), csum[:-n]])
+    cnt = ccnt[n - 1:] - np.vstack([np.zeros((1,) + x.shape[1:]), ccnt[:-n]])
+    out[n - 1:][cnt < n] = np.nan
+    return out
+
+def sma(x, n):
+    return rolling_sum(x, n) / n
+
+def rolling_std(x, n):
+    """모표준편차(ddof=0) 롤링. 종목별 첫 값을 빼고 계산해 자릿수 손실을 줄임"""
+    base = x[0]
+    d = x - np.where(np.isnan(base), 0.0, base)
+    mean = sma(d, n)
+    var = sma(d * d, n) - mean * mean
+    return np.sqrt(np.maximum(var, 0.0))
+
+def _window_reduce(x, n, fn):
+    out = np.full_like(x, np.nan)
+    if len(x) >= n:
+        out[n - 1:] = fn(np.lib.stride_tricks.sliding_window_view(x, n, axis=0), axis=-1)
+    return out
+
+def rolling_max(x, n): return _window_reduce(x, n, np.max)
+def rolling_min(x, n): return _window_reduce(x, n, np.min)
+
+def ewm_adjusted(x, alpha, min_periods):
+    """pandas ewm(alpha, min_periods, adjust=True).mean() 과 같은 가중 평균 (RMA)"""
+    out = np.full_like(x, np.nan)
+    num = np.zeros(x.shape[1:])
+    den = np.zeros(x.shape[1:])
+    nobs = np.zeros(x.shape[1:])
+    decay = 1.0 - alpha
+    for t in range(len(x)):
+        xt = x[t]
+        valid = ~np.isnan(xt)
+        num = num * decay + np.where(valid, xt, 0.0)
+        den = den * decay + valid
+        nobs += valid
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[t] = np.where(nobs >= min_periods, num / den, np.nan)
+    return out
+
+def rma(x, n):
+    return ewm_adjusted(x, 1.0 / n, n)
+
+def ema(x, n):
+    """pandas_ta ema 기본값: 첫 유효값부터 n개 SMA로 시드한 뒤 adjust=False 지수평활"""
+    out = np.full_like(x, np.nan)
+    alpha = 2.0 / (n + 1)
+    state = np.full(x.shape[1:], np.nan)
+    acc = np.zeros(x.shape[1:])
+    cnt = np.zeros(x.shape[1:])
+    for t in range(len(x)):
+        xt = x[t]
+        valid = ~np.isnan(xt)
+        seeded = cnt >= n
+        warm = ~seeded & valid
+        acc += np.where(warm, xt, 0.0)
+        cnt += warm
+        state = np.where(~seeded & (cnt == n), acc / n, state)
+        state = np.where(seeded & valid, alpha * xt + (1 - alpha) * state, state)
+        out[t] = np.where(cnt >= n, state, np.nan)
+    return out
+
+def roc(x, n):
+    prev = shift(x, n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100 * (x - prev) / prev
+
+def pct_change(x, n):
+    prev = shift(x, n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return x / prev - 1
+
+def ffill(x):
+    """일자 축 방향 forward fill"""
+    idx = np.where(~np.isnan(x), np.arange(len(x))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return x[idx, np.arange(x.shape[1])]
+
+def consecutive_up(volume):
+    """거래량이 전일보다 늘어난 연속 일수"""
+    up = np.zeros(volume.shape[1:])
+    out = np.zeros_like(volume)
+    prev = shift(volume, 1)
+    for t in range(len(volume)):
+        up = np.where(volume[t] > prev[t], up + 1, 0)
+        out[t] = up
+    return out
+
+# =========================
+# 2. 패널 구성 및 피처 계산
+# =========================
+def build_panel(frames, markets):
+    """
+    frames: 종목별 OHLCV DataFrame 리스트, markets: 종목별 시장 지수 종가 Series 리스트
+    반환: 필드별 (최대봉수 x 종목수) 배열, 종목별 일자 인덱스 리스트
+    """
+    n_rows = max(len(df) for df in frames)
+    panel = {k: np.full((n_rows, len(frames)), np.nan) for k in OHLCV + ["market_close"]}
+    dates = []
+    for j, (df, market) in enumerate(zip(frames, markets)):
+        idx = strip_tz(df.index)
+        dates.append(idx)
+        n = len(df)
+        for k in OHLCV:
+            panel[k][:n, j] = df[k].to_numpy(dtype=np.float64)
+        panel["market_close"][:n, j] = to_series(market).reindex(idx).to_numpy(dtype=np.float64)
+    return panel, dates
+
+def stock_feature_panel(panel, dates):
+    """STOCK_FEATURES 16개를 (일자 x 종목 x 피처) 배열로 계산"""
+    o, h, l, c, v = (ffill(panel[k]) for k in OHLCV)
+    m = ffill(panel["market_close"])
+    f = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # 1. 개별 종목 기술적 지표
+        delta = c - shift(c, 1)
+        gain, loss = np.where(delta < 0, 0.0, delta), np.where(delta > 0, 0.0, -delta)
+        avg_gain, avg_loss = rma(gain, 14), rma(loss, 14)
+        f['rsi'] = 100 * avg_gain / (avg_gain + avg_loss)
+        ma20 = sma(c, 20)
+        band = 2 * rolling_std(c, 20)
+        f['bb_per'] = (c - (ma20 - band)) / ((ma20 + band) - (ma20 - band))
+        f['ma_diff'] = (sma(c, 5) - ma20) / (ma20 + EPS)
+
+        # 2. 거래량 및 캔들 분석
+        f['vol_consecutive_days'] = consecutive_up(v)
+        f['vol_spike_ratio'] = v / (sma(v, 20) + EPS)
+        f['candle_body'] = (c - o) / (h - l + EPS)
+
+        # 3. 시장 대비 상대 강도 (RS)
+        f['relative_strength'] = pct_change(c, 5) - pct_change(m, 5)
+
+        # 4. 모멘텀 및 보조 지표
+        macd = ema(c, 12) - ema(c, 26)
+        f['macd_hist'] = macd - ema(macd, 9)
+        typical = (h + l + c) / 3
+        flow = typical * v
+        t_diff = typical - shift(typical, 1)
+        pos = rolling_sum(np.where(t_diff > 0, flow, 0.0), 14)
+        neg = rolling_sum(np.where(t_diff < 0, flow, 0.0), 14)
+        f['mfi'] = 100 * pos / (pos + neg)
+        prev_c = shift(c, 1)
+        hl = h - l
+        hl = np.where(hl == 0, np.finfo(float).eps, hl)
+        tr = np.fmax(np.fmax(np.abs(hl), np.abs(h - prev_c)), np.abs(prev_c - l))
+        tr[0] = np.nan
+        f['atr_ratio'] = rma(tr, 14) / (c + EPS)
+        lowest, highest = rolling_min(l, 14), rolling_max(h, 14)
+        rng = highest - lowest
+        rng = np.where(rng == 0, np.finfo(float).eps, rng)
+        f['stoch_k'] = sma(100 * (c - lowest) / rng, 3)
+        f['disparity_60'] = (c / (sma(c, 60) + EPS)) * 100
+        f['price_range'] = (h - l) / (c + EPS)
+        f['vol_roc'] = roc(v, 5)
+        f['range_roc'] = roc(f['price_range'], 5)
+
+    dow = np.full_like(c, np.nan)
+    for j, idx in enumerate(dates):
+        dow[:len(idx), j] = idx.dayofweek
+    f['day_of_week'] = dow
+
+    # 원본 파이프라인과 같이 중간 결측치는 직전 값으로 채움
+    return np.stack([ffill(f[k]) for k in STOCK_FEATURES], axis=-1)
+
+def extract_features(frames, markets, macro=None, dropna=True):
+    """
+    여러 종목의 22개 피처를 한 번에 계산해 종목별 DataFrame(FEATURE_COLUMNS + Close) 리스트로 반환합니다.
+    macro: 일자별 MACRO_FEATURES 시계열 DataFrame(학습) 또는 최신 값 dict(서빙). None이면 매크로 컬럼은 NaN.
+    일자별 매크로를 넘기면 nasdaq_f_return 은 다음 거래일 nasdaq_return 으로 채웁니다.
+    """
+    if not frames:
+        return []
+    panel, dates = build_panel(frames, markets)
+    values = stock_feature_panel(panel, dates)
+    close = ffill(panel["Close"])
+
+    out = []
+    for j, idx in enumerate(dates):
+        n = len(idx)
+        df = pd.DataFrame(values[:n, j], index=idx, columns=STOCK_FEATURES)
+        df['Close'] = close[:n, j]
+        if isinstance(macro, pd.DataFrame):
+            joined = macro.reindex(idx).ffill()
+            for k in MACRO_FEATURES[:-1]:
+                df[k] = joined[k].to_numpy()
+            df['nasdaq_f_return'] = df['nasdaq_return'].shift(-1).fillna(0)
+        else:
+            for k in MACRO_FEATURES:
+                df[k] = (macro or {}).get(k, np.nan)
+        out.append(df.dropna() if dropna else df)
+    return out
+
+def macro_frame(nasdaq_ret, vix, dxy_ret, tnx, gold_ret):
+    """학습용 일자별 매크로 시계열을 MACRO_FEATURES 컬럼 DataFrame으로 묶음"""
+    series = [to_series(s).rename(k) for s, k in zip([nasdaq_ret, vix, dxy_ret, tnx, gold_ret], MACRO_FEATURES[:-1])]
+    return pd.concat(series, axis=1)
+
+# =========================
+# 3. 기준 구현 (pandas_ta, 정합성 검증용)
+# =========================
+def pandas_ta_reference(df, market_close):
+    """기존 종목별 pandas_ta 계산 (stock_feature_panel 의 기준 구현)"""
+    import pandas_ta as ta
+    df = df.copy()
+    df.index = strip_tz(df.index)
+    df['rsi'] = ta.rsi(df['Close'], length=14)
+    bb = ta.bbands(df['Close'], length=20, std=2)
+    l_col = [c for c in bb.columns if 'BBL' in c][0]
+    u_col = [c for c in bb.columns if 'BBU' in c][0]
+    df['bb_per'] = (df['Close'] - bb[l_col]) / (bb[u_col] - bb[l_col])
+    ma5, ma20 = ta.sma(df['Close'], 5), ta.sma(df['Close'], 20)
+    df['ma_diff'] = (ma5 - ma20) / (ma20 + EPS)
+    vol_up = (df['Volume'] > df['Volume'].shift(1)).astype(int)
+    df['vol_consecutive_days'] = vol_up.groupby((vol_up != vol_up.shift()).cumsum()).cumsum()
+    df['vol_spike_ratio'] = df['Volume'] / (ta.sma(df['Volume'], 20) + EPS)
+    df['candle_body'] = (df['Close'] - df['Open']) / (df['High'] - df['Low'] + EPS)
+    df = df.join(to_series(market_close).rename("market_close"), how='left').ffill()
+    df['relative_strength'] = df['Close'].pct_change(5) - df['market_close'].pct_change(5)
+    df['macd_hist'] = ta.macd(df['Close'])['MACDh_12_26_9']
+    df['mfi'] = ta.mfi(df['High'], df['Low'], df['Close'], df['Volume'], length=14)
+    df['atr_ratio'] = ta.atr(df['High'], df['Low'], df['Close'], length=14) / (df['Close'] + EPS)
+    df['stoch_k'] = ta.stoch(df['High'], df['Low'], df['Close'])['STOCHk_14_3_3']
+    df['disparity_60'] = (df['Close'] / (ta.sma(df['Close'], 60) + EPS)) * 100
+    df['price_range'] = (df['High'] - df['Low']) / (df['Close'] + EPS)
+    df['vol_roc'] = ta.roc(df['Volume'], length=5)
+    df['range_roc'] = ta.roc(df['price_range'], length=5)
+    df['day_of_week'] = df.index.dayofweek
+    return df[STOCK_FEATURES].ffill()
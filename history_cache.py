@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+yfinance 일봉 이력 수집 계층 (종목/매크로 티커 공용 로컬 캐시)
+
+티커별로 받은 구간과 일봉을 data/history 에 저장해 두고, 다음 실행부터는 최근 TAIL_OVERLAP 봉부터만 받아 이어붙입니다.
+겹치는 봉의 가격이 저장본과 다르면(액면분할/배당 등 수정주가 반영) 그 티커는 요청 구간 전체를 다시 받아 교체합니다.
+여러 티커를 묶음(batch) 단위로 yf.download 한 번에 요청하고, 묶음끼리는 스레드로 동시에 받습니다.
+downloader 인자에 yf.download 와 같은 형태의 함수를 넘기면 네트워크 없이 검증할 수 있습니다.
+"""
+import os
+import re
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.path.join("data", "history")
+BATCH_SIZE = 20          # yf.download 1회에 묶는 티커 수
+FETCH_WORKERS = 4        # 동시에 요청하는 묶음 수
+TAIL_OVERLAP = 5         # 증분 요청 시 저장본과 겹쳐 받는 최근 봉 수 (수정주가 검증용)
+MIN_OVERLAP = 2          # 이어붙이기 전에 최소로 일치해야 하는 겹침 봉 수
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+PRICE_RTOL = 1e-6        # 겹침 봉 가격 비교 허용 오차 (yfinance 부동소수 표기 차이)
+
+def cache_path(ticker, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, re.sub(r"[^0-9A-Za-z]", "_", ticker) + ".pkl")
+
+def load(ticker, cache_dir=CACHE_DIR):
+    """저장본 {"start", "end", "data"} 또는 None"""
+    path = cache_path(ticker, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+def save(ticker, entry, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(ticker, cache_dir)
+    with open(f"{path}.tmp", "wb") as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f"{path}.tmp", path)
+
+def default_downloader():
+    """데이터 공급자(data_provider)의 yf.download 형태 함수 (live / record / replay)"""
+    import data_provider
+    return data_provider.get().download
+
+def split_download(raw, tickers):
+    """yf.download 결과(단일/다중 티커, 컬럼 레벨 순서 무관)를 티커별 DataFrame으로 분리"""
+    out = {}
+    if raw is None or raw.empty:
+        return out
+    if not isinstance(raw.columns, pd.MultiIndex):
+        if len(tickers) == 1:
+            out[tickers[0]] = raw
+        return out
+    level = 0 if set(tickers) & set(raw.columns.get_level_values(0)) else 1
+    for t in tickers:
+        if t in raw.columns.get_level_values(level):
+            df = raw.xs(t, axis=1, level=level).dropna(how="all")
+            if not df.empty:
+                out[t] = df
+    return out
+
+def _fetch_batch(tickers, start, end, downloader):
+    try:
+        raw = downloader(tickers, start=start, end=end, progress=False, group_by="ticker", threads=False)
+    except Exception as e:
+        print(f"⚠️ [캐시] 이력 다운로드 실패 ({', '.join(tickers[:3])}...): {e}")
+        return {}
+    return split_download(raw, tickers)
+
+def _strip_tz(df):
+    if getattr(df.index, "tz", None) is not None:
+        df = df.copy()
+        df.index = df.index.tz_localize(None)
+    return df
+
+def merge_tail(cached, tail):
+    """
+    저장본 뒤에 새 봉을 이어붙입니다 (ohlcv_store.merge_tail 과 같은 규칙).
+    겹치는 봉이 부족하거나, 마지막 겹침 봉(장중 수집분일 수 있음)을 뺀 겹침 구간의 가격이 다르면 None 을 반환합니다.
+    """
+    overlap = cached.index.intersection(tail.index)
+    if len(overlap) < min(MIN_OVERLAP, len(tail)):
+        return None
+    cols = [c for c in PRICE_COLUMNS if c in cached.columns and c in tail.columns]
+    old = cached.loc[overlap[:-1], cols].to_numpy(dtype=float)
+    new = tail.loc[overlap[:-1], cols].to_numpy(dtype=float)
+    if not np.allclose(old, new, rtol=PRICE_RTOL, equal_nan=True):
+        return None
+    merged = pd.concat([cached[cached.index < overlap[-1]], tail[tail.index >= overlap[-1]]])
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+def _fetch_plan(plan, end, downloader, workers, batch_size):
+    """{요청 시작일: [티커...]} 를 묶음으로 나눠 동시에 받아 {티커: DataFrame} 반환. 반환: (결과, 요청 수, 티커 수)"""
+    jobs = [(group[i:i + batch_size], fetch_start)
+            for fetch_start, group in plan.items() for i in range(0, len(group), batch_size)]
+    fetched = {}
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for got in pool.map(lambda j: _fetch_batch(j[0], j[1], end, downloader), jobs):
+                fetched.update({t: _strip_tz(df) for t, df in got.items()})
+    return fetched, len(jobs), sum(len(b) for b, _ in jobs)
+
+def get_histories(tickers, start, end, downloader=None, workers=FETCH_WORKERS,
+                  batch_size=BATCH_SIZE, cache_dir=CACHE_DIR):
+    """
+    tickers 각각의 [start, end) 일봉을 {티커: DataFrame} 으로 반환합니다. (수집 실패 티커는 제외)
+    저장본이 요청 시작일을 덮으면 최근 TAIL_OVERLAP 봉부터만 받아 겹침 구간을 검증하고,
+    아니면(또는 검증에 실패하면) 요청 구간 전체를 받습니다.
+    """
+    downloader = downloader or default_downloader()
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end)
+
+    entries, plan = {}, {}
+    for t in dict.fromkeys(tickers):
+        entry = load(t, cache_dir)
+        if entry is not None and entry["start"] <= start and not entry["data"].empty:
+            entries[t] = entry
+            # 최근 몇 봉을 겹쳐 받아 수정주가 반영 여부를 확인 (마지막 봉은 장중 수집분일 수 있어 새 값으로 덮어씀)
+            if entry["end"] < end:
+                data = entry["data"]
+                plan.setdefault(data.index[-min(TAIL_OVERLAP, len(data))], []).append(t)
+        else:
+            plan.setdefault(start, []).append(t)
+
+    fetched, n_jobs, n_tickers = _fetch_plan(plan, end, downloader, workers, batch_size)
+    merged, repair = {}, []
+    for t, new in fetched.items():
+        old = entries.get(t)
+        if old is None:
+            continue
+        data = merge_tail(old["data"], new)
+        if data is None:
+            repair.append(t)   # 겹침 구간 가격이 바뀜 -> 저장본을 버리고 전체 재수집
+        else:
+            merged[t] = data
+    if repair:
+        refetched, n_more, _ = _fetch_plan({start: repair}, end, downloader, workers, batch_size)
+        n_jobs += n_more
+        for t in repair:
+            entries.pop(t, None)
+            fetched.pop(t, None)
+            if t in refetched:
+                fetched[t] = refetched[t]
+    if n_jobs:
+        print(f"📥 [캐시] {n_tickers}개 티커 갱신 요청 ({n_jobs}회) | 캐시 적중 {len(entries)}개 | 수정주가 재수집 {len(repair)}개")
+
+    out = {}
+    for t in dict.fromkeys(tickers):
+        old = entries.get(t)
+        new = fetched.get(t)
+        if new is not None:
+            data = merged.get(t, new)
+            entry = {"start": min(start, old["start"]) if old else start, "end": max(end, old["end"]) if old else end,
+                     "data": data}
+            save(t, entry, cache_dir)
+        elif old is not None:
+            entry = old
+        else:
+            continue
+        df = entry["data"]
+        df = df[(df.index >= start) & (df.index < end)]
+        if not df.empty:
+            out[t] = df
+    return out
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+공용 HTTP 클라이언트 (스캐너 / 앱 스크래퍼 공용)
+
+requests.Session 하나를 재사용해 Naver/KRX 연결을 keep-alive 로 유지하고(호스트별 연결 풀),
+gzip 압축 응답을 받습니다. 일시적 실패(타임아웃, 연결 오류, 429/5xx)는 RetryPolicy 의
+지수 백오프 + 지터로 재시도하고(Retry-After 헤더 우선), 조건부 요청(ETag / Last-Modified)을
+켠 호출은 변경이 없으면 304 응답으로 본문 전송 없이 직전 본문을 재사용합니다.
+metrics() 로 연결 풀 재사용(적중/신규 연결), 재시도, 304 적중, 지연 시간 통계를 확인합니다.
+"""
+import time
+import random
+import threading
+from collections import OrderedDict, deque
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Encoding": "gzip, deflate",
+}
+POOL_CONNECTIONS = 4        # 연결 풀을 유지할 호스트 수
+POOL_MAXSIZE = 16           # 호스트당 동시 연결 수 (동시 수집 워커 수 이상)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+CONDITIONAL_CACHE_SIZE = 512
+LATENCY_WINDOW = 10000      # 지연 시간 백분위 계산에 보관하는 최근 요청 수
+
+class RetryPolicy:
+    """지수 백오프 재시도 정책: attempt 번째 재시도 전 대기 = min(max_delay, base * 2^attempt) x (1 ± jitter)"""
+
+    def __init__(self, retries=2, base=0.3, max_delay=5.0, jitter=0.2):
+        self.retries, self.base, self.max_delay, self.jitter = retries, base, max_delay, jitter
+
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        d = min(self.max_delay, self.base * (2 ** attempt))
+        return d * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    @staticmethod
+    def retryable(exc=None, status=None):
+        if status is not None:
+            return status in RETRY_STATUS
+        return isinstance(exc, (requests.Timeout, requests.ConnectionError))
+
+DEFAULT_POLICY = RetryPolicy()
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+class HttpClient:
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, policy=DEFAULT_POLICY,
+                 headers=None, sleep=time.sleep):
+        self.session = requests.Session()
+        self.pool_connections, self.pool_maxsize = pool_connections, pool_maxsize
+        self._mount()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+        self.policy = policy
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.validators = OrderedDict()   # url -> (etag, last_modified, text)
+        self.reset_metrics()
+
+    def _mount(self):
+        self.adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, max_retries=0)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def ensure_pool_size(self, size):
+        """동시 요청 수(size)가 호스트당 연결 풀 크기를 넘으면 풀을 size 로 다시 만듦 (기존 유휴 연결은 버림)"""
+        if size > self.pool_maxsize:
+            self.pool_maxsize = size
+            self._mount()
+
+    def reset_metrics(self):
+        with self.lock:
+            self.counts = {"requests": 0, "retries": 0, "failures": 0, "not_modified": 0, "bytes": 0}
+            self.backoff_sec = 0.0
+            self.latencies = deque(maxlen=LATENCY_WINDOW)
+            self.pool_base = self._pool_counts()
+
+    def _pool_counts(self):
+        """연결 풀 전체의 (신규 연결 수, 요청 수) 누적값"""
+        pools = self.adapter.poolmanager.pools
+        conns = reqs = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                conns += pool.num_connections
+                reqs += pool.num_requests
+        return conns, reqs
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.counts[key] += n
+
+    def get_text(self, url, params=None, headers=None, timeout=15, conditional=False, policy=None, throttle=None):
+        """
+        GET 요청의 본문 문자열을 반환합니다. 재시도 후에도 실패하면 마지막 예외를 그대로 올립니다.
+        conditional=True 면 직전 응답의 ETag / Last-Modified 로 조건부 요청을 보내고 304 이면 직전 본문을 반환합니다.
+        throttle: 매 시도 직전에 호출할 함수 (예: 요청 속도 제한기의 acquire)
+        """
+        policy = policy or self.policy
+        key = requests.Request("GET", url, params=params).prepare().url
+        for attempt in range(policy.retries + 1):
+            send_headers = dict(headers or {})
+            cached = None
+            if conditional:
+                with self.lock:
+                    cached = self.validators.get(key)
+                if cached is not None:
+                    if cached[0]: send_headers["If-None-Match"] = cached[0]
+                    if cached[1]: send_headers["If-Modified-Since"] = cached[1]
+            if throttle is not None:
+                throttle()
+            started = time.perf_counter()
+            response, error = None, None
+            try:
+                response = self.session.get(url, params=params, headers=send_headers, timeout=timeout)
+            except requests.RequestException as e:
+                error = e
+            with self.lock:
+                self.counts["requests"] += 1
+                self.latencies.append(time.perf_counter() - started)
+
+            if response is not None and response.status_code == 304 and cached is not None:
+                self._count("not_modified")
+                return cached[2]
+            if response is not None and response.ok:
+                text = response.text
+                self._count("bytes", len(response.content))
+                if conditional and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+                    with self.lock:
+                        self.validators[key] = (response.headers.get("ETag"), response.headers.get("Last-Modified"), text)
+                        self.validators.move_to_end(key)
+                        while len(self.validators) > CONDITIONAL_CACHE_SIZE:
+                            self.validators.popitem(last=False)
+                return text
+
+            status = response.status_code if response is not None else None
+            if attempt < policy.retries and policy.retryable(error, status):
+                wait = policy.delay(attempt, _retry_after(response))
+                with self.lock:
+                    self.counts["retries"] += 1
+                    self.backoff_sec += wait
+                self.sleep(wait)
+                continue
+            self._count("failures")
+            if error is not None:
+                raise error
+            response.raise_for_status()
+            raise requests.HTTPError(f"unexpected status {status}", response=response)
+
+    def metrics(self):
+        conns, reqs = self._pool_counts()
+        base_conns, base_reqs = self.pool_base
+        # 오래 안 쓴 호스트 풀이 밀려나면 누적값이 줄 수 있으므로 0 미만은 0으로
+        new_conns, pooled_reqs = max(conns - base_conns, 0), max(reqs - base_reqs, 0)
+        with self.lock:
+            lat = np.array(self.latencies) * 1000
+            out = dict(self.counts)
+            out["backoff_sec"] = round(self.backoff_sec, 2)
+        out.update({
+            "pool_new_connections": new_conns,
+            "pool_reused": max(pooled_reqs - new_conns, 0),
+            "pool_hit_rate": round((pooled_reqs - new_conns) / pooled_reqs, 4) if pooled_reqs else None,
+            "latency_ms_p50": round(float(np.percentile(lat, 50)), 2) if len(lat) else None,
+            "latency_ms_p95": round(float(np.percentile(lat, 95)), 2) if len(lat) else None,
+        })
+        return out
+
+_default = None
+_default_lock = threading.Lock()
+
+def default_client():
+    """프로세스 공용 클라이언트 (최초 호출 시 생성)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HttpClient()
+        return _default
+
+def get_text(url, params=None, **kwargs):
+    return default_client().get_text(url, params=params, **kwargs)
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+종목별 증분 지표 상태 (일봉 스캔 전용)
+
+매일 320봉 전체로 이평선 / 일목 고저 중간값 / 최근 최대 거래대금을 다시 계산하는 대신,
+조건 계산에 필요한 누적 값만 종목별로 data/indicator_state.pkl 에 저장해 두고 새 봉마다 한 칸씩 갱신합니다.
+  - 이평선: 기간별 누적합 (들어온 종가를 더하고 기간 밖으로 밀려난 종가를 뺌)
+  - 최대/최소 (거래대금, 신고가 종가, 일목 고가/저가): 단조 덱 (RollingExtreme)
+  - 거래량 스파이크: 최근 lookback 봉 중 스파이크 봉 개수
+봉 하나를 반영하는 비용이 조회 기간 길이와 무관하므로 매일의 조건 평가 비용도 기간 길이와 무관합니다.
+단, 현재 조회 기간(320봉)에서는 속도 개선이 아닙니다. 종목별 Python 갱신과 상태 파일 읽기/쓰기 비용이
+320봉 패널 전체를 NumPy 로 평가하는 비용보다 커서, benchmark.py [STATE] 기준 2700종목 증분 상태 약 1.07초
+(이 중 저장소 읽기/쓰기 약 0.5초) 대 패널 구성+평가 약 0.30초입니다. 그래서 스캐너 기본값은 꺼져 있고,
+조건 기간을 크게 늘려 패널 비용이 이보다 커질 때만 켤 만합니다.
+
+상태가 없거나, 저장된 마지막 봉이 새로 받은 일봉의 같은 날짜 봉과 다르면(수정주가 반영 / 장중 수집분)
+일봉 전체로 상태를 새로 만듭니다(from_arrays). 종목별로 VERIFY_EVERY 봉마다 같은 방식으로 다시 계산한 값과
+비교해 어긋나면(누적 오차) 경고하고, 검증한 종목은 다시 계산한 상태로 교체해 오차가 쌓이지 않게 합니다.
+조건 판정은 screener.screen_metrics 가 상태 값 배열로 screen_panel 과 같은 순서 / 같은 결과로 수행합니다.
+
+    python scanner.py --indicator-state     # 또는 SCAN_INDICATOR_STATE=1
+"""
+import os
+import zlib
+import pickle
+import threading
+from collections import deque
+import numpy as np
+
+STATE_PATH = os.path.join("data", "indicator_state.pkl")
+VERIFY_EVERY = int(os.getenv("SCAN_STATE_VERIFY", "20"))   # 봉 N개마다 전체 재계산 값과 비교 (종목별로 날짜 분산)
+DRIFT_RTOL = 1e-9        # 누적합 반올림 오차 허용 범위 (정수 가격은 오차 없음)
+BAR_FIELDS = ["Close", "High", "Low", "Volume"]
+# metrics() 키 (screener.screen_metrics 입력)
+METRIC_KEYS = ("length", "close", "turnover_max", "last_turnover", "spikes", "ma_short", "ma_mid", "ma_long",
+               "slow", "slow_prev", "slower", "slower_prev", "recent_high", "window_high", "tenkan", "kijun")
+
+def params_key(params):
+    """상태 구성에 쓰는 조건 파라미터 (바뀌면 상태를 다시 만듦)"""
+    return (params["lookback"], params["vol_ratio"], params["slope_lookback"], params["tenkan"], params["kijun"],
+            tuple(params["ma_align"]), tuple(params["slope_windows"]), params["high_window"])
+
+class RollingExtreme:
+    """
+    최근 n 봉 최대(또는 최소)값 단조 덱.
+    partial=False 면 봉이 n 개 미만이거나 기간 안에 NaN 이 있을 때 NaN (배열 max/min 과 동일),
+    partial=True 면 있는 봉만으로 계산하고 NaN 은 건너뜀 (screener.turnover_mask 와 동일).
+    """
+
+    def __init__(self, n, largest=True, partial=False):
+        self.n, self.largest, self.partial = n, largest, partial
+        self.items = deque()   # (봉 번호, 값) - 최대면 값이 감소, 최소면 증가하는 순서
+        self.pos = -1
+        self.last_nan = -1
+
+    @classmethod
+    def from_values(cls, values, n, largest=True, partial=False):
+        """values 를 차례로 push 한 것과 같은 덱 (기간 안에서 뒤쪽 어떤 값보다도 큰(최소는 작은) 값만 남음)"""
+        ext = cls(n, largest, partial)
+        ext.pos = len(values) - 1
+        nan = np.flatnonzero(np.isnan(values))
+        ext.last_nan = int(nan[-1]) if len(nan) else -1
+        start = max(len(values) - n, 0)
+        window = values[start:]
+        if len(window):
+            key = np.nan_to_num(window if largest else -window, nan=-np.inf, posinf=np.inf, neginf=-np.inf)
+            after = np.append(np.maximum.accumulate(key[::-1])[::-1][1:], -np.inf)
+            keep = key > after
+            keep[-1] = True
+            keep &= ~np.isnan(window)
+            ext.items = deque(zip((np.flatnonzero(keep) + start).tolist(), window[keep].tolist()))
+        return ext
+
+    def push(self, value):
+        self.pos += 1
+        if value != value:
+            self.last_nan = self.pos
+        else:
+            while self.items and (self.items[-1][1] <= value if self.largest else self.items[-1][1] >= value):
+                self.items.pop()
+            self.items.append((self.pos, value))
+        while self.items and self.items[0][0] <= self.pos - self.n:
+            self.items.popleft()
+
+    @property
+    def value(self):
+        if not self.partial and (self.pos + 1 < self.n or self.last_nan > self.pos - self.n):
+            return np.nan
+        return self.items[0][1] if self.items else np.nan
+
+class IndicatorState:
+    """종목 1개의 누적 지표 상태 (push 로 봉 1개씩 반영)"""
+
+    def __init__(self, params):
+        self.key = params_key(params)
+        lookback, self.vol_ratio, lb, self.tenkan, self.kijun, self.ma_align, self.slope_windows, high_window = self.key
+        self.windows = sorted(set(self.ma_align) | set(self.slope_windows))
+        self.closes = np.zeros(max(self.windows))   # 최근 종가 원형 버퍼 (NaN 은 0, head 가 다음 쓸 자리)
+        self.head = 0
+        self.sums = {n: 0.0 for n in self.windows}
+        self.close_nan = -1
+        self.ma_hist = {n: deque(maxlen=lb + 1) for n in self.slope_windows}   # 기울기 비교용 최근 lb+1 봉 이평값
+        self.volumes = deque(maxlen=2)
+        self.spike_flags = deque(maxlen=lookback)
+        self.spikes = 0
+        self.turnover = RollingExtreme(lookback, partial=True)
+        self.recent_high = RollingExtreme(lookback)
+        self.window_high = RollingExtreme(high_window)
+        self.highs = {n: RollingExtreme(n) for n in (self.tenkan, self.kijun)}
+        self.lows = {n: RollingExtreme(n, largest=False) for n in (self.tenkan, self.kijun)}
+        self.length = 0
+        self.last_date, self.last_bar = None, None
+        self.since_verify = 0
+
+    def mean(self, n):
+        if self.length < n or self.close_nan > self.length - 1 - n:
+            return np.nan
+        return self.sums[n] / n
+
+    def push(self, date, close, high, low, volume):
+        """봉 1개 반영 (비용은 기간 길이와 무관)"""
+        if close != close:
+            self.close_nan = self.length
+        c = 0.0 if close != close else close
+        size = len(self.closes)
+        for n in self.windows:
+            # 기간 밖으로 밀려나는 종가 = n 봉 전에 쓴 값
+            self.sums[n] += c - (float(self.closes[(self.head - n) % size]) if self.length >= n else 0.0)
+        self.closes[self.head] = c
+        self.head = (self.head + 1) % size
+        self.length += 1
+        for n, hist in self.ma_hist.items():
+            hist.append(self.mean(n))
+
+        v1 = self.volumes[-1] if len(self.volumes) >= 1 else np.nan
+        v2 = self.volumes[-2] if len(self.volumes) >= 2 else np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            v = np.float64(volume)
+            flag = bool((v / v1 >= self.vol_ratio) | (v / v2 >= self.vol_ratio))
+        if len(self.spike_flags) == self.spike_flags.maxlen:
+            self.spikes -= self.spike_flags[0]
+        self.spike_flags.append(flag)
+        self.spikes += flag
+        self.volumes.append(volume)
+
+        turnover = close * volume
+        self.turnover.push(-np.inf if turnover != turnover else turnover)
+        self.recent_high.push(close)
+        self.window_high.push(close)
+        for n in self.highs:
+            self.highs[n].push(high)
+            self.lows[n].push(low)
+        self.last_date, self.last_bar = date, (close, high, low, volume)
+
+    def metrics(self):
+        close, _, _, volume = self.last_bar
+        last_turnover = close * volume
+        short, mid, long_ = self.ma_align
+        slow, slower = self.slope_windows
+        prev = {n: h[0] if len(h) == h.maxlen else np.nan for n, h in self.ma_hist.items()}
+        return {
+            "length": self.length, "close": close,
+            "turnover_max": self.turnover.value,
+            "last_turnover": -np.inf if last_turnover != last_turnover else last_turnover,
+            "spikes": self.spikes,
+            "ma_short": self.mean(short), "ma_mid": self.mean(mid), "ma_long": self.mean(long_),
+            "slow": self.ma_hist[slow][-1], "slow_prev": prev[slow],
+            "slower": self.ma_hist[slower][-1], "slower_prev": prev[slower],
+            "recent_high": self.recent_high.value, "window_high": self.window_high.value,
+            "tenkan": (self.highs[self.tenkan].value + self.lows[self.tenkan].value) / 2,
+            "kijun": (self.highs[self.kijun].value + self.lows[self.kijun].value) / 2,
+        }
+
+def frame_arrays(df):
+    """일봉 DataFrame -> (일자 인덱스, (봉 x [Close, High, Low, Volume]) float64 배열)"""
+    columns = list(df.columns)
+    # df[BAR_FIELDS] 는 매번 새 DataFrame 을 만들어 종목당 수백 µs 가 들므로 전체 배열에서 열 위치로 선택
+    return df.index, df.to_numpy(dtype=np.float64)[:, [columns.index(k) for k in BAR_FIELDS]]
+
+def from_arrays(index, values, params):
+    """
+    일봉 전체로 상태를 새로 만듭니다 (최초 생성 / 복구 / 검증용 전체 재계산).
+    봉을 하나씩 push 하지 않고 배열 연산으로 같은 상태를 구성하므로 비용이 봉 수에 비례해도 빠르고,
+    push 누적 경로와 독립적인 계산이라 검증 기준으로 씁니다.
+    """
+    state = IndicatorState(params)
+    close, high, low, volume = values.T
+    length = len(close)
+    state.length = length
+    nan = np.flatnonzero(np.isnan(close))
+    state.close_nan = int(nan[-1]) if len(nan) else -1
+    c0 = np.nan_to_num(close, nan=0.0)
+    recent = c0[-len(state.closes):]
+    state.closes[len(state.closes) - len(recent):] = recent   # head=0: 마지막 종가가 버퍼 끝
+    state.sums = {n: float(c0[-n:].sum()) for n in state.windows}
+    for n, hist in state.ma_hist.items():
+        for end in range(max(length - hist.maxlen, 0) + 1, length + 1):   # end: 평균 구간 끝 (미포함)
+            ok = end >= n and state.close_nan < end - n
+            hist.append(float(c0[end - n:end].sum()) / n if ok else np.nan)
+
+    prev = np.concatenate([[np.nan, np.nan], volume])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        flags = (prev[2:] / prev[1:-1] >= state.vol_ratio) | (prev[2:] / prev[:-2] >= state.vol_ratio)
+    state.spike_flags.extend(flags[-state.spike_flags.maxlen:].tolist())
+    state.spikes = int(sum(state.spike_flags))
+    state.volumes.extend(volume[-2:].tolist())
+
+    turnover = close * volume
+    state.turnover = RollingExtreme.from_values(np.where(np.isnan(turnover), -np.inf, turnover), state.turnover.n, partial=True)
+    state.recent_high = RollingExtreme.from_values(close, state.recent_high.n)
+    state.window_high = RollingExtreme.from_values(close, state.window_high.n)
+    state.highs = {n: RollingExtreme.from_values(high, n) for n in state.highs}
+    state.lows = {n: RollingExtreme.from_values(low, n, largest=False) for n in state.lows}
+    if length:
+        state.last_date, state.last_bar = index[-1], tuple(values[-1].tolist())
+    return state
+
+def same_metrics(a, b, rtol=DRIFT_RTOL):
+    """두 상태의 조건 값이 허용 오차 안에서 같은지 (봉 수는 저장 기간 밖 이력 차이가 있어 제외)"""
+    ma, mb = a.metrics(), b.metrics()
+    keys = [k for k in METRIC_KEYS if k != "length"]
+    return bool(np.allclose([ma[k] for k in keys], [mb[k] for k in keys], rtol=rtol, atol=0, equal_nan=True))
+
+# =========================
+# 갱신 / 저장
+# =========================
+def _verify_offset(code):
+    """종목마다 검증 날짜가 몰리지 않도록 종목코드로 검증 주기 시작점을 분산"""
+    return zlib.crc32(str(code).encode()) % max(VERIFY_EVERY, 1)
+
+def advance(state, code, df, params, stats=None):
+    """
+    상태를 일봉 df 의 마지막 봉까지 진행시켜 반환합니다 (df 는 전체 재계산이 가능한 기간을 담은 일봉).
+    stats 가 주어지면 hit(새 봉 반영) / same(새 봉 없음) / full(신규) / repair(재생성) / verify / drift 횟수를 기록합니다.
+    """
+    if df is None or df.empty:
+        return state
+    index, values = frame_arrays(df)
+    if state is None or state.key != params_key(params):
+        _count(stats, "full")
+        return _rebuilt(code, index, values, params)
+
+    try:
+        pos = index.get_loc(state.last_date)
+    except KeyError:
+        pos = None
+    # 결측(NaN) 값이 있는 봉도 같은 봉으로 보도록 equal_nan 비교 (튜플 비교는 nan != nan 이라 매번 재생성됨)
+    if not isinstance(pos, (int, np.integer)) or not np.array_equal(values[pos], state.last_bar, equal_nan=True):
+        # 저장 이후 기간이 끊겼거나 마지막 봉이 바뀜 (수정주가는 과거 봉 전체가 바뀌므로 여기서 걸림) -> 재생성
+        _count(stats, "repair")
+        return _rebuilt(code, index, values, params)
+    if pos == len(index) - 1:
+        _count(stats, "same")
+        return state
+
+    for i in range(pos + 1, len(index)):
+        state.push(index[i], *values[i].tolist())
+    state.since_verify += len(index) - 1 - pos
+    _count(stats, "hit")
+    if state.since_verify >= VERIFY_EVERY:
+        fresh = from_arrays(index, values, params)
+        _count(stats, "verify")
+        if not same_metrics(state, fresh):
+            _count(stats, "drift")
+            print(f"[WARN] {code} 지표 상태가 전체 재계산 값과 달라 재생성했습니다")
+        fresh.length = max(fresh.length, state.length)
+        state = fresh
+    return state
+
+def _rebuilt(code, index, values, params):
+    state = from_arrays(index, values, params)
+    state.since_verify = _verify_offset(code)
+    return state
+
+def load_all(path=STATE_PATH):
+    """{종목코드: IndicatorState} (파일이 없거나 깨졌으면 빈 dict -> 일봉 전체로 재생성)"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return {}
+
+def save_all(states, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "wb") as f:
+        pickle.dump(states, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f"{path}.tmp", path)   # 작업이 중간에 죽어도 기존 파일은 온전히 유지
+
+def advance_all(codes, frames, params, stats=None, path=STATE_PATH):
+    """
+    종목별 상태를 frames 의 마지막 봉까지 진행시키고 저장합니다 (이번에 받지 않은 종목의 상태는 그대로 유지).
+    반환: codes 순서의 상태 리스트 (봉이 없는 종목은 None)
+    """
+    states = load_all(path)
+    out = []
+    for code, df in zip(codes, frames):
+        state = advance(states.get(code), code, df, params, stats) if df is not None else None
+        if state is not None:
+            states[code] = state
+        out.append(state)
+    save_all(states, path)
+    return out
+
+def metric_arrays(states):
+    """상태 리스트(None 은 봉 없음) -> {지표: 종목별 배열} (screener.screen_metrics 입력)"""
+    rows = [s.metrics() if s is not None else None for s in states]
+    out = {k: np.array([r[k] if r is not None else np.nan for r in rows], dtype=np.float64) for k in METRIC_KEYS}
+    out["length"] = np.nan_to_num(out["length"]).astype(np.int64)
+    return out
+
+_stats_lock = threading.Lock()
+
+def _count(stats, key):
+    if stats is not None:
+        with _stats_lock:
+            stats[key] = stats.get(key, 0) + 1
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+AI 모델 추론 엔진
+
+LightGBM 모델의 트리를 평탄한 NumPy 배열로 컴파일해, 전체 트리를 한 번에 한 단계씩 내려가며 평가합니다.
+predict_proba 한 번에 드는 파이썬/LightGBM 호출 오버헤드 없이 한 행을 수십~수백 마이크로초에 채점합니다.
+
+    python inference.py              # 최신 final_result CSV 전체를 한 번에 채점해 AI 확률/순위/근거 컬럼 추가
+    python inference.py --date 20260403
+"""
+import os
+import time
+import argparse
+import hashlib
+import numpy as np
+import pandas as pd
+import joblib
+
+import features
+import result_files
+
+MODEL_PATH = "stock_model.pkl"
+OUT_DIR = "outputs"
+COMPILED_MAX_ROWS = 4    # 이 행 수까지만 컴파일 평가기가 빠름 (benchmark.py 측정, 그 이상은 LightGBM 멀티스레드)
+TOP_REASONS = 3          # 일괄 채점 시 종목별로 남기는 상위 기여 피처 수
+SCORE_COLUMNS = ["AI확률(%)", "AI순위", "AI근거"]
+
+# 일괄 채점 근거 컬럼에 쓰는 피처 한글 이름
+FEATURE_LABELS = {
+    'rsi': "RSI", 'bb_per': "볼린저 위치", 'ma_diff': "이평 괴리", 'vol_consecutive_days': "거래량 연속 증가",
+    'vol_spike_ratio': "거래량 급증", 'candle_body': "캔들 몸통", 'relative_strength': "상대강도",
+    'macd_hist': "MACD", 'mfi': "MFI", 'atr_ratio': "변동성(ATR)", 'stoch_k': "스토캐스틱",
+    'disparity_60': "60일 이격도", 'price_range': "당일 변동폭", 'vol_roc': "거래량 모멘텀",
+    'range_roc': "에너지 가속도", 'day_of_week': "요일", 'nasdaq_return': "나스닥", 'vix_close': "VIX",
+    'dxy_return': "달러 인덱스", 'tnx_close': "미 10년물", 'gold_return': "금", 'nasdaq_f_return': "나스닥 선물",
+}
+
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+ZERO_THRESHOLD = 1e-35   # LightGBM kZeroThreshold
+
+class CompiledForest:
+    """LightGBM 이진 분류 모델의 평탄화 트리 평가기 (predict_proba 와 같은 결과)"""
+
+    def __init__(self, booster):
+        dump = booster.dump_model()
+        self.feature_names = dump.get("feature_names", [])
+        self.sigmoid = 1.0
+        for token in str(dump.get("objective", "")).split():
+            if token.startswith("sigmoid:"):
+                self.sigmoid = float(token.split(":")[1])
+
+        feature, threshold, left, right, default_left, missing, value, leaf = [], [], [], [], [], [], [], []
+        roots, depth = [], 0
+
+        def add(node, level):
+            nonlocal depth
+            i = len(feature)
+            for arr in (feature, threshold, left, right, default_left, missing, value, leaf):
+                arr.append(0)
+            if "leaf_value" in node:
+                # 잎 노드는 자기 자신을 가리키게 해 고정 깊이 반복에서도 제자리에 머물게 함
+                value[i], leaf[i], left[i], right[i] = node["leaf_value"], True, i, i
+                threshold[i] = np.inf
+                depth = max(depth, level)
+                return i
+            feature[i], threshold[i] = node["split_feature"], node["threshold"]
+            default_left[i] = node.get("default_left", True)
+            missing[i] = {"Zero": MISSING_ZERO, "NaN": MISSING_NAN}.get(node.get("missing_type"), MISSING_NONE)
+            left[i] = add(node["left_child"], level + 1)
+            right[i] = add(node["right_child"], level + 1)
+            return i
+
+        for tree in dump["tree_info"]:
+            roots.append(add(tree["tree_structure"], 0))
+
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.missing = np.asarray(missing, dtype=np.int8)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.leaf = np.asarray(leaf, dtype=bool)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = depth
+        self.has_zero_missing = bool((self.missing == MISSING_ZERO).any())
+
+    def raw_score(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if len(X) == 1 and not np.isnan(X).any() and not self.has_zero_missing:
+            return np.array([self._raw_score_row(X[0])])
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            mt = self.missing[node]
+            nan = np.isnan(x)
+            x = np.where(nan & (mt != MISSING_NAN), 0.0, x)
+            go_left = x <= self.threshold[node]
+            is_missing = ((mt == MISSING_NAN) & nan) | ((mt == MISSING_ZERO) & (np.abs(x) <= ZERO_THRESHOLD))
+            go_left = np.where(is_missing & ~self.leaf[node], self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].sum(axis=1)
+
+    def _raw_score_row(self, x):
+        """결측치가 없는 한 행 전용 빠른 경로 (트리 전체를 깊이 단위로 동시에 진행)"""
+        node = self.roots
+        feature, threshold, left, right = self.feature, self.threshold, self.left, self.right
+        for _ in range(self.depth):
+            node = np.where(x[feature[node]] <= threshold[node], left[node], right[node])
+        return self.value[node].sum()
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.sigmoid * self.raw_score(X)))
+        return np.column_stack([1 - p, p])
+
+def load_model(path=MODEL_PATH):
+    """joblib 모델과 컴파일된 평가기를 함께 로드합니다. 반환: (model, CompiledForest, 로드 시간 ms)"""
+    started = time.perf_counter()
+    model = joblib.load(path)
+    forest = CompiledForest(model.booster_)
+    return model, forest, (time.perf_counter() - started) * 1000
+
+# 모델 경로 -> ((수정시각 ns, 크기), 내용 해시). 파일이 그대로면 해시를 다시 계산하지 않음
+_signatures = {}
+
+def model_signature(path):
+    """
+    모델 파일 내용의 sha256 (hex). 파일이 없으면 None.
+    번들을 만든 Actions 러너와 앱 체크아웃은 같은 파일이어도 수정시각이 달라 내용으로 비교합니다.
+    """
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _signatures.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    _signatures[path] = (stamp, digest.hexdigest())
+    return _signatures[path][1]
+
+def predict_up(model, forest, X):
+    """상승 확률(0~1) 배열. 적은 행은 컴파일 평가기, 많은 행이나 피처 순서가 다르면 LightGBM 으로 채점"""
+    if len(X) <= COMPILED_MAX_ROWS and forest.feature_names == list(X.columns):
+        return forest.predict_proba(X.to_numpy())[:, 1]
+    return model.predict_proba(X)[:, 1]
+
+def explain(last, macro):
+    """대시보드에 표시할 예측 근거 (최신 피처 행과 매크로 스냅샷 기준)"""
+    nf_ret, v_cls = macro['nasdaq_f_return'], macro['vix_close']
+    return [
+        {"label": "나스닥 선물", "val": f"{nf_ret*100:.2f}%", "desc": "호조" if nf_ret > 0 else "불안"},
+        {"label": "상대강도 (RS)", "val": f"{round(float(last['relative_strength'])*100, 1)}%", "desc": "시장 주도" if last['relative_strength'] > 0 else "하회"},
+        {"label": "에너지 가속도", "val": f"{round(float(last['range_roc']), 1)}%", "desc": "가속화" if last['range_roc'] > 0 else "수렴"},
+        {"label": "VIX 공포지수", "val": f"{v_cls:.1f}", "desc": "안정" if v_cls < 18 else "주의"}
+    ]
+
+def score_latest(model, forest, df, market_df, macro):
+    """
+    일봉 df 의 최신 봉 상승 확률(%)과 근거를 계산합니다. macro 는 MACRO_FEATURES 최신 값 dict.
+    반환: (확률, 근거 리스트, 피처 계산 ms, 추론 µs)
+    """
+    t0 = time.perf_counter()
+    df = features.extract_features([df], [market_df], macro, dropna=False)[0]
+    feature_cols = features.FEATURE_COLUMNS
+    last_features = df[feature_cols].tail(1).fillna(0)
+    t1 = time.perf_counter()
+    prob = predict_up(model, forest, last_features)[0] * 100
+    t2 = time.perf_counter()
+    return round(float(prob), 1), explain(df.iloc[-1], macro), (t1 - t0) * 1000, (t2 - t1) * 1e6
+
+# =========================
+# 일괄 채점 (포착 리스트 전체)
+# =========================
+def score_batch(model, forest, frames, markets, macro):
+    """
+    여러 종목의 최신 봉을 한 번에 채점합니다. 피처는 한 패널로 같이 계산하고 predict_proba 는 쌓은 행렬에 1회 호출합니다.
+    반환: (확률 % 배열, 최신 피처 DataFrame(행 = 종목, FEATURE_COLUMNS))
+    """
+    feature_cols = features.FEATURE_COLUMNS
+    feats = features.extract_features(frames, markets, macro, dropna=False)
+    X = pd.DataFrame([f[feature_cols].iloc[-1].to_numpy() for f in feats], columns=feature_cols).fillna(0)
+    return np.round(predict_up(model, forest, X) * 100, 1), X
+
+def top_reasons(model, X, k=TOP_REASONS):
+    """종목별로 상승 쪽 기여도(SHAP)가 큰 피처 k개를 '이름(+기여도)' 문자열로 반환"""
+    contrib = model.booster_.predict(X, pred_contrib=True)[:, :-1]
+    out = []
+    for row in contrib:
+        order = np.argsort(-row)[:k]
+        out.append(" · ".join(f"{FEATURE_LABELS.get(X.columns[i], X.columns[i])}({row[i]:+.2f})" for i in order))
+    return out
+
+def score_result(result, date_key, model_path=MODEL_PATH, downloader=None, macro=None):
+    """
+    포착 결과 DataFrame 전체를 채점해 SCORE_COLUMNS 를 붙인 사본을 반환합니다. (모델이 없으면 None)
+    일봉은 앱 차트와 같은 6개월 구간을 history_cache 로 한 번에 받습니다.
+    """
+    import bundles, history_cache, macro_store   # 수집 계층은 채점할 때만 로드
+    signature = model_signature(model_path)
+    if signature is None or result is None or result.empty:
+        return None
+    model, forest, _ = load_model(model_path)
+
+    codes = result["종목코드"].astype(str).str.zfill(6)
+    markets = result["시장"].map(bundles.normalize_market)
+    end = pd.Timestamp(date_key) + pd.Timedelta(days=1)
+    start = end - pd.Timedelta(days=bundles.HISTORY_DAYS + 1)
+    tickers = [bundles.to_ticker(c, m) for c, m in zip(codes, markets)]
+    histories = history_cache.get_histories(tickers, start, end, downloader=downloader)
+    indices = bundles.market_closes(markets, start, end, downloader=downloader)
+
+    rows = [i for i, t in enumerate(tickers) if t in histories and bundles.market_index(markets.iloc[i]) in indices]
+    out = result.copy()
+    for col in SCORE_COLUMNS:
+        out[col] = np.nan if col != "AI근거" else ""
+    if rows:
+        started = time.perf_counter()
+        macro = macro or macro_store.snapshot()
+        prob, X = score_batch(model, forest, [histories[tickers[i]] for i in rows],
+                              [indices[bundles.market_index(markets.iloc[i])] for i in rows], macro)
+        out.loc[out.index[rows], "AI확률(%)"] = prob
+        out.loc[out.index[rows], "AI근거"] = top_reasons(model, X)
+        print(f"🤖 [채점] {len(rows)}/{len(out)}개 종목 일괄 채점 ({(time.perf_counter() - started) * 1000:.0f}ms)")
+    out["AI순위"] = out["AI확률(%)"].rank(ascending=False, method="first").astype("Int64")
+    return out
+
+def score_csv(date_key=None, out_dir=OUT_DIR, model_path=MODEL_PATH, downloader=None):
+    """final_result_<date_key>.csv (기본: 최신) 와 컬럼형 파일(.arrow)에 AI 컬럼을 써 넣고 CSV 경로를 반환합니다."""
+    import result_table
+    if date_key is None:
+        date_key = result_files.latest_result_date(out_dir)
+        if date_key is None: return None
+    result = result_table.load(date_key, out_dir)   # 컬럼형 파일이 있으면 조건 계산값까지 유지
+    scored = score_result(result.drop(columns=SCORE_COLUMNS, errors="ignore"), date_key, model_path, downloader)
+    if scored is None:
+        print(f"⚠️ [채점] 모델 파일({model_path}) 또는 포착 종목이 없어 채점 생략")
+        return None
+    path = result_table.write_csv(scored, date_key, out_dir)
+    result_table.save(scored, date_key, out_dir)
+    import results_index
+    results_index.add(scored, date_key)
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="포착 리스트 AI 확률 일괄 채점")
+    parser.add_argument("--date", help="YYYYMMDD (기본: 최신 final_result CSV)")
+    args = parser.parse_args()
+    path = score_csv(args.date)
+    if path: print(f"✅ [완료] AI 확률 컬럼 저장: {path}")
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+장중 분봉 반복 스캔
+
+장 시간(09:00~15:30 KST) 동안 INTERVAL_SEC 마다 종목별 최근 TAIL_COUNT 봉만 받아 직전 패스의 봉에 이어붙이고,
+마지막 봉(시각/종가/거래량)이 바뀐 종목만 scanner.TIMEFRAME_PROFILES 의 분봉 프로파일로 다시 평가합니다.
+처음 보는 종목이나 패스 사이에 빠진 봉이 있는 종목만 프로파일 봉 수 전체를 받습니다.
+종목별 봉과 알림 이력은 data/intraday/YYYYMMDD_<주기>.pkl 에 저장해 중간에 다시 시작해도 이어서 동작하고,
+새로 포착된 종목은 outputs/intraday_YYYYMMDD_<주기>.csv 에 포착 시각과 함께 추가합니다.
+
+    python intraday.py                    # 장 마감까지 반복
+    python intraday.py --once             # 1회만 (장 시간과 무관)
+    python intraday.py --universe picks   # 최신 일봉 포착 종목만 감시
+    python scanner.py --intraday          # 같은 동작 (scanner 옵션 공유)
+"""
+import os
+import time
+import pickle
+import argparse
+from datetime import datetime, time as dtime
+from zoneinfo import ZoneInfo
+import pandas as pd
+
+import scanner
+
+TIMEFRAME = "minute"
+INTERVAL_SEC = int(os.getenv("INTRADAY_INTERVAL", "60"))
+TAIL_COUNT = 10           # 패스마다 종목별로 받는 최근 봉 수 (변경 감지 + 이어붙이기)
+MARKET_TZ = ZoneInfo("Asia/Seoul")
+MARKET_OPEN, MARKET_CLOSE = dtime(9, 0), dtime(15, 30)
+STATE_DIR = os.path.join("data", "intraday")
+OUT_DIR = "outputs"
+
+class IntradayState:
+    """패스 사이에 유지하는 종목별 봉 / 이미 알린 종목 (파일로 저장해 재시작 시 이어서 사용)"""
+
+    def __init__(self, date_str, timeframe=TIMEFRAME, state_dir=STATE_DIR):
+        self.path = os.path.join(state_dir, f"{date_str}_{timeframe}.pkl")
+        self.frames, self.alerted = {}, set()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "rb") as f:
+                    self.frames, self.alerted = pickle.load(f)
+            except Exception:
+                pass
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", "wb") as f:
+            pickle.dump((self.frames, self.alerted), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{self.path}.tmp", self.path)
+
+def merge_bars(cached, tail, width):
+    """
+    직전 봉에 최근 봉을 이어붙여 최근 width 봉을 반환합니다 (겹치는 시각은 새 값 사용).
+    최근 봉의 첫 시각이 직전 마지막 봉보다 뒤면 사이 봉을 놓쳤을 수 있으므로 None (전체 재수집).
+    """
+    if tail.index[0] > cached.index[-1]:
+        return None
+    return pd.concat([cached[cached.index < tail.index[0]], tail]).tail(width)
+
+def last_bar(df):
+    return df.index[-1], float(df["Close"].iloc[-1]), float(df["Volume"].iloc[-1])
+
+def run_pass(rows, state, profile, workers=1, rate=scanner.RATE_LIMIT_PER_SEC):
+    """
+    1회 스캔. rows: (코드, 종목명, 시장) 리스트
+    반환: (마지막 봉이 바뀐 종목 수, 이번 패스 포착 행, 새로 포착된 행)
+    """
+    tf, width = profile["timeframe"], profile["count"]
+
+    def job(row):
+        code = row[0]
+        cached = state.frames.get(code)
+        merged = None
+        if cached is not None:
+            tail = scanner.get_ohlcv_retry(code, TAIL_COUNT, scanner.RETRY_FULL, tf)
+            if tail is None:
+                return None
+            merged = merge_bars(cached, tail, width)
+        if merged is None:
+            merged = scanner.get_ohlcv_retry(code, width, scanner.RETRY_FULL, tf)
+        return merged
+
+    scanner.recorder.reset()
+    frames = scanner.run_parallel(rows, job, workers, rate)
+    changed = []
+    for row, df in zip(rows, frames):
+        if df is None:
+            continue
+        cached = state.frames.get(row[0])
+        if cached is None or last_bar(cached) != last_bar(df):
+            changed.append((row, df))
+        state.frames[row[0]] = df
+
+    hits = scanner.screen_frames([r for r, _ in changed], [df for _, df in changed], None, profile) if changed else []
+    new = [h for h in hits if h["종목코드"] not in state.alerted]
+    state.alerted.update(h["종목코드"] for h in new)
+    return len(changed), hits, new
+
+def save_alerts(rows, date_str, timeframe=TIMEFRAME, out_dir=OUT_DIR):
+    path = os.path.join(out_dir, f"intraday_{date_str}_{timeframe}.csv")
+    df = pd.DataFrame(rows, columns=["포착시각"] + scanner.RESULT_COLUMNS)
+    df.to_csv(path, mode="a", header=not os.path.exists(path), index=False, encoding="utf-8-sig")
+    return path
+
+def load_universe(universe):
+    """all: KRX 전 종목, picks: 최신 일봉 포착 종목 (포착 이력 인덱스)"""
+    if universe == "picks":
+        import results_index
+        picks = results_index.picks_on(results_index.latest_date() or "0")
+        return list(zip(picks["종목코드"], picks["종목명"], picks["시장"]))
+    listing = scanner.get_listing()
+    return list(zip(listing["Code"], listing["Name"], listing["Market"]))
+
+def run(workers=scanner.SCAN_WORKERS, rate=scanner.RATE_LIMIT_PER_SEC, timeframe=TIMEFRAME, universe="all",
+        once=False, interval=INTERVAL_SEC):
+    profile = scanner.TIMEFRAME_PROFILES[timeframe]
+    rows = load_universe(universe)
+    date_str = datetime.now(MARKET_TZ).strftime("%Y%m%d")
+    state = IntradayState(date_str, timeframe)
+    scanner.http.ensure_pool_size(workers)
+    print(f"[INFO] 장중 {timeframe} 스캔: {len(rows)}개 종목 | {interval}초 간격 | 이어받은 종목 {len(state.frames)}개")
+
+    while True:
+        now = datetime.now(MARKET_TZ)
+        if not once and now.time() >= MARKET_CLOSE:
+            print("[INFO] 장 마감으로 장중 스캔 종료")
+            break
+        if not once and now.time() < MARKET_OPEN:
+            wait = (datetime.combine(now.date(), MARKET_OPEN, MARKET_TZ) - now).total_seconds()
+            print(f"[INFO] 장 시작까지 {wait / 60:.0f}분 대기")
+            time.sleep(wait)
+            continue
+
+        started = time.time()
+        n_changed, hits, new = run_pass(rows, state, profile, workers, rate)
+        state.save()
+        stamp = now.strftime("%H:%M:%S")
+        for h in new:
+            print(f"[ALERT] {stamp} {h['종목명']}({h['종목코드']}) | 최근봉 거래대금 {h['최근거래일거래대금(억)']}억")
+        if new:
+            save_alerts([dict(h, 포착시각=stamp) for h in new], date_str, timeframe)
+        elapsed = time.time() - started
+        print(f"[INTRADAY] {stamp} | 변경 {n_changed}/{len(rows)} | 포착 {len(hits)} | 신규 {len(new)} | {elapsed:.1f}초")
+        if once:
+            break
+        time.sleep(max(0.0, interval - elapsed))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="장중 분봉 반복 스캔")
+    parser.add_argument("--workers", type=int, default=scanner.SCAN_WORKERS)
+    parser.add_argument("--rate", type=float, default=scanner.RATE_LIMIT_PER_SEC)
+    parser.add_argument("--timeframe", choices=[k for k in scanner.TIMEFRAME_PROFILES if k != "day"], default=TIMEFRAME)
+    parser.add_argument("--universe", choices=["all", "picks"], default="all")
+    parser.add_argument("--interval", type=int, default=INTERVAL_SEC)
+    parser.add_argument("--once", action="store_true", help="장 시간과 무관하게 1회만 스캔")
+    args = parser.parse_args()
+    run(args.workers, args.rate, args.timeframe, args.universe, args.once, args.interval)
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+매크로 시세 스냅샷 저장소 (스캐너 / 학습 / 앱 공용)
+
+^KS11, ^KQ11, ^IXIC, ^VIX, DX-Y.NYB, ^TNX, GC=F, NQ=F 종가를 (일자 x 티커) 하나의 배열로
+outputs/macro 에 저장합니다. 스캐너가 매일 마지막 저장일 직전부터만 받아 이어붙이고(증분 갱신),
+앱은 np.load(mmap_mode="r") 로 최근 몇 행만 읽어 네트워크 없이 최신 매크로 피처를 만듭니다.
+downloader 인자에 yf.download 와 같은 형태의 함수(예: stub_downloader)를 넘기면 오프라인으로 동작합니다.
+
+    python macro_store.py            # 증분 갱신
+    python macro_store.py --stub     # 합성 시세로 저장소 생성 (오프라인 검증용)
+"""
+import os
+import json
+import zlib
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+import data_provider
+import features
+import history_cache
+
+STORE_DIR = os.path.join("outputs", "macro")
+TICKERS = ["^KS11", "^KQ11", "^IXIC", "^VIX", "DX-Y.NYB", "^TNX", "GC=F", "NQ=F"]
+STORE_YEARS = 6          # 학습 기간(5년) + 지표 계산 여유
+OVERLAP_DAYS = 7         # 증분 갱신 시 다시 받는 최근 구간 (장중 수집분/정정 반영)
+SNAPSHOT_ROWS = 10       # 스냅샷 계산에 읽는 최근 행 수
+
+# MACRO_FEATURES 별 (원천 티커, 값 종류)
+SNAPSHOT_SOURCES = {
+    "nasdaq_return": ("^IXIC", "return"), "vix_close": ("^VIX", "close"), "dxy_return": ("DX-Y.NYB", "return"),
+    "tnx_close": ("^TNX", "close"), "gold_return": ("GC=F", "return"), "nasdaq_f_return": ("NQ=F", "return"),
+}
+MACRO_DEFAULTS = {"nasdaq_return": 0.0, "vix_close": 15.0, "dxy_return": 0.0,
+                  "tnx_close": 4.0, "gold_return": 0.0, "nasdaq_f_return": 0.0}
+
+def _paths(store_dir):
+    return (os.path.join(store_dir, "close.npy"), os.path.join(store_dir, "dates.npy"),
+            os.path.join(store_dir, "meta.json"))
+
+# =========================
+# 1. 읽기
+# =========================
+def load_arrays(store_dir=STORE_DIR, mmap=True):
+    """(종가 배열 days x tickers, 일자 datetime64[D] 배열, 티커 목록) 또는 None"""
+    close_path, dates_path, meta_path = _paths(store_dir)
+    if not all(os.path.exists(p) for p in (close_path, dates_path, meta_path)):
+        return None
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        return np.load(close_path, mmap_mode=mode), np.load(dates_path, mmap_mode=mode), meta["tickers"]
+    except Exception:
+        return None
+
+def load_frame(start=None, end=None, store_dir=STORE_DIR, ffill=True):
+    """저장된 종가를 일자 인덱스 DataFrame(컬럼 = 티커)으로 반환. 저장소가 없으면 None"""
+    arrays = load_arrays(store_dir)
+    if arrays is None:
+        return None
+    close, dates, tickers = arrays
+    df = pd.DataFrame(np.array(close), index=pd.DatetimeIndex(np.array(dates)), columns=tickers)
+    if ffill:
+        df = df.ffill()
+    if start is not None:
+        df = df[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df.index < pd.Timestamp(end)]
+    return df
+
+def snapshot(store_dir=STORE_DIR):
+    """최근 SNAPSHOT_ROWS 행만 읽어 MACRO_FEATURES 최신 값 dict 를 만듭니다. (저장소가 없으면 기본값)"""
+    arrays = load_arrays(store_dir)
+    if arrays is None:
+        return dict(MACRO_DEFAULTS)
+    close, _, tickers = arrays
+    recent = pd.DataFrame(np.array(close[-SNAPSHOT_ROWS:]), columns=tickers).ffill()
+    out = {}
+    for key, (ticker, kind) in SNAPSHOT_SOURCES.items():
+        s = recent[ticker] if ticker in recent else pd.Series(dtype=float)
+        value = s.iloc[-1] if kind == "close" and len(s) else (s.pct_change().iloc[-1] if len(s) > 1 else np.nan)
+        out[key] = float(value) if pd.notna(value) else MACRO_DEFAULTS[key]
+    return out
+
+def last_date(store_dir=STORE_DIR):
+    arrays = load_arrays(store_dir)
+    return pd.Timestamp(arrays[1][-1]) if arrays is not None and len(arrays[1]) else None
+
+# =========================
+# 2. 증분 갱신
+# =========================
+def save_frame(df, store_dir=STORE_DIR):
+    """종가 DataFrame(ffill 전 원본)을 배열 파일로 원자적 저장"""
+    os.makedirs(store_dir, exist_ok=True)
+    close_path, dates_path, meta_path = _paths(store_dir)
+    for path, arr in ((close_path, df.to_numpy(dtype=np.float64)),
+                      (dates_path, df.index.values.astype("datetime64[D]"))):
+        with open(f"{path}.tmp", "wb") as f:
+            np.save(f, arr)
+        os.replace(f"{path}.tmp", path)
+    with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"tickers": list(df.columns), "rows": len(df),
+                   "start": str(df.index[0].date()), "end": str(df.index[-1].date()),
+                   "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}, f, ensure_ascii=False)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+def update(start=None, end=None, downloader=None, store_dir=STORE_DIR):
+    """
+    저장소를 [start, end) 까지 덮도록 갱신하고 종가 DataFrame(ffill 전)을 반환합니다.
+    기존 저장분이 start 를 덮으면 마지막 저장일 OVERLAP_DAYS 전부터만 받고, 아니면 전체 구간을 받습니다.
+    """
+    end = pd.Timestamp(end or data_provider.now()).normalize() + pd.Timedelta(days=1)
+    start = pd.Timestamp(start or end - pd.DateOffset(years=STORE_YEARS)).normalize()
+
+    old = load_frame(store_dir=store_dir, ffill=False)
+    if old is not None and not old.empty and old.index[0] <= start and set(TICKERS) <= set(old.columns):
+        if old.index[-1] >= end - pd.Timedelta(days=1):
+            return old
+        fetch_start = old.index[-1] - pd.Timedelta(days=OVERLAP_DAYS)
+    else:
+        old, fetch_start = None, start
+
+    downloader = downloader or history_cache.default_downloader()
+    try:
+        raw = downloader(TICKERS, start=fetch_start, end=end, progress=False, group_by="ticker", threads=False)
+    except Exception as e:
+        print(f"⚠️ [매크로] 시세 다운로드 실패, 기존 저장분 유지: {e}")
+        return old
+    got = history_cache.split_download(raw, TICKERS)
+    new = pd.DataFrame({t: features.to_series(got[t]["Close"]) for t in TICKERS if t in got})
+    if new.empty:
+        print("⚠️ [매크로] 수신된 시세가 없어 기존 저장분 유지")
+        return old
+
+    if old is not None:
+        # 겹치는 구간은 새로 받은 값으로 덮되, 이번에 못 받은 티커의 기존 값은 유지
+        merged = new.combine_first(old)
+    else:
+        merged = new
+    merged = merged.reindex(columns=TICKERS).sort_index()
+    merged = merged[~merged.index.duplicated(keep="last")].dropna(how="all")
+    save_frame(merged, store_dir)
+    mode = "증분" if old is not None else "전체"
+    print(f"🌐 [매크로] {mode} 갱신 ({fetch_start.date()}~) | {len(merged)}일 x {len(TICKERS)}개 티커 | 최신 {merged.index[-1].date()}")
+    return merged
+
+# =========================
+# 3. 오프라인 합성 시세
+# =========================
+def stub_downloader(seed=0):
+    """yf.download 형태의 합성 시세 함수 (티커별 고정 랜덤워크, 평일만)"""
+    def download(tickers, start=None, end=None, **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        days = pd.bdate_range(pd.Timestamp(start), pd.Timestamp(end) - pd.Timedelta(days=1))
+        frames = {}
+        for t in tickers:
+            # 날짜 기준 난수라 구간을 나눠 받아도 같은 날은 같은 값
+            rng = np.random.default_rng([seed, zlib.crc32(t.encode())])
+            base = pd.bdate_range("2000-01-03", days[-1] if len(days) else pd.Timestamp(start))
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(base))))
+            s = pd.Series(close, index=base).reindex(days)
+            frames[t] = pd.DataFrame({"Open": s, "High": s * 1.01, "Low": s * 0.99, "Close": s, "Volume": 0.0})
+        return pd.concat(frames, axis=1)
+    return download
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="매크로 시세 스냅샷 저장소 갱신")
+    parser.add_argument("--years", type=int, default=STORE_YEARS)
+    parser.add_argument("--stub", action="store_true", help="네트워크 대신 합성 시세 사용")
+    args = parser.parse_args()
+    end = pd.Timestamp(data_provider.now().date())
+    update(start=end - pd.DateOffset(years=args.years), end=end,
+           downloader=stub_downloader() if args.stub else None)
+    print(f"📊 [매크로] 최신 스냅샷: {snapshot()}")
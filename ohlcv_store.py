@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+종목별 일봉 로컬 저장소
+
+매일 320봉 전체를 다시 받는 대신, 저장된 봉을 먼저 읽고 최근 몇 봉만 받아 이어붙입니다.
+겹치는 구간의 값이 저장본과 다르면(액면분할/권리락 등 수정주가 반영) 전체 구간을 다시 받아 복구합니다.
+"""
+import os
+import threading
+import pandas as pd
+
+STORE_DIR = os.path.join("data", "ohlcv")
+TAIL_COUNT = 10          # 증분 요청 봉 수 (저장본과 겹치는 구간 포함)
+MIN_OVERLAP = 2          # 이어붙이기 전에 최소로 일치해야 하는 겹침 봉 수
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+def store_path(code, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"{code}.pkl")
+
+def load(code, store_dir=STORE_DIR):
+    path = store_path(code, store_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        return None   # 깨진 파일은 미보유로 취급해 전체 재수집
+
+def save(code, df, store_dir=STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    path = store_path(code, store_dir)
+    tmp = f"{path}.tmp"
+    df.to_pickle(tmp)
+    os.replace(tmp, path)   # 작업이 중간에 죽어도 기존 파일은 온전히 유지
+
+def merge_tail(cached, tail):
+    """
+    저장본 뒤에 새 봉을 이어붙입니다. 겹치는 봉이 부족하거나(공백) 값이 다르면(분할 등) None을 반환합니다.
+    """
+    overlap = cached.index.intersection(tail.index)
+    if len(overlap) < min(MIN_OVERLAP, len(tail)):
+        return None
+    old = cached.loc[overlap, OHLCV_COLUMNS]
+    new = tail.loc[overlap, OHLCV_COLUMNS]
+    # 마지막 겹침 봉은 장중 수집분이었을 수 있으므로 새 값으로 덮어쓰고, 나머지는 완전히 일치해야 함
+    if not old.iloc[:-1].equals(new.iloc[:-1]):
+        return None
+    merged = pd.concat([cached[cached.index < overlap[-1]], tail[tail.index >= overlap[-1]]])
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+def update(code, fetch, full_count, store_dir=STORE_DIR, stats=None):
+    """
+    저장본을 최신 상태로 갱신해 반환합니다.
+    fetch(code, count)는 최근 count개 일봉 DataFrame(또는 None)을 반환하는 함수입니다.
+    stats가 주어지면 hit / full / repair 횟수를 기록합니다.
+    """
+    cached = load(code, store_dir)
+    if cached is not None and not cached.empty:
+        tail = fetch(code, TAIL_COUNT)
+        if tail is None or tail.empty:
+            return None
+        merged = merge_tail(cached, tail)
+        if merged is not None:
+            merged = merged.tail(full_count)
+            if not merged.equals(cached):
+                save(code, merged, store_dir)
+            _count(stats, "hit")
+            return merged
+        _count(stats, "repair")
+    else:
+        _count(stats, "full")
+
+    df = fetch(code, full_count)
+    if df is None or df.empty:
+        return None
+    save(code, df, store_dir)
+    return df
+
+_stats_lock = threading.Lock()
+
+def _count(stats, key):
+    if stats is not None:
+        with _stats_lock:
+            stats[key] = stats.get(key, 0) + 1
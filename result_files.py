@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+포착 결과 파일 공용 규칙 (결과 인덱스 / 번들 / 채점 / 컬럼형 결과 공용)
+
+수집 계층(yfinance, data_provider 등)을 불러오지 않는 가벼운 모듈이라 어느 모듈에서든 가져다 씁니다.
+"""
+import os
+import re
+
+def normalize_market(market):
+    """CSV 의 시장 표기(유가/코스닥 등)를 KOSPI / KOSDAQ 으로 통일"""
+    market = str(market).strip()
+    if "유가" in market or "KOSPI" in market: return "KOSPI"
+    if "코스닥" in market or "KOSDAQ" in market: return "KOSDAQ"
+    return market
+
+# 일봉 결과 CSV 만 (주기별 결과 final_result_<날짜>_<주기>.csv 와 .arrow 는 제외)
+RESULT_FILE = re.compile(r"^final_result_(\d{8})\.csv$")
+
+def result_dates(out_dir):
+    """out_dir 의 일봉 결과 CSV 날짜 'YYYYMMDD' 목록 (오래된 순)"""
+    if not os.path.isdir(out_dir):
+        return []
+    return sorted(m.group(1) for m in map(RESULT_FILE.match, os.listdir(out_dir)) if m)
+
+def latest_result_date(out_dir):
+    dates = result_dates(out_dir)
+    return dates[-1] if dates else None
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+포착 결과 컬럼형 파일 (타입 지정 스키마)
+
+final_result_YYYYMMDD.csv 는 그대로 두고, 같은 행을 outputs/final_result_YYYYMMDD.arrow 에도 씁니다.
+CSV 는 읽을 때마다 종목코드 앞자리 0 복구, 시장 표기 통일, 숫자 파싱을 다시 해야 하지만
+컬럼형 파일은 SCHEMA 대로 타입이 고정되어 있어 (종목코드 6자리 문자열, 시장 사전 인코딩, 거래대금 int64 등)
+앱 / 채점이 그대로 읽습니다. 압축하지 않은 Arrow IPC 파일이라 메모리 맵으로 열면 숫자 컬럼은 복사 없이 읽히고,
+스캐너가 계산한 조건 값(METRIC_COLUMNS: 이평선, 거래량 배수, 일목 기준값 등)도 CSV 와 달리 함께 남깁니다.
+pyarrow 가 없거나 .arrow 파일이 없는 날짜는 CSV 로 읽어 같은 정규화를 적용합니다.
+
+    python result_table.py                 # 최신 CSV 를 컬럼형 파일로 변환
+    python result_table.py --date 20260403
+    python result_table.py --all           # outputs/ 의 모든 결과 CSV 변환
+"""
+import os
+import argparse
+import pandas as pd
+
+import result_files
+from result_files import normalize_market
+
+OUT_DIR = "outputs"
+# 스캐너 조건 계산값 (screener.condition_values 의 일봉 키와 같은 이름, CSV 에는 쓰지 않음)
+METRIC_COLUMNS = ["MA5", "MA20", "MA60", "MA120", "MA240", "거래량배수", "전환선", "기준선", "신고가기준종가"]
+
+def available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def schema():
+    """컬럼 순서 / 타입. 여기에 없는 컬럼은 저장하지 않고, 없는 컬럼은 null 로 채웁니다."""
+    import pyarrow as pa
+    fields = [
+        ("날짜", pa.date32()),
+        ("종목코드", pa.string()),
+        ("종목명", pa.string()),
+        ("시장", pa.dictionary(pa.int8(), pa.string())),
+        ("최근20일최대거래대금(억)", pa.int64()),
+        ("최근거래일거래대금(억)", pa.int64()),
+        ("AI확률(%)", pa.float64()),
+        ("AI순위", pa.int16()),
+        ("AI근거", pa.string()),
+    ] + [(c, pa.float64()) for c in METRIC_COLUMNS]
+    return pa.schema(fields)
+
+def table_path(date_key, out_dir=OUT_DIR):
+    return os.path.join(out_dir, f"final_result_{date_key}.arrow")
+
+def csv_path(date_key, out_dir=OUT_DIR):
+    return os.path.join(out_dir, f"final_result_{date_key}.csv")
+
+def normalize(df):
+    """CSV 로 읽은 결과를 컬럼형 파일과 같은 표기로 맞춤 (종목코드 6자리, 시장 KOSPI/KOSDAQ)"""
+    df = df.copy()
+    if "종목코드" in df.columns: df["종목코드"] = df["종목코드"].astype(str).str.zfill(6)
+    if "시장" in df.columns: df["시장"] = df["시장"].map(normalize_market)
+    return df
+
+def to_table(df, date_key):
+    import pyarrow as pa
+    df = normalize(df)
+    if "최근거래일거래대금(억)" not in df.columns and "거래대금(억)" in df.columns:
+        df = df.rename(columns={"거래대금(억)": "최근거래일거래대금(억)"})   # 초기 CSV 컬럼 이름
+    sch, n = schema(), len(df)
+    columns = []
+    for field in sch:
+        if field.name == "날짜":
+            columns.append(pa.array([pd.Timestamp(date_key).date()] * n, type=field.type))
+        elif field.name not in df.columns:
+            columns.append(pa.nulls(n, type=field.type))
+        elif pa.types.is_dictionary(field.type):
+            columns.append(pa.array(df[field.name].astype(str), type=pa.string()).dictionary_encode()
+                           .cast(field.type))
+        elif pa.types.is_integer(field.type):
+            values = pd.to_numeric(df[field.name], errors="coerce").round()
+            columns.append(pa.array(values.astype("Int64"), type=pa.int64()).cast(field.type))
+        elif pa.types.is_floating(field.type):
+            columns.append(pa.array(pd.to_numeric(df[field.name], errors="coerce"), type=field.type, from_pandas=True))
+        else:
+            values = df[field.name].where(df[field.name].notna(), None)
+            columns.append(pa.array(values.astype(object), type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(columns, schema=sch)
+
+def save(df, date_key, out_dir=OUT_DIR):
+    """df 를 final_result_<date_key>.arrow 로 저장하고 경로를 반환 (pyarrow 가 없으면 None)"""
+    if not available():
+        return None
+    import pyarrow as pa
+    table = to_table(df, date_key)
+    path = table_path(date_key, out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    with pa.OSFile(f"{path}.tmp", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(f"{path}.tmp", path)
+    return path
+
+def read_table(date_key, out_dir=OUT_DIR):
+    """컬럼형 파일을 메모리 맵으로 연 pyarrow Table (파일이나 pyarrow 가 없으면 None)"""
+    path = table_path(date_key, out_dir)
+    if not os.path.exists(path) or not available():
+        return None
+    import pyarrow as pa
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+def load(date_key, out_dir=OUT_DIR):
+    """
+    date_key 의 포착 결과 DataFrame. 컬럼형 파일이 있으면 그대로, 없으면 CSV 를 정규화해 반환 (둘 다 없으면 None).
+    CSV 로 읽을 때는 기존 CSV 컬럼만 있고 METRIC_COLUMNS 는 없습니다.
+    """
+    table = read_table(date_key, out_dir)
+    if table is not None:
+        df = table.drop_columns(["날짜"]).to_pandas(split_blocks=True)
+        df["시장"] = df["시장"].astype(str)
+        return df
+    path = csv_path(date_key, out_dir)
+    if not os.path.exists(path):
+        return None
+    return normalize(pd.read_csv(path, dtype={"종목코드": str}))
+
+def write_csv(df, date_key, out_dir=OUT_DIR):
+    """기존 CSV 형식(조건 계산값 제외)으로 저장"""
+    path = csv_path(date_key, out_dir)
+    df.drop(columns=METRIC_COLUMNS, errors="ignore").to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+def convert(date_key, out_dir=OUT_DIR):
+    """기존 CSV 를 컬럼형 파일로 변환 (조건 계산값 컬럼은 null)"""
+    df = pd.read_csv(csv_path(date_key, out_dir), dtype={"종목코드": str})
+    return save(df, date_key, out_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="포착 결과 CSV → 컬럼형(Arrow) 변환")
+    parser.add_argument("--date", help="YYYYMMDD (기본: 최신 final_result CSV)")
+    parser.add_argument("--all", action="store_true", help="outputs/ 의 모든 결과 CSV 변환")
+    args = parser.parse_args()
+    if not available():
+        raise SystemExit("⚠️ [결과표] pyarrow 가 설치되어 있지 않습니다 (pip install pyarrow)")
+    keys = result_files.result_dates(OUT_DIR)
+    if args.date: keys = [args.date]
+    elif not args.all: keys = keys[-1:]
+    for key in keys:
+        if not args.date and os.path.exists(table_path(key)):
+            continue   # 스캐너가 쓴 파일은 조건 계산값이 있으므로 덮어쓰지 않음
+        print(f"🗂️ [결과표] {convert(key)}")
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+포착 이력 통합 인덱스 (스캐너 / 앱 / 학습 공용)
+
+매일의 final_result_YYYYMMDD.csv 를 (일자, 종목코드, 종목명, 시장, 거래대금, AI 확률) 고정 폭 컬럼의
+구조화 배열 하나(data/results_index.npy)로 모아 둡니다. 행은 (일자, 종목코드) 순으로 정렬되어 있어
+최신 일자 / 기간 조회는 np.searchsorted 로, 종목별 조회는 종목코드 컬럼 비교 한 번으로 끝납니다.
+스캐너가 결과 CSV 를 쓸 때마다 add() 로 그날 행을 교체/추가하고, 읽는 쪽은 np.load(mmap_mode="r") 로
+필요한 행만 읽으므로 outputs/ 목록을 훑거나 CSV 수백 개를 파싱하지 않습니다.
+인덱스는 커밋하지 않는 실행 시 파일이라, 없거나 outputs/ 에 파일이 추가된 뒤(디렉터리 수정 시각이 더 최신)면
+읽을 때 결과 CSV 전체로 다시 만듭니다 (git pull 로 새 결과가 들어온 앱 체크아웃 포함).
+
+    python results_index.py --rebuild    # outputs/final_result_*.csv 전체로 인덱스 재생성
+    python results_index.py --code 005930
+    python results_index.py --start 20260101 --end 20260131
+"""
+import os
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+from result_files import RESULT_FILE, normalize_market
+
+OUT_DIR = "outputs"
+INDEX_PATH = os.path.join("data", "results_index.npy")
+NAME_WIDTH = 20
+# 앱의 세션 스레드들이 git pull 직후 동시에 재생성하지 않도록 프로세스 안의 쓰기/재생성을 직렬화
+_write_lock = threading.RLock()
+
+INDEX_DTYPE = np.dtype([
+    ("date", "i4"), ("code", "U6"), ("name", f"U{NAME_WIDTH}"), ("market", "U6"),
+    ("turnover20", "f4"), ("last_turnover", "f4"), ("ai_prob", "f4"),
+])
+# 인덱스 필드 -> 조회 결과 DataFrame 컬럼 (결과 CSV 와 같은 이름)
+COLUMN_NAMES = {
+    "date": "날짜", "code": "종목코드", "name": "종목명", "market": "시장",
+    "turnover20": "최근20일최대거래대금(억)", "last_turnover": "최근거래일거래대금(억)", "ai_prob": "AI확률(%)",
+}
+
+def _column(df, *names):
+    """초기 CSV 는 컬럼 구성이 달라(거래대금(억) 등) 후보 이름 중 처음 있는 컬럼을 사용, 없으면 NaN"""
+    for name in names:
+        if name in df.columns:
+            return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float32)
+    return np.full(len(df), np.nan, dtype=np.float32)
+
+def rows_from_frame(df, date_key):
+    """결과 CSV 1일치 DataFrame -> 인덱스 행 배열"""
+    rows = np.zeros(len(df), dtype=INDEX_DTYPE)
+    rows["date"] = int(date_key)
+    rows["code"] = df["종목코드"].astype(str).str.zfill(6).to_numpy()
+    rows["name"] = df["종목명"].astype(str).str.slice(0, NAME_WIDTH).to_numpy()
+    rows["market"] = df["시장"].fillna("").map(normalize_market).to_numpy() if "시장" in df.columns else ""
+    rows["turnover20"] = _column(df, "최근20일최대거래대금(억)")
+    rows["last_turnover"] = _column(df, "최근거래일거래대금(억)", "거래대금(억)")
+    rows["ai_prob"] = _column(df, "AI확률(%)")
+    return rows
+
+# =========================
+# 1. 쓰기
+# =========================
+def save(index, path=INDEX_PATH):
+    """임시 파일 이름에 프로세스 / 스레드 번호를 붙여, 다른 프로세스가 동시에 저장해도 서로의 임시 파일을 옮기지 않음"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, index)
+    os.replace(tmp, path)
+
+def add(df, date_key, path=INDEX_PATH):
+    """date_key 의 행을 df 로 교체(없으면 추가)하고 저장. 반환: 전체 행 수"""
+    with _write_lock:
+        old = load(path, mmap=False)
+        new = rows_from_frame(df, date_key)
+        if old is not None:
+            new = np.concatenate([old[old["date"] != int(date_key)], new])
+        new = new[np.lexsort((new["code"], new["date"]))]
+        save(new, path)
+        return len(new)
+
+def rebuild(out_dir=OUT_DIR, path=INDEX_PATH):
+    """outputs/final_result_*.csv 전체로 인덱스를 다시 만듭니다 (컬럼형 파일이 있는 날짜는 그것을 읽음). 반환: (일수, 행 수)"""
+    import result_table
+    parts = []
+    for fname in sorted(os.listdir(out_dir)) if os.path.isdir(out_dir) else []:
+        m = RESULT_FILE.match(fname)
+        if m:
+            df = result_table.load(m.group(1), out_dir)
+            parts.append(rows_from_frame(df, m.group(1)))
+    index = np.concatenate(parts) if parts else np.zeros(0, dtype=INDEX_DTYPE)
+    index = index[np.lexsort((index["code"], index["date"]))]
+    save(index, path)
+    return len(parts), len(index)
+
+# =========================
+# 2. 조회
+# =========================
+def stale(path=INDEX_PATH, out_dir=OUT_DIR):
+    """인덱스가 없거나 outputs/ 가 인덱스보다 나중에 바뀌었으면 True"""
+    if not os.path.exists(path):
+        return True
+    return os.path.isdir(out_dir) and os.stat(out_dir).st_mtime_ns > os.stat(path).st_mtime_ns
+
+def load(path=INDEX_PATH, mmap=True, out_dir=OUT_DIR):
+    """인덱스 배열 또는 None. 인덱스가 없거나 오래됐으면 out_dir 의 결과 CSV 로 다시 만듭니다."""
+    if stale(path, out_dir):
+        with _write_lock:
+            # 기다리는 동안 다른 스레드가 다시 만들었으면 그대로 사용
+            if stale(path, out_dir) and rebuild(out_dir, path)[0] == 0:
+                return None
+    try:
+        return np.load(path, mmap_mode="r" if mmap else None)
+    except Exception:
+        return None
+
+def to_frame(rows):
+    df = pd.DataFrame({COLUMN_NAMES[k]: np.asarray(rows[k]) for k in INDEX_DTYPE.names})
+    df["날짜"] = df["날짜"].astype(str)
+    return df
+
+def latest_date(path=INDEX_PATH):
+    """가장 최근 포착 일자 'YYYYMMDD' 또는 None"""
+    index = load(path)
+    return str(index["date"][-1]) if index is not None and len(index) else None
+
+def dates(path=INDEX_PATH):
+    index = load(path)
+    return [] if index is None else [str(d) for d in np.unique(index["date"])]
+
+def picks_between(start=None, end=None, path=INDEX_PATH):
+    """start <= 일자 <= end (YYYYMMDD, 생략 시 처음/끝까지) 포착 행"""
+    index = load(path)
+    if index is None:
+        return to_frame(np.zeros(0, dtype=INDEX_DTYPE))
+    lo = np.searchsorted(index["date"], int(start)) if start else 0
+    hi = np.searchsorted(index["date"], int(end), side="right") if end else len(index)
+    return to_frame(index[lo:hi])
+
+def picks_on(date_key, path=INDEX_PATH):
+    return picks_between(date_key, date_key, path)
+
+def picks_for(code, path=INDEX_PATH):
+    """종목 1개의 포착 이력 (오래된 일자 순)"""
+    index = load(path)
+    if index is None:
+        return to_frame(np.zeros(0, dtype=INDEX_DTYPE))
+    return to_frame(index[np.flatnonzero(index["code"] == str(code).zfill(6))])
+
+def codes_between(start=None, end=None, path=INDEX_PATH):
+    """기간 내 한 번이라도 포착된 종목코드 (최근 포착 순)"""
+    picks = picks_between(start, end, path)
+    return picks.iloc[::-1].drop_duplicates("종목코드")["종목코드"].tolist()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="포착 이력 통합 인덱스")
+    parser.add_argument("--rebuild", action="store_true", help="결과 CSV 전체로 인덱스 재생성")
+    parser.add_argument("--code", help="종목 포착 이력 조회")
+    parser.add_argument("--start", help="기간 조회 시작 YYYYMMDD")
+    parser.add_argument("--end", help="기간 조회 끝 YYYYMMDD")
+    args = parser.parse_args()
+    if args.rebuild:
+        n_days, n_rows = rebuild()
+        print(f"🗂️ [인덱스] {n_days}일 / {n_rows}행 재생성: {INDEX_PATH}")
+    if args.code:
+        print(picks_for(args.code).to_string(index=False))
+    elif args.start or args.end:
+        print(picks_between(args.start, args.end).to_string(index=False))
+    elif not args.rebuild:
+        print(f"🗂️ [인덱스] 최신 일자 {latest_date()} | 누적 {len(dates())}일")
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+스캔 체크포인트 / 샤딩 / 샤드 결과 병합
+
+스캔 도중 작업이 죽어도 처음부터 다시 하지 않도록, 종목별 진행 상황을 data/checkpoints/<날짜>[_shard] 에 바로바로 씁니다.
+  - prefilter.jsonl : 사전필터를 마친 종목코드와 통과 여부 (한 줄씩 추가)
+  - frames/<code>.pkl : 전체 수집을 마친 종목의 일봉
+같은 날짜/샤드로 다시 실행하면 기록된 종목은 건너뛰고 이어서 수집하며, 스캔이 끝나면 체크포인트를 지웁니다.
+
+--shard i/N 은 종목코드 해시(crc32)로 리스트를 N 조각으로 나눠 i 번째 조각만 스캔하고
+outputs/shards/<날짜>/shard_i_of_N.csv 에 결과를 씁니다. merge_shards 가 조각 결과를 모아 최종 CSV를 만듭니다.
+"""
+import os
+import json
+import glob
+import zlib
+import shutil
+import pickle
+import threading
+import pandas as pd
+
+CHECKPOINT_DIR = os.path.join("data", "checkpoints")
+SHARD_DIR = os.path.join("outputs", "shards")
+
+def parse_shard(text):
+    """'i/N' -> (i, N). 0 <= i < N"""
+    try:
+        i, n = (int(x) for x in text.split("/"))
+    except ValueError:
+        raise ValueError(f"--shard 형식은 i/N 입니다: {text}")
+    if not 0 <= i < n:
+        raise ValueError(f"샤드 번호는 0 이상 {n} 미만이어야 합니다: {text}")
+    return i, n
+
+def shard_of(code, n_shards):
+    """종목코드 기준 고정 샤드 번호 (리스트 순서가 바뀌어도 같은 종목은 같은 샤드)"""
+    return zlib.crc32(str(code).zfill(6).encode()) % n_shards
+
+def select_shard(listing, shard):
+    """shard=(i, N) 에 해당하는 종목만 남긴 리스트 (원래 순서 유지)"""
+    if shard is None:
+        return listing
+    i, n = shard
+    return listing[listing["Code"].map(lambda c: shard_of(c, n) == i)].reset_index(drop=True)
+
+def shard_tag(shard):
+    return "" if shard is None else f"shard_{shard[0]}_of_{shard[1]}"
+
+class Checkpoint:
+    """종목 단위 진행 기록 (여러 수집 스레드에서 동시에 호출)"""
+
+    def __init__(self, date_str, shard=None, base_dir=CHECKPOINT_DIR, fresh=False):
+        name = date_str + (f"_{shard_tag(shard)}" if shard else "")
+        self.dir = os.path.join(base_dir, name)
+        if fresh:
+            self.clear()
+        self.frames_dir = os.path.join(self.dir, "frames")
+        self.prefilter_path = os.path.join(self.dir, "prefilter.jsonl")
+        self.lock = threading.Lock()
+        os.makedirs(self.frames_dir, exist_ok=True)
+        self._drop_partial_line()
+
+    def _drop_partial_line(self):
+        """중간에 잘린 마지막 줄(개행 없음)을 잘라냄. 남겨 두면 이어서 추가한 첫 기록이 그 줄에 붙어 함께 버려짐"""
+        if not os.path.exists(self.prefilter_path):
+            return
+        with open(self.prefilter_path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def prefilter_done(self):
+        """{종목코드: 통과 여부} (중간에 잘린 마지막 줄은 무시)"""
+        done = {}
+        if os.path.exists(self.prefilter_path):
+            with open(self.prefilter_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    done[rec["code"]] = rec["keep"]
+        return done
+
+    def add_prefilter(self, code, keep):
+        with self.lock:
+            with open(self.prefilter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"code": code, "keep": bool(keep)}) + "\n")
+                f.flush()
+
+    def _frame_path(self, code):
+        return os.path.join(self.frames_dir, f"{code}.pkl")
+
+    def load_frame(self, code):
+        path = self._frame_path(code)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def save_frame(self, code, df):
+        path = self._frame_path(code)
+        with open(f"{path}.tmp", "wb") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{path}.tmp", path)
+
+    def resumed_counts(self):
+        return len(self.prefilter_done()), len(glob.glob(os.path.join(self.frames_dir, "*.pkl")))
+
+    def clear(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+# =========================
+# 샤드 결과 저장 / 병합
+# =========================
+def shard_result_path(date_str, shard, shard_dir=SHARD_DIR):
+    return os.path.join(shard_dir, date_str, f"{shard_tag(shard)}.csv")
+
+def save_shard_result(rows, columns, date_str, shard, shard_dir=SHARD_DIR):
+    """포착 결과가 없어도 헤더만 있는 CSV를 써서 '완료된 샤드'임을 남김"""
+    path = shard_result_path(date_str, shard, shard_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame(rows, columns=columns).to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+def merge_shards(date_str, shard_dir=SHARD_DIR):
+    """
+    outputs/shards/<날짜>/shard_*_of_N.csv 를 합친 DataFrame 과 누락된 샤드 번호 목록을 반환합니다.
+    조각 파일이 없으면 (None, []).
+    """
+    paths = sorted(glob.glob(os.path.join(shard_dir, date_str, "shard_*_of_*.csv")))
+    if not paths:
+        return None, []
+    found, totals, frames = set(), set(), []
+    for path in paths:
+        i, n = (int(x) for x in os.path.basename(path)[len("shard_"):-len(".csv")].split("_of_"))
+        found.add(i)
+        totals.add(n)
+        frames.append(pd.read_csv(path, dtype={"종목코드": str}))
+    if len(totals) != 1:
+        raise ValueError(f"샤드 수가 서로 다른 조각이 섞여 있습니다: {sorted(totals)}")
+    missing = sorted(set(range(totals.pop())) - found)
+    merged = pd.concat(frames, ignore_index=True).drop_duplicates("종목코드")
+    return merged, missing
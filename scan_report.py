@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+스캔 실행 계측 및 실행 리포트
+
+scanner.py 의 요청 1건마다 (종목, 요청 봉 수, 시도 번호, 수집/파싱 시간, 받은 바이트, 결과/실패 사유)를 기록하고,
+슬립(직렬 간격 / 재시도 대기 / 속도 제한 대기) 시간을 종류별로 누적합니다.
+스캔이 끝나면 단계별/조건별 통계와 함께 JSON 요약과 CSV 상세를 씁니다.
+요청 1건당 1행인 CSV 상세(하루 수천 행)는 저장소에 커밋되지 않도록 data/ 아래에 둡니다 (CI 에서는 아티팩트로 업로드).
+
+    outputs/scan_report_YYYYMMDD.json        # 단계(stage) / 조건(A~F) / 실패 사유 / 슬립 / 느린 종목 요약
+    data/scan_reports/scan_report_YYYYMMDD.csv   # 요청 1건당 1행
+"""
+import os
+import json
+import time
+import threading
+import pandas as pd
+
+EVENT_COLUMNS = ["code", "count", "attempt", "fetch_ms", "parse_ms", "bytes", "status", "error"]
+SLOWEST_CODES = 20
+DETAIL_DIR = os.path.join("data", "scan_reports")   # CSV 상세 / cProfile 덤프 (gitignore)
+
+class ScanRecorder:
+    """여러 수집 스레드가 공유하는 요청/슬립 기록기"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.events = []
+            self.sleeps = {}
+            self.started = time.time()
+
+    def request(self, code, count, attempt, fetch_sec, parse_sec, nbytes, status, error=""):
+        row = (code, count, attempt, round(fetch_sec * 1000, 2), round(parse_sec * 1000, 2), nbytes, status, error)
+        with self.lock:
+            self.events.append(row)
+
+    def sleep(self, kind, sec):
+        """kind 별 누적 대기 시간 (throttle / retry / rate_limit)"""
+        with self.lock:
+            self.sleeps[kind] = self.sleeps.get(kind, 0.0) + sec
+
+    def frame(self):
+        with self.lock:
+            return pd.DataFrame(self.events, columns=EVENT_COLUMNS)
+
+    def summary(self, stages=(), conditions=(), extra=None):
+        events = self.frame()
+        ok = events[events["status"] == "ok"]
+        per_code = events.groupby("code").agg(requests=("attempt", "size"), fetch_ms=("fetch_ms", "sum"),
+                                              parse_ms=("parse_ms", "sum"), bytes=("bytes", "sum"))
+        slowest = per_code.sort_values("fetch_ms", ascending=False).head(SLOWEST_CODES)
+        return {
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "total_sec": round(time.time() - self.started, 2),
+            "requests": len(events),
+            "retries": int((events["attempt"] > 0).sum()),
+            "codes": int(events["code"].nunique()),
+            "bytes": int(events["bytes"].sum()),
+            "fetch_sec": round(events["fetch_ms"].sum() / 1000, 2),
+            "parse_sec": round(events["parse_ms"].sum() / 1000, 2),
+            "fetch_ms_p50": round(float(ok["fetch_ms"].median()), 2) if len(ok) else None,
+            "fetch_ms_p95": round(float(ok["fetch_ms"].quantile(0.95)), 2) if len(ok) else None,
+            "sleep_sec": {k: round(v, 2) for k, v in self.sleeps.items()},
+            "failures": events.loc[events["status"] != "ok", "status"].value_counts().to_dict(),
+            "stages": list(stages),
+            "conditions": list(conditions),
+            "slowest_codes": slowest.reset_index().to_dict("records"),
+            **(extra or {}),
+        }
+
+    def write(self, out_dir, date_str, stages=(), conditions=(), extra=None, detail_dir=DETAIL_DIR):
+        """JSON 요약(out_dir) / CSV 상세(detail_dir) 리포트를 쓰고 (json 경로, csv 경로)를 반환"""
+        os.makedirs(out_dir, exist_ok=True)
+        os.makedirs(detail_dir, exist_ok=True)
+        json_path = os.path.join(out_dir, f"scan_report_{date_str}.json")
+        csv_path = os.path.join(detail_dir, f"scan_report_{date_str}.csv")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(stages, conditions, extra), f, ensure_ascii=False, indent=2, default=str)
+        self.frame().to_csv(csv_path, index=False, encoding="utf-8-sig")
+        return json_path, csv_path
+
+def failure_reason(exc):
+    """요청 예외를 리포트용 실패 사유 코드로 분류"""
+    import requests
+    if isinstance(exc, requests.Timeout):
+        return "timeout"
+    if isinstance(exc, requests.HTTPError):
+        status = getattr(exc.response, "status_code", None)
+        return f"http_{status}" if status else "http_error"
+    if isinstance(exc, requests.ConnectionError):
+        return "connection"
+    if isinstance(exc, ValueError):
+        return "parse_error"
+    return type(exc).__name__
@@ -3,13 +3,27 @@ import warnings
 warnings.filterwarnings("ignore")
 
 import os
+import re
 import time
 import random
-import requests
+import argparse
+import threading
+from io import StringIO
+import cProfile
+import pstats
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from bs4 import BeautifulSoup
-from groq import Groq  # AI 분석을 위해 추가
+import ohlcv_store
+import indicator_state
+import screener
+import scan_report
+import result_table
+import scan_checkpoint
+import http_client
+import data_provider
+import analysis
 
 # =========================
 # 1. 파라미터 설정 (찬희님 로직 반영)
@@ -24,42 +38,134 @@ SLOPE_LOOKBACK_DAYS = 5
 # 일목균형표 파라미터
 ICHIMOKU_TENKAN = 9
 ICHIMOKU_KIJUN  = 26
+MIN_BARS = 260
+
+# 일괄 스크리너(screener.screen_panel)에 넘기는 조건 파라미터
+CONDITION_PARAMS = {
+    "min_bars": MIN_BARS, "lookback": LOOKBACK_20, "vol_ratio": VOL_RATIO_THRESHOLD,
+    "turnover_max_20": TURNOVER_MAX_20_THRESHOLD, "last_turnover": LAST_TURNOVER_THRESHOLD,
+    "slope_lookback": SLOPE_LOOKBACK_DAYS, "tenkan": ICHIMOKU_TENKAN, "kijun": ICHIMOKU_KIJUN,
+    "ma_align": (5, 20, 60), "slope_windows": (120, 240), "high_window": 120,
+}
+
+# 봉 주기별 조건 프로파일 (이평선/신고가 기간과 거래대금 기준은 해당 주기의 봉 개수/봉 1개 기준)
+# 주봉/분봉 기준값은 일봉 조건을 봉 길이에 맞춰 옮긴 출발값이므로 운영하면서 조정합니다.
+TIMEFRAME_PROFILES = {
+    "day": {"timeframe": "day", "count": FULL_COUNT, "prefilter_count": LOOKBACK_20, "params": CONDITION_PARAMS},
+    "week": {"timeframe": "week", "count": 160, "prefilter_count": 10, "params": {
+        "min_bars": 110, "lookback": 10, "vol_ratio": 3.0,
+        "turnover_max_20": 3000 * 1e8, "last_turnover": 250 * 1e8,
+        "slope_lookback": 2, "tenkan": ICHIMOKU_TENKAN, "kijun": ICHIMOKU_KIJUN,
+        "ma_align": (5, 10, 20), "slope_windows": (52, 104), "high_window": 52,
+    }},
+    "minute": {"timeframe": "minute", "count": 300, "prefilter_count": LOOKBACK_20, "params": {
+        "min_bars": 250, "lookback": LOOKBACK_20, "vol_ratio": VOL_RATIO_THRESHOLD,
+        "turnover_max_20": 20 * 1e8, "last_turnover": 1 * 1e8,
+        "slope_lookback": SLOPE_LOOKBACK_DAYS, "tenkan": ICHIMOKU_TENKAN, "kijun": ICHIMOKU_KIJUN,
+        "ma_align": (5, 20, 60), "slope_windows": (120, 240), "high_window": 120,
+    }},
+}
+DAY_PROFILE = TIMEFRAME_PROFILES["day"]
 
 # 서버 부하 방지용 슬립
 SLEEP_MIN = 0.05
 SLEEP_MAX = 0.15
 RETRY_FULL  = 2
+# 일시적 실패(타임아웃/429/5xx)와 빈 응답 재시도 공용 백오프 (0.3초 -> 0.6초 ..., 최대 5초, ±20% 지터)
+RETRY_POLICY = http_client.RetryPolicy(retries=RETRY_FULL, base=0.3, max_delay=5.0)
+
+# 동시 수집 설정 (워커 1개면 기존 직렬 스캔과 동일하게 동작)
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "1"))
+RATE_LIMIT_PER_SEC = float(os.getenv("SCAN_RATE_LIMIT", "10"))   # 초당 최대 요청 수
+RATE_LIMIT_BURST   = 5
+PROGRESS_EVERY = 100
+
+# 1단계 사전필터: 최근 LOOKBACK_20 봉만 받아 거래대금 조건(A)으로 먼저 거른 뒤 생존 종목만 전체 수집
+USE_PREFILTER = os.getenv("SCAN_PREFILTER", "1") == "1"
+BUILD_BUNDLES = os.getenv("SCAN_BUNDLES", "1") == "1"   # 스캔 후 포착 종목 대시보드 번들 생성 (bundles.py)
+PREGENERATE_ANALYSIS = os.getenv("SCAN_ANALYSIS", "1") == "1"   # 스캔 후 포착 종목 AI 자동 분석 사전 생성 (analysis.py)
+PREFILTER_COUNT = LOOKBACK_20
+
+# 로컬 일봉 저장소 사용 여부 (저장본이 있으면 최근 봉만 받아 이어붙임)
+USE_STORE = os.getenv("SCAN_USE_STORE", "1") == "1"
+
+# 종목별 증분 지표 상태 사용 여부 (data/indicator_state.pkl) - 일봉 조건을 새 봉만 반영한 누적 값으로 평가
+# 평가 비용이 이평선/신고가 기간과 무관하지만 속도 개선은 아님: 320봉 기준 종목별 갱신 + 상태 저장소 읽기/쓰기가
+# 일괄 패널 평가보다 약 3.5배 느려 기본은 끔 (benchmark.py 의 [STATE] 항목 참고, 기간을 크게 늘릴 때만 켜기)
+USE_INDICATOR_STATE = os.getenv("SCAN_INDICATOR_STATE", "0") == "1"
+
+# 종목 단위 체크포인트 (data/checkpoints) - 작업이 중간에 죽어도 같은 날짜로 다시 실행하면 이어서 스캔
+USE_CHECKPOINT = os.getenv("SCAN_CHECKPOINT", "1") == "1"
+SCAN_SHARD = os.getenv("SCAN_SHARD")   # "i/N" - 리스트를 N 조각으로 나눠 i 번째만 스캔 (매트릭스 작업용)
+
+# cProfile 덤프 모드 (data/scan_reports/scan_profile_YYYYMMDD.prof + 누적 시간 상위 함수 출력)
+PROFILE = os.getenv("SCAN_PROFILE", "0") == "1"
+PROFILE_TOP = 25
 
 OUT_DIR = "outputs"
 os.makedirs(OUT_DIR, exist_ok=True)
 
 # [수정] API 키 불러오기: st.secrets 대신 os.getenv 사용 (GitHub Actions 호환)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
+client = analysis.make_client(GROQ_API_KEY)
 
 # =========================
 # 2. 유틸리티 및 데이터 수집
 # =========================
 def today_yyyymmdd():
-    return datetime.today().strftime("%Y%m%d")
+    return data_provider.now().strftime("%Y%m%d")   # 재생 중이면 녹화 세션 날짜
 
 def to_eok(x):
     return int(round(x / 1e8, 0))
 
-def safe_get(url, params):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Referer": "https://finance.naver.com/"
-    }
-    r = requests.get(url, params=params, headers=headers, timeout=15)
-    r.raise_for_status()
-    return r.text
+# 요청별 수집/파싱 시간, 바이트, 실패 사유와 슬립 시간 기록 (스캔 종료 시 outputs/ 에 리포트 저장)
+recorder = scan_report.ScanRecorder()
+
+def pause(kind, sec):
+    """종류별(throttle / retry / rate_limit) 대기 시간을 기록하며 슬립 (재생 공급자는 대기하지 않음)"""
+    if not data_provider.get().throttled:
+        return
+    recorder.sleep(kind, sec)
+    time.sleep(sec)
+
+class TokenBucket:
+    """여러 스레드가 공유하는 토큰 버킷 요청 속도 제한기"""
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            pause("rate_limit", wait)
+
+# 동시 스캔 시에만 설정되는 공유 제한기 (직렬 스캔은 기존 슬립 사용)
+rate_limiter = None
+# 단계(사전필터 -> 전체 수집)가 바뀌어도 같은 속도의 버킷을 이어 써서 단계 경계에서 버스트가 다시 채워지지 않게 함
+_bucket = None
+
+# 공용 HTTP 세션 (keep-alive 연결 풀, gzip, 재시도/백오프). 스캔 시작 시 워커 수에 맞춰 풀 크기를 키움
+http = http_client.default_client()
+
+def get_sise_xml(code, count, timeframe="day"):
+    """데이터 공급자로 봉 요청. 일시적 실패는 RETRY_POLICY 로 재시도하고, 매 시도마다 속도 제한기를 거칩니다."""
+    throttle = rate_limiter.acquire if rate_limiter is not None else None
+    return data_provider.get().ohlcv_xml(code, count, timeframe, policy=RETRY_POLICY, throttle=throttle)
 
 def get_listing():
     print("[INFO] KRX 종목 리스트 수집 중...")
-    url = "https://kind.krx.co.kr/corpgeneral/corpList.do"
-    r = requests.get(url, params={"method": "download"}, timeout=15)
-    df = pd.read_html(r.text, header=0)[0]
+    text = data_provider.get().listing_html()
+    df = pd.read_html(StringIO(text), header=0)[0]
     df["종목코드"] = df["종목코드"].astype(str).str.zfill(6)
     return pd.DataFrame({
         "Code": df["종목코드"],
@@ -67,29 +173,102 @@ def get_listing():
         "Market": df["시장구분"] if "시장구분" in df.columns else "Unknown"
     })
 
-def get_ohlcv(code, count):
-    url = "https://fchart.stock.naver.com/sise.nhn"
-    params = {"symbol": code, "timeframe": "day", "count": str(count), "requestType": "0"}
+# fchart 응답의 <item data="날짜|시가|고가|저가|종가|거래량" /> 속성값
+SISE_ITEM_RE = re.compile(r'<item\s+data="([^"]*)"')
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+SISE_FIELDS = 1 + len(OHLCV_FIELDS)
+
+def parse_sise_xml(xml):
+    """
+    fchart sise XML을 트리 없이 정규식으로 읽어 한 번에 DataFrame을 만듭니다.
+    parse_sise_xml_soup(기존 BeautifulSoup 파서)과 같은 프레임을 반환합니다.
+    분봉 응답(일시 YYYYMMDDHHMM, 시가/고가/저가 null)은 빈 가격을 종가로 채운 float 프레임으로 반환합니다.
+    기존 파서와 같이 필드가 6개보다 적은 항목이나 일봉/주봉의 null 값은 ValueError 입니다. (6개 이후 필드는 무시)
+    """
+    items = SISE_ITEM_RE.findall(xml)
+    if not items: return None
+    counts = [it.count("|") for it in items]
+    if min(counts) < SISE_FIELDS - 1:
+        row = counts.index(min(counts))
+        raise ValueError(f"sise item {row}: 필드 {counts[row] + 1}개 < {SISE_FIELDS}개 ({items[row]!r})")
+    if max(counts) != min(counts):
+        items = ["|".join(it.split("|")[:SISE_FIELDS]) for it in items]
+    cells = np.array("|".join(items).split("|")).reshape(len(items), -1)[:, :SISE_FIELDS]
+    intraday = len(cells[0, 0]) == 12
+    try:
+        values = cells[:, 1:].astype(np.int64)
+    except ValueError:
+        if not intraday: raise
+        values = np.where(cells[:, 1:] == "null", "nan", cells[:, 1:]).astype(np.float64)
+        values[:, :3] = np.where(np.isnan(values[:, :3]), values[:, 3:4], values[:, :3])
+    fmt = "%Y%m%d%H%M" if intraday else "%Y%m%d"
+    dates = pd.to_datetime(pd.Series(cells[:, 0]), format=fmt)
+    order = np.argsort(dates.to_numpy(), kind="stable")
+    return pd.DataFrame(values[order], columns=OHLCV_FIELDS, index=pd.DatetimeIndex(dates.to_numpy()[order], name="Date"))
+
+def parse_sise_xml_soup(xml):
+    """기존 BeautifulSoup 파서 (parse_sise_xml 의 기준 구현)"""
+    soup = BeautifulSoup(xml, "lxml-xml")
+    items = soup.find_all("item")
+    if not items: return None
+    rows = []
+    for it in items:
+        d = it["data"].split("|")
+        rows.append({"Date": pd.to_datetime(d[0]), "Open": int(d[1]), "High": int(d[2]),
+                     "Low":  int(d[3]), "Close": int(d[4]), "Volume": int(d[5])})
+    return pd.DataFrame(rows).sort_values("Date").set_index("Date")
+
+def fetch_ohlcv(code, count, attempt=0, timeframe="day"):
+    """봉 요청 1건 (timeframe: day / week / minute). 반환: (DataFrame 또는 None, 상태). 실패 사유는 recorder 에 남깁니다."""
+    t0 = time.perf_counter()
+    try:
+        xml = get_sise_xml(code, count, timeframe)
+    except Exception as e:
+        status = scan_report.failure_reason(e)
+        recorder.request(code, count, attempt, time.perf_counter() - t0, 0.0, 0, status, str(e)[:200])
+        return None, status
+    t1 = time.perf_counter()
+    df, status, error = None, "ok", ""
     try:
-        xml = safe_get(url, params)
-        soup = BeautifulSoup(xml, "lxml-xml")
-        items = soup.find_all("item")
-        if not items: return None
-        rows = []
-        for it in items:
-            d = it["data"].split("|")
-            rows.append({"Date": pd.to_datetime(d[0]), "Open": int(d[1]), "High": int(d[2]),
-                         "Low":  int(d[3]), "Close": int(d[4]), "Volume": int(d[5])})
-        return pd.DataFrame(rows).sort_values("Date").set_index("Date")
-    except: return None
-
-def get_ohlcv_retry(code, count, retry):
-    for _ in range(retry + 1):
-        df = get_ohlcv(code, count)
-        if df is not None and not df.empty: return df
-        time.sleep(0.3)
+        df = parse_sise_xml(xml)
+        if df is None or df.empty: status = "empty"
+    except Exception as e:
+        status, error = "parse_error", str(e)[:200]
+    recorder.request(code, count, attempt, t1 - t0, time.perf_counter() - t1, len(xml.encode("utf-8")), status, error)
+    return df, status
+
+def get_ohlcv(code, count, timeframe="day"):
+    return fetch_ohlcv(code, count, timeframe=timeframe)[0]
+
+def get_ohlcv_retry(code, count, retry, timeframe="day"):
+    """
+    전송 오류(타임아웃/연결/429/5xx)는 공용 세션이 이미 RETRY_POLICY 로 재시도했으므로 다시 시도하지 않고,
+    빈 응답/파싱 실패만 같은 백오프 정책으로 retry 회까지 다시 요청합니다.
+    """
+    for attempt in range(retry + 1):
+        df, status = fetch_ohlcv(code, count, attempt, timeframe)
+        if status == "ok": return df
+        if status not in ("empty", "parse_error") or attempt == retry: break
+        pause("retry", RETRY_POLICY.delay(attempt))
     return None
 
+# 저장소 적중/전체수집/복구 횟수 (스캔 종료 시 출력)
+store_stats = {}
+
+def load_ohlcv(code, count, retry, use_store=True, prefetched=None):
+    """
+    로컬 저장소를 거쳐 일봉을 가져옵니다. 저장소를 쓰지 않으면 매번 전체 구간을 받습니다.
+    prefetched(사전필터 단계에서 받은 최근 봉)로 충분한 요청은 다시 보내지 않습니다.
+    """
+    def fetch(c, n):
+        if prefetched is not None and len(prefetched) >= n:
+            return prefetched.tail(n)
+        return get_ohlcv_retry(c, n, retry)
+
+    if not use_store:
+        return fetch(code, count)
+    return ohlcv_store.update(code, fetch, count, stats=store_stats)
+
 # =========================
 # 3. 기술적 분석 조건 (찬희님 오리지널 로직)
 # =========================
@@ -105,7 +284,8 @@ def ichimoku_calc(df, n):
     return (df["High"].rolling(n).max() + df["Low"].rolling(n).min()) / 2
 
 def check_all_conditions(df):
-    if len(df) < 260: return False
+    """종목 1개 기준 조건 검사 (일괄 스크리너 screener.screen_panel 의 기준 구현)"""
+    if len(df) < MIN_BARS: return False
     
     # A) 거래대금
     turnover20 = (df.tail(20)["Close"] * df.tail(20)["Volume"]).max()
@@ -142,41 +322,334 @@ def check_all_conditions(df):
     return True
 
 # =========================
-# 4. 메인 실행부
+# 4. 스캔 엔진 (직렬 / 동시)
 # =========================
-def main():
+RESULT_COLUMNS = ["종목코드", "종목명", "시장", "최근20일최대거래대금(억)", "최근거래일거래대금(억)"]
+
+def candidate_row(code, name, market, df, lookback=LOOKBACK_20):
+    turnover20 = to_eok((df.tail(lookback)["Close"] * df.tail(lookback)["Volume"]).max())
+    last_turnover = to_eok(df.iloc[-1]["Close"] * df.iloc[-1]["Volume"])
+    return {
+        "종목코드": code, "종목명": name, "시장": market,
+        "최근20일최대거래대금(억)": turnover20,
+        "최근거래일거래대금(억)": last_turnover
+    }
+
+def run_parallel(items, fn, workers=1, rate=RATE_LIMIT_PER_SEC):
+    """
+    items 각각에 fn을 적용한 결과를 입력 순서대로 반환합니다.
+    workers > 1 이면 스레드 풀로 동시에 수집하되, 토큰 버킷으로 요청 속도를 제한합니다.
+    """
+    global rate_limiter, _bucket
+    total = len(items)
+    out = [None] * total
+
+    def progress(done):
+        if done % PROGRESS_EVERY == 0:
+            print(f"[PROGRESS] {done}/{total} 완료 | 수집: {sum(o is not None for o in out)}개")
+
+    if workers <= 1:
+        for i, item in enumerate(items):
+            out[i] = fn(item)
+            progress(i + 1)
+            pause("throttle", random.uniform(SLEEP_MIN, SLEEP_MAX))
+        return out
+
+    # 재생 공급자는 네트워크를 쓰지 않으므로 속도 제한 없이 워커 수만큼 동시에 처리
+    if _bucket is None or _bucket.rate != float(rate):
+        _bucket = TokenBucket(rate, RATE_LIMIT_BURST)
+    rate_limiter = _bucket if data_provider.get().throttled else None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(fn, item): i for i, item in enumerate(items)}
+            for done, fut in enumerate(as_completed(futures), start=1):
+                out[futures[fut]] = fut.result()
+                progress(done)
+    finally:
+        rate_limiter = None
+    return out
+
+# 지표 상태 증분/신규/복구/검증 횟수 (스캔 종료 시 출력)
+state_stats = {}
+
+def screen_frames(rows, frames, stats=None, profile=DAY_PROFILE, use_state=False):
+    """
+    수집된 봉을 일괄 스크리너로 평가해 포착 종목 행을 리스팅 순서대로 반환합니다.
+    use_state 면 종목별 증분 지표 상태를 새 봉만큼 진행시켜 상태 값으로 평가합니다 (결과 동일).
+    """
+    params = profile["params"]
+    if use_state:
+        states = indicator_state.advance_all([row[0] for row in rows], frames, params, state_stats)
+        mask = screener.screen_metrics(indicator_state.metric_arrays(states), params, stats)
+    else:
+        mask = screener.screen_panel(screener.build_panel(frames, profile["count"]), params, stats)
+    hits = mask.nonzero()[0]
+    # 포착 종목만 조건 계산값(이평선 / 거래량 배수 / 일목 기준값)을 구해 결과 행에 붙임 (컬럼형 결과 파일용)
+    values = screener.condition_values(screener.build_panel([frames[i] for i in hits], profile["count"]), params)
+    return [dict(candidate_row(*rows[i], frames[i], params["lookback"]), **{k: float(v[j]) for k, v in values.items()})
+            for j, i in enumerate(hits)]
+
+# 단계별 입력/탈락 종목 수와 소요 시간, 조건(A~F)별 통과 수 (스캔 종료 시 출력 및 리포트 저장)
+stage_stats = []
+condition_stats = []
+
+def record_stage(name, n_in, n_out, started):
+    stage_stats.append({"stage": name, "in": n_in, "out": n_out,
+                        "eliminated": n_in - n_out, "sec": round(time.time() - started, 2)})
+
+def prefilter_mask(frames, profile=DAY_PROFILE):
+    n = profile["prefilter_count"]
+    panel = screener.build_panel(frames, n)
+    return (panel["length"] >= n) & screener.turnover_mask(panel["Close"], panel["Volume"], profile["params"])
+
+def prefilter(rows, workers=1, rate=RATE_LIMIT_PER_SEC, checkpoint=None, profile=DAY_PROFILE):
+    """
+    1단계: 최근 PREFILTER_COUNT 봉만 받아 거래대금 조건(A)을 통과할 수 없는 종목을 제거합니다.
+    봉 수가 PREFILTER_COUNT 미만인 신규 상장 종목도 MIN_BARS 조건을 통과할 수 없으므로 제거합니다.
+    checkpoint 가 있으면 이미 판정된 종목은 다시 받지 않고, 새로 판정한 종목은 바로 기록합니다.
+    반환: 생존 종목 인덱스, 인덱스별 최근 봉 (이번 실행에서 받은 종목만)
+    """
+    done = checkpoint.prefilter_done() if checkpoint is not None else {}
+    todo = [i for i, (code, _, _) in enumerate(rows) if code not in done]
+
+    def job(i):
+        df = get_ohlcv_retry(rows[i][0], profile["prefilter_count"], RETRY_FULL, profile["timeframe"])
+        if checkpoint is not None:
+            checkpoint.add_prefilter(rows[i][0], prefilter_mask([df], profile)[0])
+        return df
+
+    short = run_parallel(todo, job, workers, rate)
+    passed = prefilter_mask(short, profile).nonzero()[0] if todo else []
+    fresh = {todo[k]: short[k] for k in passed}
+    keep = sorted(list(fresh) + [i for i, (code, _, _) in enumerate(rows) if done.get(code)])
+    return keep, fresh
+
+def scan_listing(listing, workers=1, rate=RATE_LIMIT_PER_SEC, use_store=USE_STORE, use_prefilter=USE_PREFILTER,
+                 checkpoint=None, profile=DAY_PROFILE, use_state=USE_INDICATOR_STATE):
+    """
+    리스트 전체를 스캔해 포착 종목을 리스팅 순서대로 반환합니다.
+    결과 순서를 리스팅 순서로 맞추므로 직렬/동시, 사전필터 사용 여부, 체크포인트 재개 여부와 관계없이 결과 CSV는 동일합니다.
+    로컬 저장소(ohlcv_store)와 지표 상태(indicator_state)는 일봉 전용이므로 다른 주기 프로파일은
+    매번 profile["count"] 봉을 받아 봉 배열로 평가합니다.
+    """
+    rows = list(zip(listing["Code"], listing["Name"], listing["Market"]))
+    stage_stats.clear()
+    condition_stats.clear()
+    recorder.reset()
+    http.ensure_pool_size(workers)
+    http.reset_metrics()
+
+    t = time.time()
+    if use_prefilter:
+        keep, short = prefilter(rows, workers, rate, checkpoint, profile)
+        record_stage("prefilter", len(rows), len(keep), t)
+    else:
+        keep, short = list(range(len(rows))), {}
+
+    t = time.time()
+    survivors = [rows[i] for i in keep]
+    def full_fetch(i):
+        code = rows[i][0]
+        df = checkpoint.load_frame(code) if checkpoint is not None else None
+        if df is None:
+            if profile["timeframe"] == "day":
+                df = load_ohlcv(code, FULL_COUNT, RETRY_FULL, use_store, short.get(i))
+            else:
+                df = get_ohlcv_retry(code, profile["count"], RETRY_FULL, profile["timeframe"])
+            if df is not None and checkpoint is not None:
+                checkpoint.save_frame(code, df)
+        return df
+
+    frames = run_parallel(list(keep), full_fetch, workers, rate)
+    record_stage("full_fetch", len(survivors), sum(f is not None for f in frames), t)
+
+    t = time.time()
+    results = screen_frames(survivors, frames, condition_stats, profile, use_state and profile["timeframe"] == "day")
+    record_stage("screen", sum(f is not None for f in frames), len(results), t)
+
+    for st in stage_stats:
+        print(f"[STAGE] {st['stage']:<10} | 입력 {st['in']} | 탈락 {st['eliminated']} | 통과 {st['out']} | {st['sec']}초")
+    for cs in condition_stats:
+        print(f"[COND]  {cs['condition']:<12} | 입력 {cs['in']} | 통과 {cs['out']} | {cs['ms']}ms")
+    return results
+
+# =========================
+# 5. 메인 실행부
+# =========================
+def parse_args():
+    parser = argparse.ArgumentParser(description="KRX 일일 종목 스캐너")
+    parser.add_argument("--workers", type=int, default=SCAN_WORKERS, help="동시 수집 스레드 수 (1=직렬)")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT_PER_SEC, help="동시 수집 시 초당 최대 요청 수")
+    parser.add_argument("--no-store", action="store_true", help="로컬 일봉 저장소를 건너뛰고 매번 전체 구간 수집")
+    parser.add_argument("--indicator-state", action="store_true", default=USE_INDICATOR_STATE,
+                        help="봉 배열 대신 종목별 증분 지표 상태로 일봉 조건 평가 (data/indicator_state.pkl)")
+    parser.add_argument("--no-prefilter", action="store_true", help="거래대금 사전필터 단계 생략")
+    parser.add_argument("--no-bundles", action="store_true", help="포착 종목 대시보드 번들 생성 생략")
+    parser.add_argument("--no-analysis", action="store_true", help="포착 종목 AI 자동 분석 사전 생성 생략")
+    parser.add_argument("--no-checkpoint", action="store_true", help="체크포인트 기록/재개 없이 스캔")
+    parser.add_argument("--fresh", action="store_true", help="남아 있는 체크포인트를 지우고 처음부터 스캔")
+    parser.add_argument("--shard", default=SCAN_SHARD, help="i/N: 리스트의 i 번째 조각만 스캔해 outputs/shards 에 저장")
+    parser.add_argument("--merge", action="store_true", help="조각 결과를 합쳐 최종 CSV 생성 (스캔하지 않음)")
+    parser.add_argument("--date", default=None, help="--merge 대상 날짜 YYYYMMDD (기본: 오늘)")
+    parser.add_argument("--timeframe", choices=list(TIMEFRAME_PROFILES), default="day", help="조건 프로파일 봉 주기")
+    parser.add_argument("--intraday", action="store_true", help="장중 분봉 반복 스캔 (intraday.py, 변경된 종목만 재평가)")
+    parser.add_argument("--profile", action="store_true", default=PROFILE, help="cProfile 덤프를 data/scan_reports/ 에 저장")
+    parser.add_argument("--provider", choices=data_provider.PROVIDERS, default=data_provider.DATA_PROVIDER,
+                        help="데이터 공급자 (live / record: 응답 녹화 / replay: 녹화 응답으로 오프라인 실행)")
+    parser.add_argument("--replay-dir", default=data_provider.REPLAY_DIR, help="녹화/재생 저장소 경로")
+    return parser.parse_args()
+
+def finalize(out, date_str, build_bundles=BUILD_BUNDLES, pregenerate=PREGENERATE_ANALYSIS):
+    """
+    포착 결과를 final_result_YYYYMMDD.csv 로 저장하고 매크로 갱신 / AI 일괄 채점 / 컬럼형 결과 / 번들 / 자동 분석 생성을 이어서 수행.
+    조건 계산값(result_table.METRIC_COLUMNS)은 CSV 에서 빼고 컬럼형 파일(.arrow)에만 남깁니다.
+    """
+    out = out.sort_values("최근거래일거래대금(억)", ascending=False).reset_index(drop=True)
+    path = result_table.write_csv(out, date_str, OUT_DIR)
+    print(f"\n[DONE] {len(out)}개 종목 포착 완료: {path}")
+    t = time.time()
+    try:
+        import macro_store
+        macro_store.update()   # 앱/채점이 읽는 매크로 스냅샷 증분 갱신
+    except Exception as e:
+        print(f"[WARN] 매크로 저장소 갱신 실패: {e}")
+    record_stage("macro", len(out), len(out), t)
+    t = time.time()
+    try:
+        # 모델이 있으면 포착 리스트 전체를 일괄 채점해 AI 확률/순위/근거 컬럼 추가
+        import inference
+        scored = inference.score_result(out, date_str)
+        if scored is not None:
+            out = scored
+            result_table.write_csv(out, date_str, OUT_DIR)
+    except Exception as e:
+        print(f"[WARN] AI 일괄 채점 실패 (앱에서 종목별로 계산): {e}")
+    record_stage("score", len(out), len(out), t)
+    try:
+        if result_table.save(out, date_str, OUT_DIR) is None:
+            print("[WARN] pyarrow 가 없어 컬럼형 결과 파일을 건너뜁니다 (앱은 CSV 로 동작)")
+    except Exception as e:
+        print(f"[WARN] 컬럼형 결과 파일 저장 실패 (앱은 CSV 로 동작): {e}")
+    try:
+        import results_index
+        results_index.add(out, date_str)   # 앱 이력 조회 / 학습 종목 선정용 통합 인덱스
+    except Exception as e:
+        print(f"[WARN] 포착 이력 인덱스 갱신 실패: {e}")
+    if build_bundles:
+        t, saved = time.time(), 0
+        try:
+            import bundles
+            saved = bundles.build_all(out, date_str)
+        except Exception as e:
+            print(f"[WARN] 대시보드 번들 생성 실패 (앱은 실시간 조회로 동작): {e}")
+        record_stage("bundles", len(out), saved, t)
+    if pregenerate and client is not None:
+        t, ready = time.time(), 0
+        try:
+            ready = analysis.pregenerate(out, date_str, client)
+        except Exception as e:
+            print(f"[WARN] AI 자동 분석 사전 생성 실패 (앱에서 종목별로 생성): {e}")
+        record_stage("analysis", len(out), ready, t)
+    return out
+
+def main(workers=SCAN_WORKERS, rate=RATE_LIMIT_PER_SEC, use_store=USE_STORE, use_prefilter=USE_PREFILTER,
+         build_bundles=BUILD_BUNDLES, shard=None, use_checkpoint=USE_CHECKPOINT, fresh=False,
+         pregenerate=PREGENERATE_ANALYSIS, timeframe="day", use_state=USE_INDICATOR_STATE):
+    """
+    shard=(i, N) 이면 리스트의 i 번째 조각만 스캔해 outputs/shards/YYYYMMDD/ 에 저장하고
+    최종 CSV / 채점 / 번들은 merge_main 에서 한 번만 만듭니다.
+    timeframe 이 day 가 아니면 해당 주기 프로파일로 스캔해 final_result_YYYYMMDD_<주기>.csv 만 씁니다
+    (AI 채점/번들/분석은 일봉 모델 기준이라 생략, 샤딩 미지원).
+    """
     start_time = time.time()
-    listing = get_listing()
-    print(f"[INFO] 대상 종목 수: {len(listing)} | 스캔 시작...")
-
-    results = []
-    for i, row in listing.iterrows():
-        code, name, market = row["Code"], row["Name"], row["Market"]
-        df = get_ohlcv_retry(code, FULL_COUNT, RETRY_FULL)
-        
-        if df is not None and check_all_conditions(df):
-            turnover20 = to_eok((df.tail(20)["Close"] * df.tail(20)["Volume"]).max())
-            last_turnover = to_eok(df.iloc[-1]["Close"] * df.iloc[-1]["Volume"])
-            
-            results.append({
-                "종목코드": code, "종목명": name, "시장": market,
-                "최근20일최대거래대금(억)": turnover20,
-                "최근거래일거래대금(억)": last_turnover
-            })
-
-        if (i + 1) % 100 == 0:
-            print(f"[PROGRESS] {i+1}/{len(listing)} 완료 | 포착: {len(results)}개")
-        time.sleep(random.uniform(SLEEP_MIN, SLEEP_MAX))
-
-    if results:
-        out = pd.DataFrame(results).sort_values("최근거래일거래대금(억)", ascending=False).reset_index(drop=True)
-        path = os.path.join(OUT_DIR, f"final_result_{today_yyyymmdd()}.csv")
-        out.to_csv(path, index=False, encoding="utf-8-sig")
-        print(f"\n[DONE] {len(out)}개 종목 포착 완료: {path}")
+    profile = TIMEFRAME_PROFILES[timeframe]
+    if timeframe != "day":
+        use_store, shard, use_state = False, None, False
+    date_str = today_yyyymmdd()
+    run_key = date_str if timeframe == "day" else f"{date_str}_{timeframe}"
+    listing = scan_checkpoint.select_shard(get_listing(), shard)
+    tag = scan_checkpoint.shard_tag(shard)
+    print(f"[INFO] 대상 종목 수: {len(listing)}{f' ({tag})' if shard else ''} | 스캔 시작... (워커 {workers}개, 공급자 {data_provider.get().name})")
+
+    checkpoint = None
+    if use_checkpoint:
+        checkpoint = scan_checkpoint.Checkpoint(run_key, shard, fresh=fresh)
+        n_pre, n_full = checkpoint.resumed_counts()
+        if n_pre or n_full:
+            print(f"[INFO] 체크포인트에서 재개: 사전필터 {n_pre}개 | 전체 수집 {n_full}개 ({checkpoint.dir})")
+
+    results = scan_listing(listing, workers=workers, rate=rate, use_store=use_store, use_prefilter=use_prefilter,
+                           checkpoint=checkpoint, profile=profile, use_state=use_state)
+    if use_store:
+        print(f"[INFO] 일봉 저장소: 증분 {store_stats.get('hit', 0)} | 전체 {store_stats.get('full', 0)} | 복구 {store_stats.get('repair', 0)}")
+    if use_state:
+        print(f"[INFO] 지표 상태: 증분 {state_stats.get('hit', 0)} | 변경 없음 {state_stats.get('same', 0)} | 신규 {state_stats.get('full', 0)} "
+              f"| 복구 {state_stats.get('repair', 0)} | 검증 {state_stats.get('verify', 0)} (불일치 {state_stats.get('drift', 0)})")
+
+    if shard:
+        path = scan_checkpoint.save_shard_result(results, RESULT_COLUMNS + result_table.METRIC_COLUMNS, date_str, shard)
+        print(f"\n[DONE] {tag}: {len(results)}개 종목 포착 | {path} (병합: python scanner.py --merge)")
+    elif timeframe != "day":
+        path = os.path.join(OUT_DIR, f"final_result_{run_key}.csv")
+        pd.DataFrame(results, columns=RESULT_COLUMNS).to_csv(path, index=False, encoding="utf-8-sig")
+        print(f"\n[DONE] {timeframe} 프로파일 {len(results)}개 종목 포착: {path}")
+    elif results:
+        finalize(pd.DataFrame(results, columns=RESULT_COLUMNS + result_table.METRIC_COLUMNS), date_str, build_bundles, pregenerate)
     else:
         print("\n[RESULT] 포착된 종목이 없습니다.")
-    
+
+    json_path, _ = recorder.write(OUT_DIR, f"{run_key}_{tag}" if shard else run_key, stage_stats, condition_stats, extra={
+        "timeframe": timeframe, "workers": workers, "rate": rate, "use_store": use_store, "use_prefilter": use_prefilter, "shard": tag or None,
+        "listing": len(listing), "results": len(results), "store": dict(store_stats), "indicator_state": dict(state_stats),
+        "http": http.metrics(), "provider": data_provider.get().metrics()})
+    if checkpoint is not None:
+        checkpoint.clear()   # 결과가 저장됐으므로 다음 실행은 처음부터
+    print(f"[INFO] 실행 리포트: {json_path}")
     print(f"[INFO] 소요 시간: {round((time.time() - start_time)/60, 1)}분")
 
+def merge_main(date_str=None, build_bundles=BUILD_BUNDLES, pregenerate=PREGENERATE_ANALYSIS):
+    """outputs/shards/YYYYMMDD/ 의 조각 결과를 합쳐 final_result_YYYYMMDD.csv 를 만들고 후처리를 수행"""
+    date_str = date_str or today_yyyymmdd()
+    stage_stats.clear()
+    merged, missing = scan_checkpoint.merge_shards(date_str)
+    if merged is None:
+        print(f"[WARN] 병합할 조각 결과가 없습니다: {scan_checkpoint.SHARD_DIR}/{date_str}")
+        return None
+    if missing:
+        print(f"[WARN] 누락된 샤드 {missing} 를 제외하고 병합합니다 (해당 조각을 --shard 로 다시 실행하세요)")
+    if merged.empty:
+        print("\n[RESULT] 포착된 종목이 없습니다.")
+        return merged
+    return finalize(merged, date_str, build_bundles, pregenerate)
+
+def run_profiled(**kwargs):
+    """cProfile 로 main 을 실행해 data/scan_reports/scan_profile_YYYYMMDD.prof 를 남기고 누적 시간 상위 함수를 출력"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        main(**kwargs)
+    finally:
+        profiler.disable()
+        os.makedirs(scan_report.DETAIL_DIR, exist_ok=True)
+        path = os.path.join(scan_report.DETAIL_DIR, f"scan_profile_{today_yyyymmdd()}.prof")
+        profiler.dump_stats(path)
+        print(f"[INFO] 프로파일 저장: {path} (python -m pstats {path})")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(PROFILE_TOP)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    data_provider.use(data_provider.make(args.provider, args.replay_dir))
+    kwargs = dict(workers=args.workers, rate=args.rate, use_store=not args.no_store,
+                  use_prefilter=not args.no_prefilter, build_bundles=not args.no_bundles,
+                  shard=scan_checkpoint.parse_shard(args.shard) if args.shard else None,
+                  use_checkpoint=not args.no_checkpoint, fresh=args.fresh, pregenerate=not args.no_analysis,
+                  timeframe=args.timeframe, use_state=args.indicator_state)
+    if args.intraday:
+        import intraday
+        intraday.run(workers=args.workers, rate=args.rate, timeframe=args.timeframe if args.timeframe != "day" else "minute")
+    elif args.merge:
+        merge_main(args.date, build_bundles=not args.no_bundles, pregenerate=not args.no_analysis)
+    elif args.profile:
+        run_profiled(**kwargs)
+    else:
+        main(**kwargs)
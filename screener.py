@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+종목 x 일자 2차원 배열 기반 일괄 스크리너
+
+scanner.check_all_conditions 의 A~F 조건을 전 종목에 대해 한 번에 평가합니다.
+각 종목의 봉은 오른쪽(최근) 정렬로 채우고 모자란 앞부분은 NaN으로 둡니다.
+조건식은 모두 마지막 봉 기준의 위치(tail) 연산이므로 종목별 함수와 결과가 같습니다.
+이평선/신고가 기간은 봉 개수로 params 에 들어 있어 일봉 외 주봉/분봉 프로파일도 같은 함수로 평가합니다
+(scanner.TIMEFRAME_PROFILES). screen_metrics 는 봉 배열 대신 종목별 증분 지표 상태(indicator_state)로
+같은 조건을 평가합니다 (scanner --indicator-state).
+"""
+import time
+import numpy as np
+
+def build_panel(frames, width):
+    """
+    frames: OHLCV DataFrame(또는 None) 리스트 -> 종목 x 일자 배열 묶음
+    반환: {"Close","High","Low","Volume": (n, width) float64 배열, "length": 실제 봉 수}
+    """
+    n = len(frames)
+    panel = {k: np.full((n, width), np.nan) for k in ("Close", "High", "Low", "Volume")}
+    length = np.zeros(n, dtype=np.int64)
+    for i, df in enumerate(frames):
+        if df is None or df.empty:
+            continue
+        m = min(len(df), width)
+        length[i] = m
+        for k in ("Close", "High", "Low", "Volume"):
+            panel[k][i, width - m:] = df[k].to_numpy()[-m:]
+    panel["length"] = length
+    return panel
+
+def _mean_at(arr, n, end):
+    """end 위치(음수 인덱스, -1=마지막 봉)에서 끝나는 n일 단순이동평균"""
+    stop = arr.shape[1] + end + 1
+    return arr[:, stop - n:stop].mean(axis=1)
+
+def _midpoint(high, low, n):
+    return (high[:, -n:].max(axis=1) + low[:, -n:].min(axis=1)) / 2
+
+def vol_spike_mask(volume, lookback, threshold):
+    rv = volume[:, -(lookback + 2):]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r1 = rv[:, 2:] / rv[:, 1:-1]
+        r2 = rv[:, 2:] / rv[:, :-2]
+    return ((r1 >= threshold) | (r2 >= threshold)).any(axis=1)
+
+def turnover_mask(close, volume, params):
+    """A) 거래대금 조건: 최근 lookback 봉 최대 거래대금과 마지막 봉 거래대금 (봉이 모자란 칸은 무시)"""
+    n = params["lookback"]
+    turnover = np.nan_to_num(close[:, -n:] * volume[:, -n:], nan=-np.inf)
+    return (turnover.max(axis=1) >= params["turnover_max_20"]) & (turnover[:, -1] >= params["last_turnover"])
+
+def _record(stats, name, before, ok, started):
+    if stats is not None:
+        stats.append({"condition": name, "in": int(before), "out": int(ok.sum()),
+                      "ms": round((time.perf_counter() - started) * 1000, 3)})
+
+def screen_panel(panel, params, stats=None):
+    """
+    params: scanner.CONDITION_PARAMS 형식의 조건 파라미터 (ma_align / slope_windows / high_window 는 봉 개수)
+    stats: 리스트를 넘기면 조건(A~F)별 입력/통과 종목 수와 소요 시간(ms)을 추가
+    반환: 종목별 통과 여부 bool 배열 (check_all_conditions 와 동일)
+    """
+    c, h, l, v = panel["Close"], panel["High"], panel["Low"], panel["Volume"]
+    width = c.shape[1]
+    lb = params["slope_lookback"]
+    short, mid, long_ = params["ma_align"]
+    slow, slower = params["slope_windows"]
+    need = max(params["min_bars"], slower + lb, params["kijun"], params["high_window"])
+    mask = panel["length"] >= params["min_bars"]
+    if width < need or not mask.any():
+        return np.zeros(len(mask), dtype=bool)
+
+    # 조건을 통과한 종목만 남겨가며 평가 (뒤 조건일수록 대상이 줄어듦)
+    idx = np.flatnonzero(mask)
+    c, h, l, v = c[idx], h[idx], l[idx], v[idx]
+
+    # A) 거래대금
+    t = time.perf_counter()
+    ok = turnover_mask(c, v, params)
+    _record(stats, "A_turnover", len(idx), ok, t)
+
+    # B) 거래량 스파이크
+    t, before = time.perf_counter(), ok.sum()
+    ok &= vol_spike_mask(v, params["lookback"], params["vol_ratio"])
+    _record(stats, "B_vol_spike", before, ok, t)
+
+    # C) 이평선 정배열 & 종가 위치
+    t, before = time.perf_counter(), ok.sum()
+    last = c[:, -1]
+    ma_s, ma_m, ma_l = _mean_at(c, short, -1), _mean_at(c, mid, -1), _mean_at(c, long_, -1)
+    ok &= (ma_s > ma_m) & (ma_m > ma_l) & (last > ma_s)
+    _record(stats, "C_ma_align", before, ok, t)
+
+    # D) 장기선 기울기
+    t, before = time.perf_counter(), ok.sum()
+    ok &= (_mean_at(c, slow, -1) > _mean_at(c, slow, -(lb + 1))) & (_mean_at(c, slower, -1) > _mean_at(c, slower, -(lb + 1)))
+    _record(stats, "D_long_slope", before, ok, t)
+
+    # E) 120일 신고가 근접 (최근 lookback 봉 최고 종가 = high_window 봉 최고 종가)
+    t, before = time.perf_counter(), ok.sum()
+    ok &= c[:, -params["lookback"]:].max(axis=1) >= c[:, -params["high_window"]:].max(axis=1)
+    _record(stats, "E_high_120", before, ok, t)
+
+    # F) 일목균형표 조건
+    t, before = time.perf_counter(), ok.sum()
+    tenkan = _midpoint(h, l, params["tenkan"])
+    kijun = _midpoint(h, l, params["kijun"])
+    ok &= ~np.isnan(tenkan) & ~np.isnan(kijun) & (tenkan > kijun) & (last > tenkan)
+    _record(stats, "F_ichimoku", before, ok, t)
+
+    mask[idx] = ok
+    return mask
+
+def screen_metrics(m, params, stats=None):
+    """
+    종목별 증분 지표 상태(indicator_state.metric_arrays)로 A~F 조건을 평가합니다.
+    봉 배열 없이 종목당 지표 값 몇 개만 비교하므로 비용이 이평선 / 신고가 기간 길이와 무관하며,
+    결과는 같은 봉으로 만든 패널의 screen_panel 과 같습니다.
+    """
+    mask = m["length"] >= params["min_bars"]
+    last = m["close"]
+
+    # A) 거래대금
+    t, before = time.perf_counter(), mask.sum()
+    mask &= (m["turnover_max"] >= params["turnover_max_20"]) & (m["last_turnover"] >= params["last_turnover"])
+    _record(stats, "A_turnover", before, mask, t)
+
+    # B) 거래량 스파이크
+    t, before = time.perf_counter(), mask.sum()
+    mask &= m["spikes"] > 0
+    _record(stats, "B_vol_spike", before, mask, t)
+
+    # C) 이평선 정배열 & 종가 위치
+    t, before = time.perf_counter(), mask.sum()
+    mask &= (m["ma_short"] > m["ma_mid"]) & (m["ma_mid"] > m["ma_long"]) & (last > m["ma_short"])
+    _record(stats, "C_ma_align", before, mask, t)
+
+    # D) 장기선 기울기
+    t, before = time.perf_counter(), mask.sum()
+    mask &= (m["slow"] > m["slow_prev"]) & (m["slower"] > m["slower_prev"])
+    _record(stats, "D_long_slope", before, mask, t)
+
+    # E) 120일 신고가 근접
+    t, before = time.perf_counter(), mask.sum()
+    mask &= m["recent_high"] >= m["window_high"]
+    _record(stats, "E_high_120", before, mask, t)
+
+    # F) 일목균형표 조건
+    t, before = time.perf_counter(), mask.sum()
+    tenkan, kijun = m["tenkan"], m["kijun"]
+    mask &= ~np.isnan(tenkan) & ~np.isnan(kijun) & (tenkan > kijun) & (last > tenkan)
+    _record(stats, "F_ichimoku", before, mask, t)
+    return mask
+
+def condition_values(panel, params):
+    """
+    포착 종목 결과에 함께 남길 마지막 봉 기준 조건 계산값 (봉이 모자란 값은 NaN).
+    MA<n>: 조건에 쓰는 이평선, 거래량배수: 최근 lookback 봉의 직전 1~2봉 대비 최대 거래량 배수,
+    전환선 / 기준선: 일목균형표, 신고가기준종가: high_window 봉 최고 종가
+    """
+    c, h, l, v = panel["Close"], panel["High"], panel["Low"], panel["Volume"]
+    windows = sorted(set(params["ma_align"]) | set(params["slope_windows"]))
+    out = {f"MA{n}": _mean_at(c, n, -1) if c.shape[1] >= n else np.full(len(c), np.nan) for n in windows}
+    rv = v[:, -(params["lookback"] + 2):]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.fmax(rv[:, 2:] / rv[:, 1:-1], rv[:, 2:] / rv[:, :-2])
+    ratio = np.where(np.isnan(ratio), -np.inf, ratio).max(axis=1) if ratio.shape[1] else np.full(len(c), -np.inf)
+    out["거래량배수"] = np.where(np.isneginf(ratio), np.nan, ratio)
+    out["전환선"] = _midpoint(h, l, params["tenkan"])
+    out["기준선"] = _midpoint(h, l, params["kijun"])
+    out["신고가기준종가"] = c[:, -params["high_window"]:].max(axis=1)
+    return out
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""로컬 Groq chat completions 스텁 서버로 자동 분석 캐시 적중/미스와 스트리밍 조립 확인"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("groq")
+import analysis
+
+TOKENS = ["삼성전자는 ", "20일선 ", "돌파 후 ", "거래량이 ", "늘었습니다."]
+
+class GroqStub(BaseHTTPRequestHandler):
+    prompts = []
+    delay = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        GroqStub.prompts.append(body["messages"][-1]["content"])
+        assert body["stream"] is True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i, token in enumerate(TOKENS + [None]):
+            chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                     "choices": [{"index": 0, "delta": {"content": token} if token else {},
+                                  "finish_reason": None if token else "stop"}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def client():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GroqStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    GroqStub.prompts, GroqStub.delay = [], 0.0
+    yield analysis.make_client("stub-key", f"http://127.0.0.1:{server.server_address[1]}")
+    server.shutdown()
+
+def test_stream_chat_yields_tokens_in_order(client):
+    assert list(analysis.stream_chat(client, [{"role": "user", "content": "질문"}])) == TOKENS
+    assert GroqStub.prompts == ["질문"]
+
+def test_cache_miss_streams_then_hit_skips_request(client, tmp_path):
+    prompt = analysis.auto_prompt("삼성전자", "2026-04-03")
+    assert analysis.load_cached("005930", "20260403", prompt, cache_dir=tmp_path) is None
+
+    job = analysis.submit(client, "005930", "20260403", prompt, cache_dir=tmp_path)
+    assert list(job.stream(poll=0.01)) == TOKENS
+    assert job.text == "".join(TOKENS) and job.error is None
+    assert analysis.load_cached("005930", "20260403", prompt, cache_dir=tmp_path) == job.text
+
+    hit = analysis.submit(client, "005930", "20260403", prompt, cache_dir=tmp_path)
+    assert hit.done.is_set() and list(hit.stream()) == ["".join(TOKENS)]
+    assert len(GroqStub.prompts) == 1
+    # 다른 포착일 / TTL 만료는 미스
+    assert analysis.load_cached("005930", "20260402", prompt, cache_dir=tmp_path) is None
+    assert analysis.load_cached("005930", "20260403", prompt, ttl_hours=0, cache_dir=tmp_path) is None
+
+def test_concurrent_submits_share_one_generation(client, tmp_path):
+    GroqStub.delay = 0.05
+    first = analysis.submit(client, "000660", "20260403", "질문", cache_dir=tmp_path)
+    second = analysis.submit(client, "000660", "20260403", "질문", cache_dir=tmp_path)
+    assert first is second
+    assert "".join(second.stream(poll=0.01)) == "".join(TOKENS)
+    assert GroqStub.prompts == ["질문"]
+
+def test_pregenerate_skips_cached_codes(client, tmp_path):
+    result = pd.DataFrame({"종목코드": ["005930", "660"], "종목명": ["삼성전자", "SK하이닉스"]})
+    analysis.save_cached("005930", "20260403", analysis.auto_prompt("삼성전자", "2026-04-03"), "저장된 분석",
+                         cache_dir=tmp_path)
+    assert analysis.pregenerate(result, "20260403", client, cache_dir=tmp_path) == 2
+    assert GroqStub.prompts == [analysis.auto_prompt("SK하이닉스", "2026-04-03")]
+    cached = analysis.load_cached("000660", "20260403", GroqStub.prompts[0], cache_dir=tmp_path)
+    assert cached == "".join(TOKENS)
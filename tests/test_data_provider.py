@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""녹화 → 재생 왕복 스캔 결과 동일성과 녹화보다 긴 봉 요청의 ReplayMiss 확인 (네트워크 없음)"""
+from datetime import datetime
+
+import pytest
+
+import data_provider
+import scanner
+from data_provider import RecordingProvider, ReplayMiss, ReplayProvider
+from test_scanner_parallel import scan_csv, sise_xml
+
+RECORDED_AT = datetime(2026, 10, 16, 18, 30)
+
+class FakeLive(data_provider.LiveProvider):
+    """고정 시각 / 고정 난수 일봉을 돌려주는 live 공급자 (bars: 종목별 상장 후 봉 수 상한)"""
+
+    def __init__(self, bars=None):
+        self.calls = 0
+        self.bars = bars or {}
+
+    def now(self):
+        return RECORDED_AT
+
+    def ohlcv_xml(self, code, count, timeframe="day", policy=None, throttle=None):
+        self.calls += 1
+        return sise_xml(code, min(int(count), self.bars.get(code, int(count))))
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(scanner, "SLEEP_MIN", 0.0)
+    monkeypatch.setattr(scanner, "SLEEP_MAX", 0.0)
+    previous = data_provider.get()
+    yield data_provider.use
+    data_provider.use(previous)
+
+def test_record_then_replay_writes_same_csv(provider, tmp_path):
+    live = FakeLive()
+    provider(RecordingProvider(live, str(tmp_path)))
+    recorded = scan_csv(workers=4, rate=1000)
+    assert live.calls > 0 and len(recorded.splitlines()) > 1
+
+    replay = ReplayProvider(str(tmp_path))
+    provider(replay)
+    assert data_provider.now() == RECORDED_AT
+    assert scan_csv(workers=1, rate=scanner.RATE_LIMIT_PER_SEC) == recorded
+    assert scan_csv(workers=8, rate=1000) == recorded
+    assert replay.counts["misses"] == 0 and replay.counts["hits"] > 0
+
+def test_shorter_recording_raises_replay_miss(provider, tmp_path):
+    recorder = RecordingProvider(FakeLive(bars={"000777": 10}), str(tmp_path))
+    full = recorder.ohlcv_xml("000001", 30)
+    recorder.ohlcv_xml("000001", 20)                # 더 짧은 요청은 기존 녹화를 덮어쓰지 않음
+    recorder.ohlcv_xml("000777", 30)                # 상장 후 10봉뿐인 종목
+    replay = ReplayProvider(str(tmp_path))
+
+    with pytest.raises(ReplayMiss):
+        replay.ohlcv_xml("000001", 31)
+    with pytest.raises(ReplayMiss):
+        replay.ohlcv_xml("000002", 5)
+    assert replay.ohlcv_xml("000001", 30) == full
+    tail = scanner.parse_sise_xml(replay.ohlcv_xml("000001", 12))
+    assert tail.equals(scanner.parse_sise_xml(full).iloc[-12:])
+    # 녹화 응답이 요청 수보다 짧게 왔던 종목은 그게 전부이므로 더 긴 요청도 그대로 제공
+    assert len(scanner.parse_sise_xml(replay.ohlcv_xml("000777", 300))) == 10
+    assert replay.counts == {"hits": 3, "misses": 2}
+
+    provider(replay)
+    df, status = scanner.fetch_ohlcv("000001", 60)
+    assert df is None and status == "ReplayMiss"
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+피처 엔진 정합성: tests/fixtures 의 일봉 입력으로 계산한 STOCK_FEATURES 를 저장된 기대값과 비교합니다.
+기대값은 pandas_ta 없이도 검증되도록 pandas_ta 기본값 정의를 pandas rolling/ewm 으로 옮긴
+expected_features() 로 만들어 저장해 두었습니다. (피처 계산식이 바뀌면 다시 생성)
+
+    python tests/test_features.py          # 픽스처 재생성
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import features
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+INPUT_PATH = os.path.join(FIXTURES, "features_input.csv")
+EXPECTED_PATH = os.path.join(FIXTURES, "features_expected.csv")
+
+def load_input():
+    raw = pd.read_csv(INPUT_PATH, dtype={"ticker": str}, parse_dates=["Date"])
+    frames, markets = [], []
+    for _, g in raw.groupby("ticker", sort=True):
+        g = g.set_index("Date")
+        frames.append(g[features.OHLCV])
+        markets.append(g["market_close"])
+    return frames, markets
+
+def test_stock_features_match_stored_expected():
+    frames, markets = load_input()
+    expected = pd.read_csv(EXPECTED_PATH, dtype={"ticker": str}, parse_dates=["Date"])
+    out = features.extract_features(frames, markets, dropna=False)
+    assert len(out) == expected["ticker"].nunique() == 2
+    for df, (ticker, exp) in zip(out, expected.groupby("ticker", sort=True)):
+        exp = exp.set_index("Date")[features.STOCK_FEATURES]
+        exp.index.name = None
+        got = df[features.STOCK_FEATURES]
+        got.index.name = None
+        pd.testing.assert_frame_equal(got, exp, check_dtype=False, rtol=1e-9, atol=1e-9, obj=ticker)
+        # 지표 준비 기간(60일 이평) 이후에는 결측이 없어야 학습 행으로 쓰임
+        assert not got.iloc[60:].isna().any().any()
+
+# =========================
+# 기대값 생성 (pandas_ta 기본값 정의를 pandas 로 옮긴 구현)
+# =========================
+def _rma(s, n):
+    return s.ewm(alpha=1.0 / n, min_periods=n).mean()
+
+def _ema(s, n):
+    """첫 유효값부터 n개 SMA 시드 후 adjust=False"""
+    s = s.loc[s.first_valid_index():].copy()
+    seed = s.iloc[:n].mean()
+    s.iloc[:n - 1] = np.nan
+    s.iloc[n - 1] = seed
+    return s.ewm(span=n, adjust=False).mean()
+
+def _nonzero(s):
+    return s.where(s != 0, np.finfo(float).eps)
+
+def expected_features(df, market_close):
+    df = df.join(market_close.rename("market_close"), how="left").ffill()
+    c, h, l, o, v = df["Close"], df["High"], df["Low"], df["Open"], df["Volume"]
+    out = pd.DataFrame(index=df.index)
+    delta = c.diff()
+    out["rsi"] = 100 * _rma(delta.clip(lower=0), 14) / (_rma(delta.clip(lower=0), 14) + _rma(-delta.clip(upper=0), 14))
+    mid, band = c.rolling(20).mean(), 2 * c.rolling(20).std(ddof=0)
+    out["bb_per"] = (c - (mid - band)) / ((mid + band) - (mid - band))
+    out["ma_diff"] = (c.rolling(5).mean() - mid) / (mid + features.EPS)
+    up = (v > v.shift(1)).astype(int)
+    out["vol_consecutive_days"] = up.groupby((up != up.shift()).cumsum()).cumsum()
+    out["vol_spike_ratio"] = v / (v.rolling(20).mean() + features.EPS)
+    out["candle_body"] = (c - o) / (h - l + features.EPS)
+    out["relative_strength"] = c.pct_change(5) - df["market_close"].pct_change(5)
+    macd = _ema(c, 12) - _ema(c, 26)
+    out["macd_hist"] = macd - _ema(macd, 9)
+    tp = (h + l + c) / 3
+    flow, tp_diff = tp * v, tp.diff()
+    pos = flow.where(tp_diff > 0, 0.0).rolling(14).sum()
+    neg = flow.where(tp_diff < 0, 0.0).rolling(14).sum()
+    out["mfi"] = 100 * pos / (pos + neg)
+    prev = c.shift(1)
+    tr = pd.concat([_nonzero(h - l), h - prev, prev - l], axis=1).abs().max(axis=1)
+    tr.iloc[0] = np.nan
+    out["atr_ratio"] = _rma(tr, 14) / (c + features.EPS)
+    lowest, highest = l.rolling(14).min(), h.rolling(14).max()
+    stoch = 100 * (c - lowest) / _nonzero(highest - lowest)
+    out["stoch_k"] = stoch.loc[stoch.first_valid_index():].rolling(3).mean()
+    out["disparity_60"] = (c / (c.rolling(60).mean() + features.EPS)) * 100
+    out["price_range"] = (h - l) / (c + features.EPS)
+    out["vol_roc"] = 100 * v.diff(5) / v.shift(5)
+    out["range_roc"] = 100 * out["price_range"].diff(5) / out["price_range"].shift(5)
+    out["day_of_week"] = df.index.dayofweek
+    return out[features.STOCK_FEATURES].ffill()
+
+def make_input():
+    """종목 2개(봉 수가 다름), 고가=저가 인 날과 거래량 연속 증가 구간 포함"""
+    rng = np.random.default_rng(20260403)
+    market = pd.Series(2500 * np.exp(np.cumsum(rng.normal(0, 0.01, 200))),
+                       index=pd.bdate_range("2025-06-02", periods=200))
+    rows = []
+    for ticker, n, base in [("005930", 180, 58000), ("091990", 140, 41000)]:
+        idx = market.index[-n:]
+        close = np.round(base * np.exp(np.cumsum(rng.normal(0, 0.02, n))), -1)
+        open_ = np.round(close * (1 + rng.normal(0, 0.01, n)), -1)
+        high = np.maximum(open_, close) + np.round(rng.uniform(0, 0.02, n) * close, -1)
+        low = np.minimum(open_, close) - np.round(rng.uniform(0, 0.02, n) * close, -1)
+        volume = rng.integers(100_000, 5_000_000, n).astype(float)
+        open_[70] = high[70] = low[70] = close[70]            # 상·하한가 등 가격 변동 없는 날
+        volume[90:96] = np.linspace(1_000_000, 6_000_000, 6)  # 거래량 6일 연속 증가
+        rows.append(pd.DataFrame({"Date": idx, "ticker": ticker, "Open": open_, "High": high, "Low": low,
+                                  "Close": close, "Volume": volume, "market_close": market.loc[idx].round(2).to_numpy()}))
+    return pd.concat(rows, ignore_index=True)
+
+if __name__ == "__main__":
+    os.makedirs(FIXTURES, exist_ok=True)
+    make_input().to_csv(INPUT_PATH, index=False)
+    frames, markets = load_input()
+    tickers = sorted(pd.read_csv(INPUT_PATH, dtype={"ticker": str})["ticker"].unique())
+    expected = [expected_features(df, m).assign(ticker=t) for df, m, t in zip(frames, markets, tickers)]
+    out = pd.concat(expected).rename_axis("Date").reset_index()
+    out[["Date", "ticker"] + features.STOCK_FEATURES].to_csv(EXPECTED_PATH, index=False, float_format="%.17g")
+    print(f"✅ {INPUT_PATH}, {EXPECTED_PATH}")
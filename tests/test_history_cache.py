@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""yfinance 일봉 캐시 증분 갱신 (수정주가 반영 시 전체 재수집)"""
+import numpy as np
+import pandas as pd
+
+import history_cache
+
+DAYS = pd.bdate_range("2025-01-01", "2025-12-31")
+
+def make_prices(seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(DAYS))))
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": rng.integers(1_000, 10_000, len(DAYS)).astype(float)}, index=DAYS)
+
+class Source:
+    """yf.download 형태의 스텁. truth 를 바꿔 수정주가 반영을 흉내 내고 요청을 기록"""
+    def __init__(self):
+        self.truth = {"AAA.KS": make_prices(1), "BBB.KS": make_prices(2)}
+        self.calls = []
+
+    def __call__(self, tickers, start=None, end=None, **kwargs):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        self.calls.append((tuple(tickers), start))
+        return pd.concat({t: df[(df.index >= start) & (df.index < end)] for t, df in self.truth.items() if t in tickers},
+                         axis=1)
+
+def expected(source, ticker, start, end):
+    df = source.truth[ticker]
+    return df[(df.index >= start) & (df.index < end)]
+
+def test_incremental_update_appends_tail(tmp_path):
+    source = Source()
+    start, mid, end = pd.Timestamp("2025-03-03"), pd.Timestamp("2025-09-01"), pd.Timestamp("2025-10-01")
+    history_cache.get_histories(list(source.truth), start, mid, downloader=source, cache_dir=str(tmp_path))
+    source.calls.clear()
+
+    out = history_cache.get_histories(list(source.truth), start, end, downloader=source, cache_dir=str(tmp_path))
+    assert len(source.calls) == 1 and source.calls[0][1] > start   # 최근 봉만 요청
+    for t in source.truth:
+        pd.testing.assert_frame_equal(out[t], expected(source, t, start, end), check_freq=False)
+
+def test_adjusted_history_triggers_full_refetch(tmp_path):
+    source = Source()
+    start, mid, end = pd.Timestamp("2025-03-03"), pd.Timestamp("2025-09-01"), pd.Timestamp("2025-10-01")
+    history_cache.get_histories(list(source.truth), start, mid, downloader=source, cache_dir=str(tmp_path))
+    source.calls.clear()
+
+    # AAA 1:2 액면분할 -> 분할일 이전 가격이 모두 절반으로 수정됨 (겹침 구간 포함)
+    split = pd.Timestamp("2025-09-15")
+    adjusted = source.truth["AAA.KS"].copy()
+    adjusted.loc[adjusted.index < split, ["Open", "High", "Low", "Close"]] /= 2
+    source.truth["AAA.KS"] = adjusted
+
+    out = history_cache.get_histories(list(source.truth), start, end, downloader=source, cache_dir=str(tmp_path))
+    assert source.calls[-1] == (("AAA.KS",), start)   # AAA 만 요청 구간 전체 재수집
+    for t in source.truth:
+        pd.testing.assert_frame_equal(out[t], expected(source, t, start, end), check_freq=False)
+
+    # 저장본도 수정된 가격으로 교체되어 다음 실행은 다시 증분으로 동작
+    source.calls.clear()
+    again = history_cache.get_histories(list(source.truth), start, end + pd.Timedelta(days=14), downloader=source,
+                                        cache_dir=str(tmp_path))
+    assert len(source.calls) == 1 and source.calls[0][1] > start
+    pd.testing.assert_frame_equal(again["AAA.KS"], expected(source, "AAA.KS", start, end + pd.Timedelta(days=14)),
+                                  check_freq=False)
+
+def test_merge_tail_rules():
+    cached = make_prices(3).iloc[:100]
+    tail = make_prices(3).iloc[95:110].copy()
+    tail.iloc[4, tail.columns.get_loc("Close")] += 1.0   # 마지막 겹침 봉(장중 수집분)은 달라도 됨
+    merged = history_cache.merge_tail(cached, tail)
+    assert merged is not None and len(merged) == 110
+    assert merged["Close"].iloc[99] == tail["Close"].iloc[4]
+
+    tail.iloc[0, tail.columns.get_loc("Close")] *= 0.5
+    assert history_cache.merge_tail(cached, tail) is None
+    assert history_cache.merge_tail(cached, make_prices(3).iloc[105:110]) is None   # 겹침 없음 (공백)
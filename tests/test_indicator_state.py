@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""증분 지표 상태를 하루씩 30일 진행시키며 매일 screen_panel 과 같은 포착 결과인지, 검증/재생성 경로 확인"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicator_state
+import scanner
+import screener
+
+PARAMS = scanner.CONDITION_PARAMS
+WIDTH = scanner.FULL_COUNT
+DAYS = 30
+
+def synthetic_history(n_codes, n_bars, seed=7):
+    """상승/횡보/하락 추세 + 간헐적 거래량 급증 일봉 (정수 가격)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2026-04-03", periods=n_bars)
+    frames = []
+    for _ in range(n_codes):
+        drift = rng.choice([-0.002, 0.0, 0.004])
+        close = np.maximum((np.cumprod(1 + rng.normal(drift, 0.02, n_bars)) * rng.uniform(2e3, 2e5)).astype(np.int64), 1)
+        spread = np.maximum((close * rng.uniform(0, 0.03, n_bars)).astype(np.int64), 1)
+        volume = rng.integers(5e4, 5e6, n_bars) * np.where(rng.random(n_bars) < 0.05, rng.integers(3, 12, n_bars), 1)
+        frames.append(pd.DataFrame({"Open": close, "High": close + spread, "Low": np.maximum(close - spread, 1),
+                                    "Close": close, "Volume": volume}, index=pd.DatetimeIndex(dates, name="Date")))
+    return frames
+
+def window(frames, day):
+    """day 일째 스캔이 받는 최근 WIDTH 봉"""
+    return [df.iloc[day:day + WIDTH] for df in frames]
+
+def test_daily_advance_matches_screen_panel(tmp_path, monkeypatch):
+    monkeypatch.setattr(indicator_state, "VERIFY_EVERY", 7)   # 30일 안에 종목마다 검증 경로를 여러 번 지나도록
+    frames = synthetic_history(80, WIDTH + DAYS)
+    codes = [f"{i:06d}" for i in range(len(frames))]
+    path = str(tmp_path / "indicator_state.pkl")
+    stats, hits = {}, 0
+    for day in range(DAYS + 1):
+        today = window(frames, day)
+        states = indicator_state.advance_all(codes, today, PARAMS, stats, path=path)
+        mask = screener.screen_metrics(indicator_state.metric_arrays(states), PARAMS)
+        ref = screener.screen_panel(screener.build_panel(today, WIDTH), PARAMS)
+        assert (mask == ref).all(), f"{day}일째 포착 결과가 screen_panel 과 다름"
+        hits += int(ref.sum())
+    assert hits > 0   # 포착 종목이 있어야 비교가 의미 있음
+    assert stats["full"] == len(codes) and stats["hit"] == len(codes) * DAYS
+    assert stats.get("verify", 0) >= len(codes) * (DAYS // 7 - 1)
+    assert "drift" not in stats and "repair" not in stats
+
+def test_nan_in_last_bar_is_not_treated_as_changed(tmp_path):
+    frames = synthetic_history(3, WIDTH + 2, seed=11)
+    for df in frames:
+        df["Volume"] = df["Volume"].astype(float)
+        df.iloc[WIDTH - 1, df.columns.get_loc("Volume")] = np.nan   # 저장될 마지막 봉의 거래량 결측
+    codes = ["000001", "000002", "000003"]
+    path, stats = str(tmp_path / "indicator_state.pkl"), {}
+    indicator_state.advance_all(codes, window(frames, 0), PARAMS, stats, path=path)
+    indicator_state.advance_all(codes, window(frames, 1), PARAMS, stats, path=path)
+    indicator_state.advance_all(codes, window(frames, 1), PARAMS, stats, path=path)
+    assert stats == {"full": 3, "hit": 3, "same": 3}
+
+def test_adjusted_history_is_rebuilt(tmp_path):
+    frames = synthetic_history(2, WIDTH + 1, seed=3)
+    codes = ["000001", "000002"]
+    path, stats = str(tmp_path / "indicator_state.pkl"), {}
+    indicator_state.advance_all(codes, window(frames, 0), PARAMS, stats, path=path)
+    adjusted = [df.assign(Close=df["Close"] // 2) if i == 0 else df for i, df in enumerate(window(frames, 1))]
+    states = indicator_state.advance_all(codes, adjusted, PARAMS, stats, path=path)
+    assert stats == {"full": 2, "repair": 1, "hit": 1}
+    fresh = indicator_state.from_arrays(*indicator_state.frame_arrays(adjusted[0]), PARAMS)
+    assert indicator_state.same_metrics(states[0], fresh)
+
+@pytest.mark.parametrize("bad", [np.nan, 0.0])
+def test_same_metrics_flags_drift(bad):
+    frames = synthetic_history(1, WIDTH, seed=5)
+    a = indicator_state.from_arrays(*indicator_state.frame_arrays(frames[0]), PARAMS)
+    b = indicator_state.from_arrays(*indicator_state.frame_arrays(frames[0]), PARAMS)
+    assert indicator_state.same_metrics(a, b)
+    b.sums[min(b.sums)] = bad
+    assert not indicator_state.same_metrics(a, b)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""모델 서명은 파일 내용 기준 (수정시각이 다른 체크아웃에서도 번들의 AI 확률을 그대로 사용)"""
+import os
+import shutil
+
+import inference
+
+def test_signature_ignores_mtime_and_tracks_content(tmp_path):
+    built = tmp_path / "runner" / "stock_model.pkl"
+    deployed = tmp_path / "app" / "stock_model.pkl"
+    built.parent.mkdir()
+    deployed.parent.mkdir()
+    built.write_bytes(b"model-v1" * 1000)
+    shutil.copyfile(built, deployed)
+    os.utime(deployed, ns=(1_000_000_000, 1_000_000_000))
+
+    assert inference.model_signature(str(built)) == inference.model_signature(str(deployed))
+    deployed.write_bytes(b"model-v2" * 1000)
+    assert inference.model_signature(str(built)) != inference.model_signature(str(deployed))
+    assert inference.model_signature(str(tmp_path / "missing.pkl")) is None
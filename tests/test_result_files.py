@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""일봉 결과 CSV 와 주기별 결과(final_result_<날짜>_<주기>.csv)가 섞인 outputs/ 처리"""
+import pandas as pd
+import pytest
+
+import backtest
+import bundles
+import inference
+import result_files
+import results_index
+
+DAILY = ["20260402", "20260403"]
+
+@pytest.fixture
+def out_dir(tmp_path):
+    row = {"종목코드": "005930", "종목명": "삼성전자", "시장": "유가", "최근20일최대거래대금(억)": 100, "최근거래일거래대금(억)": 50}
+    for key in DAILY:
+        pd.DataFrame([row]).to_csv(tmp_path / f"final_result_{key}.csv", index=False, encoding="utf-8-sig")
+    # 일봉 결과보다 뒤에 정렬되는 주기별 결과 / 기타 파일
+    for name in ["final_result_20260403_week.csv", "final_result_20260404_minute.csv"]:
+        pd.DataFrame([dict(row, 종목코드="000660")]).to_csv(tmp_path / name, index=False, encoding="utf-8-sig")
+    (tmp_path / "final_result_20260405.arrow").write_bytes(b"")
+    (tmp_path / "intraday_20260404_minute.csv").write_text("포착시각\n", encoding="utf-8")
+    return tmp_path
+
+def test_result_dates_only_daily(out_dir):
+    assert result_files.result_dates(str(out_dir)) == DAILY
+    assert result_files.latest_result_date(str(out_dir)) == "20260403"
+    assert result_files.result_dates(str(out_dir / "missing")) == []
+
+def test_backtest_load_picks_skips_timeframe_results(out_dir):
+    picks = backtest.load_picks(str(out_dir))
+    assert sorted(picks["date"].dt.strftime("%Y%m%d").unique()) == DAILY
+    assert set(picks["code"]) == {"005930"}
+
+def test_bundles_latest_result_is_daily(out_dir):
+    result, date_key = bundles.latest_result(str(out_dir))
+    assert date_key == "20260403"
+    assert result["종목코드"].tolist() == ["005930"]
+
+def test_score_csv_writes_daily_file_only(out_dir, monkeypatch):
+    seen = []
+    def fake_score(result, date_key, *args, **kwargs):
+        seen.append(date_key)
+        return result.assign(**{"AI확률(%)": 55.0, "AI순위": 1, "AI근거": ""})
+    monkeypatch.setattr(inference, "score_result", fake_score)
+    monkeypatch.chdir(out_dir)   # score_csv 가 갱신하는 포착 이력 인덱스(data/)를 임시 폴더에 둠
+    path = inference.score_csv(out_dir=str(out_dir), model_path=str(out_dir / "model.pkl"))
+    assert seen == ["20260403"]
+    assert path.endswith("final_result_20260403.csv")
+    assert "AI확률(%)" in pd.read_csv(path).columns
+    assert "AI확률(%)" not in pd.read_csv(out_dir / "final_result_20260403_week.csv").columns
+    assert "AI확률(%)" not in pd.read_csv(out_dir / "final_result_20260404_minute.csv").columns
+
+def test_results_index_rebuild_skips_timeframe_results(out_dir):
+    n_days, n_rows = results_index.rebuild(str(out_dir), str(out_dir / "index.npy"))
+    assert (n_days, n_rows) == (2, 2)
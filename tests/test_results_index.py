@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""git pull 뒤 여러 세션 스레드가 동시에 오래된 포착 이력 인덱스를 읽어도 재생성은 한 번, 예외 없음"""
+import os
+import threading
+import time
+
+import pandas as pd
+
+import results_index
+
+def test_concurrent_stale_loads_rebuild_once(tmp_path, monkeypatch):
+    out_dir, path = tmp_path / "outputs", str(tmp_path / "data" / "results_index.npy")
+    out_dir.mkdir()
+    row = {"종목코드": "005930", "종목명": "삼성전자", "시장": "유가", "최근20일최대거래대금(억)": 100}
+    for key in ["20260402", "20260403"]:
+        pd.DataFrame([row]).to_csv(out_dir / f"final_result_{key}.csv", index=False, encoding="utf-8-sig")
+    results_index.rebuild(str(out_dir), path)
+    earlier = os.stat(out_dir).st_mtime_ns - 10**9
+    os.utime(path, ns=(earlier, earlier))   # 인덱스를 만든 뒤 git pull 로 outputs/ 가 바뀐 상태
+    assert results_index.stale(path, str(out_dir))
+
+    rebuild, calls = results_index.rebuild, []
+    def slow_rebuild(*args, **kwargs):
+        calls.append(threading.get_ident())
+        time.sleep(0.05)   # 다른 스레드가 같은 구간에 들어오도록
+        return rebuild(*args, **kwargs)
+    monkeypatch.setattr(results_index, "rebuild", slow_rebuild)
+
+    start, results, errors = threading.Barrier(8), [], []
+    def session():
+        start.wait()
+        try:
+            results.append(len(results_index.load(path, out_dir=str(out_dir))))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=session) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert errors == [] and results == [2] * 8
+    assert len(calls) == 1
+    assert not [f for f in os.listdir(os.path.dirname(path)) if f.endswith(".tmp")]
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""샤드 분할(고정 / 서로소), 샤드 결과 병합(누락 / N 혼재), 잘린 prefilter.jsonl 에서 이어 하기"""
+import pandas as pd
+import pytest
+
+import scan_checkpoint
+from scan_checkpoint import Checkpoint
+
+COLUMNS = ["종목코드", "종목명"]
+
+def make_listing(n=500):
+    codes = [f"{i * 37 + 5:06d}" for i in range(n)]
+    return pd.DataFrame({"Code": codes, "Name": [f"종목{c}" for c in codes], "Market": "유가"})
+
+@pytest.mark.parametrize("n_shards", [1, 3, 8])
+def test_shards_cover_listing_exactly_once(n_shards):
+    listing = make_listing()
+    parts = [scan_checkpoint.select_shard(listing, (i, n_shards)) for i in range(n_shards)]
+    codes = pd.concat([p["Code"] for p in parts])
+    assert sorted(codes) == sorted(listing["Code"]) and codes.is_unique
+    # 리스트 순서가 바뀌어도 같은 종목은 같은 샤드, 샤드 안에서는 원래 순서 유지
+    shuffled = listing.sample(frac=1, random_state=0).reset_index(drop=True)
+    for i, part in enumerate(parts):
+        assert set(scan_checkpoint.select_shard(shuffled, (i, n_shards))["Code"]) == set(part["Code"])
+        assert part["Code"].tolist() == [c for c in listing["Code"] if c in set(part["Code"])]
+    assert scan_checkpoint.select_shard(listing, None) is listing
+
+def test_parse_shard_rejects_bad_values():
+    assert scan_checkpoint.parse_shard("2/4") == (2, 4)
+    for text in ["4/4", "-1/4", "a/4", "3"]:
+        with pytest.raises(ValueError):
+            scan_checkpoint.parse_shard(text)
+
+def test_merge_reports_missing_shards(tmp_path):
+    rows = {0: [("005930", "삼성전자")], 2: [], 3: [("000660", "SK하이닉스"), ("005930", "삼성전자")]}
+    for i, r in rows.items():
+        scan_checkpoint.save_shard_result(r, COLUMNS, "20260403", (i, 4), shard_dir=tmp_path)
+    merged, missing = scan_checkpoint.merge_shards("20260403", shard_dir=tmp_path)
+    assert missing == [1]
+    assert sorted(merged["종목코드"]) == ["000660", "005930"]   # 종목코드 앞자리 0 유지, 중복 제거
+    assert scan_checkpoint.merge_shards("20260402", shard_dir=tmp_path) == (None, [])
+
+def test_merge_raises_on_mixed_shard_counts(tmp_path):
+    scan_checkpoint.save_shard_result([], COLUMNS, "20260403", (0, 2), shard_dir=tmp_path)
+    scan_checkpoint.save_shard_result([], COLUMNS, "20260403", (1, 3), shard_dir=tmp_path)
+    with pytest.raises(ValueError):
+        scan_checkpoint.merge_shards("20260403", shard_dir=tmp_path)
+
+def test_resume_ignores_truncated_prefilter_line(tmp_path):
+    cp = Checkpoint("20260403", (1, 4), base_dir=tmp_path)
+    cp.add_prefilter("005930", True)
+    cp.add_prefilter("000660", False)
+    with open(cp.prefilter_path, "a", encoding="utf-8") as f:
+        f.write('{"code": "035720", "ke')   # 기록 도중 작업이 죽음
+
+    resumed = Checkpoint("20260403", (1, 4), base_dir=tmp_path)
+    assert resumed.prefilter_done() == {"005930": True, "000660": False}
+    resumed.add_prefilter("035720", True)   # 잘린 줄에 이어 붙지 않고 새 줄로 기록
+    assert resumed.prefilter_done() == {"005930": True, "000660": False, "035720": True}
+    assert resumed.resumed_counts() == (3, 0)
+
+    assert Checkpoint("20260403", (1, 4), base_dir=tmp_path, fresh=True).prefilter_done() == {}
+    assert Checkpoint("20260403", (2, 4), base_dir=tmp_path).prefilter_done() == {}
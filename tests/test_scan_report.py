@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""실행 리포트: JSON 요약만 outputs/ 에, 요청 1건당 1행 CSV 상세는 data/ 아래에"""
+import json
+import os
+
+import pandas as pd
+
+import scan_report
+
+def test_write_keeps_only_summary_in_outputs(tmp_path):
+    recorder = scan_report.ScanRecorder()
+    recorder.request("005930", 320, 0, 0.05, 0.002, 4096, "ok")
+    recorder.request("000660", 320, 0, 0.07, 0.0, 0, "timeout", "read timed out")
+    out_dir, detail_dir = tmp_path / "outputs", tmp_path / "data" / "scan_reports"
+    json_path, csv_path = recorder.write(str(out_dir), "20260403", detail_dir=str(detail_dir))
+
+    assert os.listdir(out_dir) == ["scan_report_20260403.json"]
+    assert os.path.dirname(csv_path) == str(detail_dir)
+    summary = json.load(open(json_path, encoding="utf-8"))
+    assert summary["requests"] == 2 and summary["failures"] == {"timeout": 1}
+    assert len(pd.read_csv(csv_path, dtype={"code": str})) == 2
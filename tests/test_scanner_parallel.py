@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""로컬 fchart 스텁 서버로 직렬 / 동시 스캔 결과 동일성과 토큰 버킷 요청 속도 확인"""
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_provider
+import http_client
+import result_table
+import scanner
+
+DATES = pd.bdate_range("2024-01-01", "2026-10-16")
+CODES = [f"{i * 7 + 1:06d}" for i in range(60)]
+
+def sise_xml(code, count):
+    """종목코드 기준 고정 난수 상승 추세 일봉 (일부 종목이 조건을 통과하도록)"""
+    rng = np.random.default_rng(zlib.crc32(code.encode()))
+    close = (1000 * np.exp(np.cumsum(rng.normal(0.002, 0.02, len(DATES))))).astype(int)
+    volume = rng.integers(100_000, 5_000_000, len(DATES)) * (1 + 5 * (rng.random(len(DATES)) < 0.05))
+    items = "\n".join(f'<item data="{d:%Y%m%d}|{c}|{int(c * 1.02)}|{int(c * 0.98)}|{c}|{v}" />'
+                      for d, c, v in list(zip(DATES, close, volume))[-count:])
+    return (f'<?xml version="1.0" encoding="EUC-KR" ?>\n<protocol>\n<chartdata symbol="{code}" count="{count}">\n'
+            f"{items}\n</chartdata>\n</protocol>")
+
+class StubHandler(BaseHTTPRequestHandler):
+    times = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        with self.lock:
+            self.times.append(time.monotonic())
+        body = sise_xml(query["symbol"][0], int(query["count"][0])).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(data_provider, "FCHART_URL", f"http://127.0.0.1:{server.server_address[1]}/sise.nhn")
+    previous = data_provider.use(data_provider.LiveProvider(http_client.HttpClient()))
+    monkeypatch.setattr(scanner, "SLEEP_MIN", 0.0)   # 직렬 스캔의 서버 부하 방지 슬립 생략
+    monkeypatch.setattr(scanner, "SLEEP_MAX", 0.0)
+    StubHandler.times = []
+    yield StubHandler
+    data_provider.use(previous)
+    server.shutdown()
+    server.server_close()
+
+def scan_csv(workers, rate):
+    listing = pd.DataFrame({"Code": CODES, "Name": [f"종목{c}" for c in CODES],
+                            "Market": ["유가" if i % 2 else "코스닥" for i in range(len(CODES))]})
+    results = scanner.scan_listing(listing, workers=workers, rate=rate, use_store=False, use_prefilter=True)
+    return pd.DataFrame(results, columns=scanner.RESULT_COLUMNS + result_table.METRIC_COLUMNS).to_csv(index=False)
+
+def test_serial_and_concurrent_scans_write_same_csv(stub_server):
+    serial = scan_csv(workers=1, rate=scanner.RATE_LIMIT_PER_SEC)
+    concurrent = scan_csv(workers=8, rate=1000)
+    assert serial == concurrent
+    assert len(serial.splitlines()) > 1   # 포착 종목이 있어야 비교가 의미 있음
+
+def test_token_bucket_holds_request_rate(stub_server):
+    rate = 40.0
+    scan_csv(workers=8, rate=rate)
+    times = np.array(sorted(stub_server.times))
+    assert len(times) >= 2 * len(CODES) * 0.5
+    # 모든 구간 [t_i, t_j] 의 요청 수가 버스트 + rate x 경과 시간 이하
+    for i in range(len(times)):
+        elapsed = times[i:] - times[i]
+        counts = np.arange(1, len(elapsed) + 1)
+        assert (counts <= scanner.RATE_LIMIT_BURST + rate * elapsed + 1).all()
+    assert (len(times) - scanner.RATE_LIMIT_BURST) / (times[-1] - times[0]) <= rate * 1.05
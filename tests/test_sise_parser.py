@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""정규식 sise 파서를 fchart 응답 형식 픽스처로 기존 BeautifulSoup 파서와 비교"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scanner
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def test_daily_response_matches_soup_parser():
+    xml = fixture("sise_day_005930.xml")
+    fast, ref = scanner.parse_sise_xml(xml), scanner.parse_sise_xml_soup(xml)
+    pd.testing.assert_frame_equal(fast, ref, check_exact=True)
+    assert list(fast.dtypes) == [np.int64] * 5
+    assert fast.index[-1] == pd.Timestamp("2026-04-03") and fast.loc["2026-04-03", "Close"] == 60800
+
+def test_unsorted_response_matches_soup_parser():
+    lines = fixture("sise_day_005930.xml").splitlines()
+    items = [i for i, line in enumerate(lines) if "<item" in line]
+    lines[items[0]:items[-1] + 1] = lines[items[0]:items[-1] + 1][::-1]
+    xml = "\n".join(lines)
+    pd.testing.assert_frame_equal(scanner.parse_sise_xml(xml), scanner.parse_sise_xml_soup(xml), check_exact=True)
+
+def test_empty_response():
+    xml = fixture("sise_empty.xml")
+    assert scanner.parse_sise_xml(xml) is None
+    assert scanner.parse_sise_xml_soup(xml) is None
+
+@pytest.mark.parametrize("name", ["sise_day_null.xml", "sise_day_short_row.xml"])
+def test_bad_daily_rows_fail_like_soup_parser(name):
+    # 기존 파서는 int("null") / 필드 부족에서 예외 → fetch_ohlcv 가 parse_error 로 기록
+    xml = fixture(name)
+    with pytest.raises((ValueError, IndexError)):
+        scanner.parse_sise_xml_soup(xml)
+    with pytest.raises(ValueError):
+        scanner.parse_sise_xml(xml)
+
+def test_minute_nulls_are_filled_with_close():
+    df = scanner.parse_sise_xml(fixture("sise_minute_005930.xml"))
+    assert df.index[0] == pd.Timestamp("2026-04-03 09:01") and len(df) == 6
+    assert df.dtypes.eq(np.float64).all() and not df.isna().any().any()
+    filled = df.loc["2026-04-03 09:02"]
+    assert (filled[["Open", "High", "Low"]] == filled["Close"]).all() and filled["Close"] == 59700
+    assert df.loc["2026-04-03 09:03", "High"] == 59900
+
+def test_fetch_records_parse_error_for_null_daily_row(monkeypatch):
+    monkeypatch.setattr(scanner, "get_sise_xml", lambda code, count, timeframe="day": fixture("sise_day_null.xml"))
+    df, status = scanner.fetch_ohlcv("005930", 3)
+    assert df is None and status == "parse_error"
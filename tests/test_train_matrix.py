@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""최대 RSS 측정의 플랫폼별 단위 (Linux KB / macOS 바이트 / Windows 미지원)"""
+import math
+import sys
+import types
+
+import train_matrix
+
+def fake_resource(maxrss):
+    usage = types.SimpleNamespace(ru_maxrss=maxrss)
+    return types.SimpleNamespace(RUSAGE_SELF=0, RUSAGE_CHILDREN=-1, getrusage=lambda who: usage)
+
+def test_peak_rss_units_per_platform(monkeypatch):
+    monkeypatch.setattr(train_matrix, "resource", fake_resource(512 * 1024))
+    monkeypatch.setattr(sys, "platform", "linux")
+    assert train_matrix.peak_rss_mb() == (512.0, 512.0)
+    monkeypatch.setattr(train_matrix, "resource", fake_resource(512 * 1024 * 1024))
+    monkeypatch.setattr(sys, "platform", "darwin")
+    assert train_matrix.peak_rss_mb() == (512.0, 512.0)
+
+def test_peak_rss_without_resource_module(monkeypatch):
+    monkeypatch.setattr(train_matrix, "resource", None)
+    assert all(math.isnan(v) for v in train_matrix.peak_rss_mb())
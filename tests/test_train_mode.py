@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""증분/전체 학습 결정: 새 행이 적으면 전체 학습(또는 선택 시 유지), 드리프트는 충분한 검증 행이 모였을 때만 판단"""
+import pandas as pd
+import pytest
+
+pytest.importorskip("lightgbm")
+import features
+import train_model
+
+COLUMNS = list(features.FEATURE_COLUMNS)
+META = {"feature_version": features.FEATURE_VERSION, "feature_columns": COLUMNS, "last_date": "2026-04-01"}
+TICKERS = 20
+ENOUGH = TICKERS * train_model.MIN_INCREMENTAL_DAYS
+
+def make_log(*runs):
+    """runs: (mode, accuracy, train_rows)"""
+    return pd.DataFrame([{"mode": m, "accuracy": a, "train_rows": r} for m, a, r in runs],
+                        columns=train_model.LOG_COLUMNS)
+
+def decide(requested, new_rows, log, meta=META, **kwargs):
+    return train_model.choose_train_mode(requested, meta, COLUMNS, new_rows, log, n_tickers=TICKERS, **kwargs)[0]
+
+def test_full_without_model_or_when_features_change():
+    assert decide("auto", 10, make_log(), meta=None) == "full"
+    assert decide("incremental", ENOUGH, make_log(), meta={**META, "feature_columns": COLUMNS[:-1]}) == "full"
+    assert decide("full", 0, make_log()) == "full"
+
+def test_small_increment_falls_back_to_full_unless_skip_requested():
+    log = make_log(("full", 60.0, 500000))
+    assert decide("auto", 40, log) == "full"
+    assert decide("auto", ENOUGH - 1, log) == "full"
+    assert decide("auto", ENOUGH, log) == "incremental"
+    # 임계값은 학습 종목 수에 비례
+    assert train_model.choose_train_mode("auto", META, COLUMNS, ENOUGH, log, n_tickers=TICKERS * 2)[0] == "full"
+    # 기존 모델 유지는 선택 사항
+    assert decide("auto", 40, log, skip_small=True) == "skip"
+
+def test_explicit_incremental_is_honoured():
+    log = make_log(("full", 60.0, 500000))
+    assert decide("incremental", 40, log) == "incremental"
+    assert decide("incremental", 40, log, skip_small=True) == "incremental"
+
+def test_small_sample_drift_does_not_force_full():
+    # 직전 증분 한 번이 크게 떨어져도 합친 검증 행이 적으면 판단 보류
+    log = make_log(("full", 60.0, 500000), ("incremental", 50.0, 300), ("incremental", 45.0, 300))
+    assert decide("auto", ENOUGH, log) == "incremental"
+    # 행 수 기록이 없는 이전 형식 로그도 드리프트 판단에 쓰지 않음
+    legacy = make_log(("full", 60.0, None), ("incremental", 40.0, None))
+    assert decide("auto", ENOUGH, legacy) == "incremental"
+
+def test_pooled_drift_forces_full():
+    log = make_log(("full", 60.0, 500000), ("incremental", 55.0, 1500), ("incremental", 57.5, 1500))
+    mode, reason = train_model.choose_train_mode("auto", META, COLUMNS, ENOUGH, log, n_tickers=TICKERS)
+    assert mode == "full" and "3000" in reason
+    # 마지막 한 번의 하락은 합친 정확도에서 희석
+    steady = make_log(("full", 60.0, 500000), ("incremental", 59.0, 3000), ("incremental", 50.0, 200))
+    assert decide("auto", ENOUGH, steady) == "incremental"
+
+def test_full_after_too_many_incremental_runs():
+    runs = [("full", 60.0, 500000)] + [("incremental", 60.0, ENOUGH)] * train_model.MAX_INCREMENTAL_RUNS
+    assert decide("auto", ENOUGH, make_log(*runs)) == "full"
+    assert decide("auto", ENOUGH, make_log(*runs[:-1])) == "incremental"
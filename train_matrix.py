@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+디스크 기반 학습 행렬 (train_model / backtest 공용)
+
+종목별 피처 배열을 받는 즉시 data/train_matrix 의 .npy 메모리 맵 파일에 이어 쓰고(종목 순 임시 행렬),
+다 모이면 일자순(같은 일자는 종목 순)으로 BLOCK_ROWS 행씩 옮겨 최종 행렬을 만듭니다.
+저장하는 것은 FEATURE_COLUMNS(float32) + target(int8) + 일자 / 종목코드뿐이며,
+학습은 np.load(mmap_mode="r") 로 연 행렬의 연속 구간(view)을 LightGBM 에 그대로 넘깁니다.
+
+    data/train_matrix/X.npy       # (행 x 피처) float32
+    data/train_matrix/y.npy       # target int8
+    data/train_matrix/dates.npy   # datetime64[ns]
+    data/train_matrix/codes.npy   # 종목코드
+    data/train_matrix/meta.json   # 컬럼 / 행 수 / 생성 시각
+"""
+import os
+import sys
+import json
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+try:
+    import resource   # Unix 전용 (Windows 에는 없음)
+except ImportError:
+    resource = None
+
+MATRIX_DIR = os.path.join("data", "train_matrix")
+BLOCK_ROWS = 1 << 18     # 정렬 복사 1회에 옮기는 행 수 (float32 22열 기준 약 23MB)
+
+def _path(out_dir, name):
+    return os.path.join(out_dir, name)
+
+class TrainMatrix:
+    """메모리 맵으로 연 학습 행렬 (X / y 는 디스크 파일, 일자 / 종목코드만 메모리)"""
+
+    def __init__(self, out_dir=MATRIX_DIR):
+        with open(_path(out_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+        self.X = np.load(_path(out_dir, "X.npy"), mmap_mode="r")
+        self.y = np.load(_path(out_dir, "y.npy"), mmap_mode="r")
+        self.index = pd.DatetimeIndex(np.load(_path(out_dir, "dates.npy")))
+        self.codes = np.load(_path(out_dir, "codes.npy"))
+
+    def __len__(self):
+        return len(self.y)
+
+    def rows(self, mask):
+        """불리언 마스크가 연속 구간이면 slice (메모리 맵 view 유지), 아니면 마스크 그대로"""
+        idx = np.flatnonzero(mask)
+        if len(idx) and idx[-1] - idx[0] + 1 == len(idx):
+            return slice(int(idx[0]), int(idx[-1]) + 1)
+        return np.asarray(mask)
+
+    def features(self, rows=slice(None)):
+        """X[rows] 를 컬럼 이름이 붙은 DataFrame 으로 (slice 면 복사 없이 메모리 맵 view)"""
+        return pd.DataFrame(self.X[rows], index=self.index[rows], columns=self.columns, copy=False)
+
+    def target(self, rows=slice(None)):
+        return self.y[rows]
+
+    def frame(self):
+        """FEATURE_COLUMNS + target + code DataFrame (build_training_set 호환 형식)"""
+        df = self.features()
+        df["target"] = np.asarray(self.y)
+        df["code"] = self.codes
+        return df
+
+def build(parts, max_rows, columns, out_dir=MATRIX_DIR, block_rows=BLOCK_ROWS):
+    """
+    parts: (종목코드, 일자 int64 ns, X float32, y int8) 를 종목 순서대로 내는 iterable.
+    max_rows: 전체 행 수 상한 (임시 행렬 크기). 반환: TrainMatrix (행이 없으면 None)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    stage_x = np.lib.format.open_memmap(_path(out_dir, "X.stage.npy"), mode="w+", dtype=np.float32,
+                                        shape=(max(max_rows, 1), len(columns)))
+    stage_y = np.lib.format.open_memmap(_path(out_dir, "y.stage.npy"), mode="w+", dtype=np.int8,
+                                        shape=(max(max_rows, 1),))
+    stamps, codes, counts, offset = [], [], [], 0
+    for code, d, x, t in parts:
+        stage_x[offset:offset + len(t)] = x
+        stage_y[offset:offset + len(t)] = t
+        stamps.append(d)
+        codes.append(code)
+        counts.append(len(t))
+        offset += len(t)
+
+    try:
+        if offset == 0:
+            return None
+        # 종목 순으로 이어 쓴 행의 일자 안정 정렬 = pd.concat(...).sort_index(kind='stable') 순서
+        stamps = np.concatenate(stamps)
+        order = np.argsort(stamps, kind="stable")
+        X = np.lib.format.open_memmap(_path(out_dir, "X.npy"), mode="w+", dtype=np.float32, shape=(offset, len(columns)))
+        y = np.lib.format.open_memmap(_path(out_dir, "y.npy"), mode="w+", dtype=np.int8, shape=(offset,))
+        for start in range(0, offset, block_rows):
+            rows = order[start:start + block_rows]
+            X[start:start + len(rows)] = stage_x[rows]
+            y[start:start + len(rows)] = stage_y[rows]
+        X.flush()
+        y.flush()
+        del X, y
+        np.save(_path(out_dir, "dates.npy"), stamps[order].view("datetime64[ns]"))
+        np.save(_path(out_dir, "codes.npy"), np.repeat(np.array(codes, dtype="U6"), counts)[order])
+        with open(_path(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"columns": list(columns), "rows": offset, "codes": len(codes),
+                       "built": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}, f, ensure_ascii=False)
+    finally:
+        del stage_x, stage_y
+        for name in ("X.stage.npy", "y.stage.npy"):
+            if os.path.exists(_path(out_dir, name)):
+                os.remove(_path(out_dir, name))
+    return TrainMatrix(out_dir)
+
+def peak_rss_mb():
+    """
+    (현재 프로세스 최대 RSS, 종료된 자식 프로세스 중 최대 RSS) MB.
+    ru_maxrss 는 Linux 에서 KB, macOS 에서 바이트 단위이며, resource 모듈이 없는 Windows 에서는 (nan, nan)
+    """
+    if resource is None:
+        return float("nan"), float("nan")
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
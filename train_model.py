@@ -1,16 +1,25 @@
 # -*- coding: utf-8 -*-
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
-import yfinance as yf
 from lightgbm import LGBMClassifier
 import joblib
 from datetime import datetime, timedelta
 import os
+import json
+import time
+import argparse
 import warnings
 import logging 
+from concurrent.futures import ProcessPoolExecutor
 import streamlit as st
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
+import data_provider
+import features
+import history_cache
+import macro_store
+import backtest
+import results_index
+import train_matrix
 
 # 1. 시스템 설정 및 환경 변수 처리
 warnings.filterwarnings("ignore")
@@ -39,122 +48,222 @@ def get_api_key():
 OUTPUT_DIR = "outputs"
 MODEL_NAME = "stock_model.pkl"
 LOG_NAME = "model_history.csv" 
+META_NAME = "stock_model.meta.json"   # 모델과 함께 저장하는 학습 메타데이터 (피처 버전, 마지막 학습 일자 등)
 TRAIN_YEARS = 5
 
+MODEL_PARAMS = dict(
+    n_estimators=1000, learning_rate=0.01, max_depth=10,
+    num_leaves=127, min_child_samples=20, random_state=42, verbosity=-1
+)
+
+# 학습 종목: latest = 최신 포착 리스트, history = 최근 STUDY_HISTORY_DAYS 일 포착 이력 전체 (0 이면 전 기간)
+STUDY_SOURCE = os.getenv("TRAIN_STUDY", "latest")
+STUDY_HISTORY_DAYS = int(os.getenv("TRAIN_HISTORY_DAYS", "0"))
+
+# 종목별 피처 추출 병렬화: 종목을 FEATURE_CHUNK 개씩 묶어 프로세스 풀에서 계산 (1 = 현재 프로세스에서 순차 계산)
+# 청크 경계가 워커 수와 무관하고 결과를 청크 순서대로 모으므로 학습 행렬은 워커 수와 관계없이 동일
+FEATURE_WORKERS = int(os.getenv("TRAIN_FEATURE_WORKERS", str(os.cpu_count() or 1)))
+FEATURE_CHUNK = 16
+
+HOLDOUT_FRAC = 0.2             # 전체 학습 시 정확도 검증에 쓰는 최근 일자 비율
+
+# 증분 학습: 이전 모델에 새로 추가된 일자의 행만으로 트리를 이어 붙임 (LightGBM init_model)
+INCREMENTAL_ESTIMATORS = 100
+MAX_INCREMENTAL_RUNS = 20      # 마지막 전체 학습 이후 증분 학습이 이 횟수를 넘으면 전체 재학습
+ACCURACY_DRIFT_PCT = 3.0       # 증분 검증 정확도가 마지막 전체 학습 대비 이만큼(%p) 떨어지면 전체 재학습
+# auto 모드에서 새 행이 (학습 종목 수 x 이 일수)보다 적으면 수십 행에 100개 트리를 이어 붙이지 않고 전체 학습
+# (기본 latest 학습은 20종목 안팎이라 전체 학습도 가벼움)
+MIN_INCREMENTAL_DAYS = 20
+# 1 이면 새 행이 부족할 때 전체 학습 대신 기존 모델을 유지하고 다음 실행까지 누적 (--skip-small)
+SKIP_SMALL_INCREMENTS = os.getenv("TRAIN_SKIP_SMALL", "0") == "1"
+# 드리프트는 마지막 전체 학습 이후 증분 검증 행을 모두 합친 정확도로 판단하고, 합친 행이 이보다 적으면 판단 보류
+# (2000행이면 정확도 표준오차 약 1.1%p 라 3%p 하락이 잡음과 구분됨)
+MIN_DRIFT_ROWS = 2000
+
 def get_latest_selected_stocks():
-    """outputs 폴더에서 가장 최근에 선정된 종목 리스트를 가져옵니다."""
+    """포착 이력 인덱스에서 가장 최근에 선정된 종목 리스트를 가져옵니다."""
     try:
-        if not os.path.exists(OUTPUT_DIR):
-            os.makedirs(OUTPUT_DIR)
+        latest = results_index.latest_date()
+        if latest is None:
             return None
-            
-        files = [f for f in os.listdir(OUTPUT_DIR) if f.startswith("final_result_") and f.endswith(".csv")]
-        if not files:
-            return None
-        
-        latest_file = sorted(files)[-1]
-        print(f"📂 [시스템] 최신 선정 파일 분석 중: {latest_file}")
-        df = pd.read_csv(os.path.join(OUTPUT_DIR, latest_file))
-        return [str(code).zfill(6) for code in df['종목코드'].tolist()]
+        print(f"📂 [시스템] 최신 선정 일자 분석 중: {latest}")
+        return results_index.picks_on(latest)["종목코드"].tolist()
     except Exception as e:
-        print(f"❌ [에러] 파일 읽기 실패: {e}")
+        print(f"❌ [에러] 포착 이력 읽기 실패: {e}")
+        return None
+
+def get_history_selected_stocks(days=STUDY_HISTORY_DAYS):
+    """최근 days 일(달력 기준) 동안 한 번이라도 포착된 종목 전체 (인덱스 조회 한 번, CSV 파싱 없음)"""
+    latest = results_index.latest_date()
+    if latest is None:
         return None
+    start = (datetime.strptime(latest, "%Y%m%d") - timedelta(days=days)).strftime("%Y%m%d") if days else None
+    codes = results_index.codes_between(start, latest)
+    print(f"📂 [시스템] 포착 이력 {start or '전체'}~{latest}: {len(codes)}개 종목")
+    return codes or None
 
 def extract_ml_features(df, market_df, nasdaq_df, vix_df, dxy_df, tnx_df, gold_df):
     """
-    [해결] 시간대(Timezone) 충돌을 방지하며 22개의 피처를 추출하는 엔진
+    공용 피처 엔진(features.py)으로 종목 1개의 22개 피처를 추출합니다.
+    여러 종목은 features.extract_features 로 한 번에 계산하는 편이 훨씬 빠릅니다.
     """
     try:
-        if len(df) < 60: return None 
-        
-        # 모든 데이터의 시간대 정보를 제거하여 병합 에러 방지
-        df.index = df.index.tz_localize(None)
-        
-        # 1. 개별 종목 기술적 지표
-        df['rsi'] = ta.rsi(df['Close'], length=14)
-        bb = ta.bbands(df['Close'], length=20, std=2)
-        l_col = [c for c in bb.columns if 'BBL' in c][0]
-        u_col = [c for c in bb.columns if 'BBU' in c][0]
-        df['bb_per'] = (df['Close'] - bb[l_col]) / (bb[u_col] - bb[l_col])
-        
-        ma5, ma20 = ta.sma(df['Close'], 5), ta.sma(df['Close'], 20)
-        df['ma_diff'] = (ma5 - ma20) / (ma20 + 1e-9)
-        
-        # 2. 거래량 및 캔들 분석
-        vol_up = (df['Volume'] > df['Volume'].shift(1)).astype(int)
-        df['vol_consecutive_days'] = vol_up.groupby((vol_up != vol_up.shift()).cumsum()).cumsum()
-        df['vol_spike_ratio'] = df['Volume'] / (ta.sma(df['Volume'], 20) + 1e-9)
-        df['candle_body'] = (df['Close'] - df['Open']) / (df['High'] - df['Low'] + 1e-9)
-        
-        # 3. 시장 대비 상대 강도 (RS)
-        m_series = market_df.squeeze()
-        if isinstance(m_series, pd.DataFrame): m_series = m_series.iloc[:, 0]
-        m_series.index = m_series.index.tz_localize(None)
-        m_series.name = "market_close"
-        
-        df = df.join(m_series, how='left').ffill()
-        df['relative_strength'] = df['Close'].pct_change(5) - df['market_close'].pct_change(5)
-        
-        # 4. 모멘텀 및 보조 지표
-        macd = ta.macd(df['Close'])
-        df['macd_hist'] = macd['MACDh_12_26_9']
-        df['mfi'] = ta.mfi(df['High'], df['Low'], df['Close'], df['Volume'], length=14)
-        df['atr_ratio'] = ta.atr(df['High'], df['Low'], df['Close'], length=14) / (df['Close'] + 1e-9)
-        
-        stoch = ta.stoch(df['High'], df['Low'], df['Close'])
-        df['stoch_k'] = stoch['STOCHk_14_3_3']
-        df['disparity_60'] = (df['Close'] / (ta.sma(df['Close'], 60) + 1e-9)) * 100
-        df['price_range'] = (df['High'] - df['Low']) / (df['Close'] + 1e-9)
-        df['vol_roc'] = ta.roc(df['Volume'], length=5)
-        df['range_roc'] = ta.roc(df['price_range'], length=5)
-        df['day_of_week'] = df.index.dayofweek
-        
-        # 5. 매크로 데이터 병합
-        for ser, name in zip([nasdaq_df, vix_df, dxy_df, tnx_df, gold_df], 
-                             ["nasdaq_return", "vix_close", "dxy_return", "tnx_close", "gold_return"]):
-            s = ser.squeeze()
-            if isinstance(s, pd.DataFrame): s = s.iloc[:, 0]
-            s.index = s.index.tz_localize(None)
-            s.name = name
-            df = df.join(s, how='left').ffill()
-            
-        # 나스닥 선물 대용값 계산
-        df['nasdaq_f_return'] = df['nasdaq_return'].shift(-1).fillna(0)
-        
-        return df.dropna()
+        if len(df) < 60: return None
+        macro = features.macro_frame(nasdaq_df, vix_df, dxy_df, tnx_df, gold_df)
+        return features.extract_features([df], [market_df], macro)[0]
     except Exception as e:
         print(f"⚠️ 지표 추출 중 오류: {e}")
         return None
 
-def save_training_log(accuracy, feature_list):
+LOG_COLUMNS = ['date', 'accuracy', 'feature_count', 'features', 'mode', 'train_rows', 'train_sec', 'peak_rss_mb']
+
+def save_training_log(accuracy, feature_list, mode="full", train_rows=None, train_sec=None, peak_rss_mb=None):
     log_data = {
         'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'accuracy': round(accuracy * 100, 2),
         'feature_count': len(feature_list),
-        'features': ", ".join(feature_list)
+        'features': ", ".join(feature_list),
+        'mode': mode,
+        'train_rows': train_rows,
+        'train_sec': None if train_sec is None else round(train_sec, 1),
+        'peak_rss_mb': peak_rss_mb
     }
-    df_log = pd.DataFrame([log_data])
+    df_log = pd.DataFrame([log_data], columns=LOG_COLUMNS)
     if not os.path.exists(LOG_NAME):
         df_log.to_csv(LOG_NAME, index=False, encoding='utf-8-sig')
-    else:
+        return
+    header = pd.read_csv(LOG_NAME, nrows=0, encoding='utf-8-sig').columns.tolist()
+    if header == LOG_COLUMNS:
         df_log.to_csv(LOG_NAME, mode='a', header=False, index=False, encoding='utf-8-sig')
+    else:
+        # 이전 형식(mode/시간 컬럼 없음) 기록은 컬럼을 넓혀 다시 저장
+        old = pd.read_csv(LOG_NAME, encoding='utf-8-sig')
+        merged = pd.concat([old, df_log], ignore_index=True).reindex(columns=LOG_COLUMNS)
+        merged.astype({'train_rows': 'Int64'}).to_csv(LOG_NAME, index=False, encoding='utf-8-sig')
 
-def train_specialized_model():
-    study_list = get_latest_selected_stocks()
-    api_key = get_api_key() # [보정 적용] 최적화된 키 수집 로직 사용
-    
-    if not study_list:
-        print("⚠️ [알림] 선정된 종목 리스트가 없습니다.")
-        return
+def load_training_log():
+    if not os.path.exists(LOG_NAME):
+        return pd.DataFrame(columns=LOG_COLUMNS)
+    return pd.read_csv(LOG_NAME, encoding='utf-8-sig').reindex(columns=LOG_COLUMNS)
 
-    print(f"🚀 [진행] {len(study_list)}개 종목 기반 AI 모델 재학습 시작 (v1.7)")
-    
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=365 * TRAIN_YEARS)
+def load_model_meta():
+    if not (os.path.exists(MODEL_NAME) and os.path.exists(META_NAME)):
+        return None
+    try:
+        with open(META_NAME, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def save_model_meta(meta):
+    with open(META_NAME, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+def pooled_accuracy(runs):
+    """증분 학습 기록들의 검증 정확도(%)를 검증 행 수로 가중 평균. 반환: (정확도 또는 None, 합친 행 수)"""
+    runs = runs[runs['train_rows'].notna() & runs['accuracy'].notna()]
+    rows = runs['train_rows'].astype(float)
+    if rows.sum() <= 0:
+        return None, 0
+    return float((runs['accuracy'] * rows).sum() / rows.sum()), int(rows.sum())
+
+def choose_train_mode(requested, meta, feature_columns, new_rows=None, log=None, n_tickers=1,
+                      skip_small=SKIP_SMALL_INCREMENTS):
+    """
+    증분/전체 학습 여부를 결정합니다. (requested: auto / full / incremental)
+    반환: (full / incremental / skip, 사유).
+    이전 모델이 없거나 피처 구성이 바뀌었으면 항상 전체 학습이고, 명시한 incremental 은 그대로 따릅니다.
+    auto 에서는 새 행이 n_tickers x MIN_INCREMENTAL_DAYS 미만이면 전체 학습(skip_small 이면 skip: 기존 모델 유지),
+    증분 횟수 한도 초과 또는 정확도 하락(드리프트) 시에도 전체 학습으로 전환합니다.
+    드리프트는 마지막 전체 학습 이후 증분 검증 행을 합쳐 MIN_DRIFT_ROWS 이상일 때만 판단합니다.
+    new_rows: 마지막 학습 이후 새 학습 행 수, log: 학습 기록 (생략 시 model_history.csv), n_tickers: 학습 종목 수
+    """
+    if requested == "full":
+        return "full", "전체 학습 요청"
+    if meta is None:
+        return "full", "이전 모델/메타데이터 없음"
+    if meta.get("feature_version") != features.FEATURE_VERSION or meta.get("feature_columns") != feature_columns:
+        return "full", "피처 구성 변경"
+    if requested == "incremental":
+        return "incremental", "증분 학습 요청"
+    min_rows = max(1, n_tickers) * MIN_INCREMENTAL_DAYS
+    if new_rows is not None and new_rows < min_rows:
+        short = f"새 학습 행 {new_rows}건 < {min_rows}건 ({n_tickers}종목 x {MIN_INCREMENTAL_DAYS}일)"
+        if skip_small:
+            return "skip", f"{short}, 다음 실행까지 누적"
+        return "full", short
+
+    log = load_training_log() if log is None else log.reset_index(drop=True)
+    full_runs = log.index[log['mode'].fillna('full') == 'full']
+    since_full = log.loc[full_runs[-1] + 1:] if len(full_runs) else log
+    if len(since_full) >= MAX_INCREMENTAL_RUNS:
+        return "full", f"증분 학습 {len(since_full)}회 누적"
+    if len(full_runs) and len(since_full):
+        pooled, n = pooled_accuracy(since_full)
+        if pooled is not None and n >= MIN_DRIFT_ROWS:
+            drift = log.loc[full_runs[-1], 'accuracy'] - pooled
+            if drift >= ACCURACY_DRIFT_PCT:
+                return "full", f"정확도 하락 {drift:.2f}%p (증분 검증 {n}행)"
+    return "incremental", "이전 모델 이어서 학습"
+
+def to_ticker(code):
+    return f"{code}.KS" if code.startswith(('0', '1', '2')) else f"{code}.KQ"
+
+def feature_chunk(frames, markets, macro):
+    """
+    종목 묶음의 학습 행을 계산합니다 (프로세스 풀 작업 단위, DataFrame 대신 압축 배열로 반환).
+    종목별 마지막 봉은 다음 날 종가가 없어 정답을 알 수 없으므로 제외합니다.
+    반환: 종목별 (일자 int64 ns, FEATURE_COLUMNS float32 행렬, target int8)
+    """
+    out = []
+    for p_df in features.extract_features(frames, markets, macro):
+        p_df['target'] = (p_df['Close'].shift(-1) > p_df['Close']).astype(np.int8)
+        p_df = p_df[features.FEATURE_COLUMNS + ['target']].iloc[:-1].dropna()
+        out.append((p_df.index.values.astype('datetime64[ns]').view('i8'),
+                    p_df[features.FEATURE_COLUMNS].to_numpy(dtype=np.float32), p_df['target'].to_numpy(dtype=np.int8)))
+    return out
+
+def extract_training_matrix(codes, frames, markets, macro, workers=FEATURE_WORKERS, chunk=FEATURE_CHUNK,
+                            out_dir=train_matrix.MATRIX_DIR):
+    """
+    전 종목 학습 행을 청크가 끝나는 대로 디스크 학습 행렬(train_matrix)에 써 넣습니다.
+    행은 일자순(같은 일자는 종목 입력 순)으로 정렬됩니다. 반환: TrainMatrix (행이 없으면 None)
+    """
+    tasks = [(frames[i:i + chunk], markets[i:i + chunk], macro) for i in range(0, len(frames), chunk)]
+
+    def chunks():
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                yield from pool.map(feature_chunk, *zip(*tasks))
+        else:
+            for task in tasks:
+                yield feature_chunk(*task)
+
+    def parts():
+        codes_left = iter(codes)
+        for out in chunks():
+            for d, x, t in out:
+                yield next(codes_left), d, x, t
+
+    max_rows = sum(max(len(df) - 1, 0) for df in frames)
+    return train_matrix.build(parts(), max_rows, features.FEATURE_COLUMNS, out_dir)
+
+def build_training_matrix(study_list, end_date=None, years=TRAIN_YEARS, workers=FEATURE_WORKERS):
+    """
+    학습 종목들의 22개 피처 + 다음날 상승 여부(target) 를 디스크 학습 행렬로 만듭니다.
+    반환: TrainMatrix (FEATURE_COLUMNS float32 / target int8, 일자순) 또는 None
+    """
+    end_date = end_date or data_provider.now()   # 재생 중이면 녹화 세션 시각
+    start_date = end_date - timedelta(days=365 * years)
     
-    # 글로벌 매크로 데이터 수집
-    tickers = ["^KS11", "^KQ11", "^IXIC", "^VIX", "DX-Y.NYB", "^TNX", "GC=F"]
-    macro_raw = yf.download(tickers, start=start_date, end=end_date, progress=False)['Close'].ffill()
+    # 글로벌 매크로는 공용 저장소(macro_store), 학습 종목 이력은 로컬 캐시를 거쳐 일괄 수집 (두 번째 실행부터는 최근 구간만 수집)
+    macro_store.update(start_date, end_date)
+    macro_raw = macro_store.load_frame(start_date, end_date)
+    if macro_raw is None or macro_raw.empty:
+        print("❌ [에러] 매크로 시세 저장소를 만들 수 없습니다.")
+        return None
+    stock_tickers = {code: to_ticker(code) for code in study_list}
+    histories = history_cache.get_histories(list(stock_tickers.values()), start_date, end_date)
     
     kospi = macro_raw['^KS11']
     kosdaq = macro_raw['^KQ11']
@@ -164,51 +273,118 @@ def train_specialized_model():
     tnx = macro_raw['^TNX']
     gold_ret = macro_raw['GC=F'].pct_change()
     
-    all_data = []
-    feature_columns = [
-        'rsi', 'bb_per', 'ma_diff', 'vol_consecutive_days', 'vol_spike_ratio', 
-        'candle_body', 'relative_strength', 'macd_hist', 'mfi', 'atr_ratio',
-        'stoch_k', 'disparity_60', 'price_range', 'vol_roc', 'range_roc',
-        'day_of_week', 'nasdaq_return', 'vix_close', 'dxy_return', 'tnx_close', 
-        'gold_return', 'nasdaq_f_return'
-    ]
+    macro = features.macro_frame(nasdaq_ret, vix, dxy_ret, tnx, gold_ret)
     
-    for code in study_list:
-        ticker = f"{code}.KS" if code.startswith(('0', '1', '2')) else f"{code}.KQ"
-        market = kospi if ".KS" in ticker else kosdaq
-        
-        try:
-            df = yf.download(ticker, start=start_date, end=end_date, progress=False)
-            if df.empty or len(df) < 100: continue
-            if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
-            
-            p_df = extract_ml_features(df, market, nasdaq_ret, vix, dxy_ret, tnx, gold_ret)
-            if p_df is not None:
-                p_df['target'] = (p_df['Close'].shift(-1) > p_df['Close']).astype(int)
-                all_data.append(p_df[feature_columns + ['target']].dropna())
-        except: continue
-
-    if not all_data:
-        print("❌ [에러] 유효 데이터 수집 실패. API 키 또는 네트워크 확인.")
-        return
+    codes, frames, markets = [], [], []
+    for code, ticker in stock_tickers.items():
+        df = histories.get(ticker)
+        if df is None or len(df) < 100: continue
+        codes.append(code)
+        frames.append(df)
+        markets.append(kospi if ".KS" in ticker else kosdaq)
+    if not codes:
+        return None
 
-    train_set = pd.concat(all_data)
-    X, y = train_set[feature_columns], train_set['target']
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    model = LGBMClassifier(
-        n_estimators=1000, learning_rate=0.01, max_depth=10,
-        num_leaves=127, min_child_samples=20, random_state=42, verbosity=-1
-    )
+    del histories
+    started = time.time()
+    matrix = extract_training_matrix(codes, frames, markets, macro, workers)
+    n_rows = len(matrix) if matrix is not None else 0
+    print(f"🧮 [피처] {len(codes)}개 종목 / {n_rows}행 추출 {time.time() - started:.1f}초 (워커 {workers}개)")
+    return matrix
+
+def build_training_set(study_list, end_date=None, years=TRAIN_YEARS, workers=FEATURE_WORKERS):
+    """
+    학습 종목들의 22개 피처 + 다음날 상승 여부(target) 데이터셋을 만듭니다.
+    반환: index=일자, FEATURE_COLUMNS(float32) + target(int8) + code 컬럼 DataFrame (데이터가 없으면 None)
+    """
+    matrix = build_training_matrix(study_list, end_date, years, workers)
+    return None if matrix is None else matrix.frame()
+
+def train_specialized_model(mode="auto", study=STUDY_SOURCE, history_days=STUDY_HISTORY_DAYS, feature_workers=FEATURE_WORKERS,
+                            skip_small=SKIP_SMALL_INCREMENTS):
+    study_list = get_history_selected_stocks(history_days) if study == "history" else get_latest_selected_stocks()
+    api_key = get_api_key() # [보정 적용] 최적화된 키 수집 로직 사용
     
-    model.fit(X_train, y_train)
-    acc = accuracy_score(y_test, model.predict(X_test))
-    print(f"\n🎯 [결과] AI 모델 정확도: {round(acc * 100, 2)}% (학습데이터: {len(train_set)}건)")
+    if not study_list:
+        print("⚠️ [알림] 선정된 종목 리스트가 없습니다.")
+        return
+
+    print(f"🚀 [진행] {len(study_list)}개 종목 기반 AI 모델 재학습 시작 (v1.7)")
     
-    save_training_log(acc, feature_columns)
-    model.fit(X, y)
+    matrix = build_training_matrix(study_list, workers=feature_workers)
+    if matrix is None:
+        print("❌ [에러] 유효 데이터 수집 실패. API 키 또는 네트워크 확인.")
+        return
+
+    # 학습 행렬은 일자순이라 홀드아웃/증분 구간이 연속 구간 -> 메모리 맵 view 를 복사 없이 LightGBM 에 전달
+    feature_columns = features.FEATURE_COLUMNS
+    last_date = str(matrix.index.max().date())
+
+    meta = load_model_meta()
+    new_rows = matrix.index > pd.Timestamp(meta["last_date"]) if meta else None
+    mode, reason = choose_train_mode(mode, meta, feature_columns, None if new_rows is None else int(new_rows.sum()),
+                                     n_tickers=int(matrix.meta["codes"]), skip_small=skip_small)
+    if mode == "skip":
+        print(f"✅ [완료] {reason} - 기존 모델을 유지합니다.")
+        return
+    print(f"🧭 [모드] {'증분' if mode == 'incremental' else '전체'} 학습 ({reason})")
+
+    started = time.time()
+    if mode == "incremental":
+        if not new_rows.any():
+            print(f"✅ [완료] {meta['last_date']} 이후 새 학습 데이터가 없어 기존 모델을 유지합니다.")
+            return
+        rows = matrix.rows(new_rows)
+        X_new, y_new = matrix.features(rows), matrix.target(rows)
+        prev = joblib.load(MODEL_NAME)
+        # 새 행은 이전 모델이 본 적 없는 미래 데이터이므로 그대로 검증셋으로 사용
+        acc = accuracy_score(y_new, prev.predict(X_new))
+        model = LGBMClassifier(**{**MODEL_PARAMS, "n_estimators": INCREMENTAL_ESTIMATORS})
+        model.fit(X_new, y_new, init_model=prev.booster_)
+        n_rows = len(X_new)
+    else:
+        # 무작위 분할 대신 시간순 홀드아웃 (최근 20% 일자 검증, 그 앞 정답 기간+엠바고만큼 학습에서 제외)
+        train_mask, test_mask = backtest.holdout_split(matrix.index, test_frac=HOLDOUT_FRAC)
+        train_rows, test_rows = matrix.rows(train_mask), matrix.rows(test_mask)
+        model = LGBMClassifier(**MODEL_PARAMS)
+        model.fit(matrix.features(train_rows), matrix.target(train_rows))
+        acc = accuracy_score(matrix.target(test_rows), model.predict(matrix.features(test_rows)))
+        model.fit(matrix.features(), matrix.target())
+        n_rows = len(matrix)
+    elapsed = time.time() - started
+
+    print(f"\n🎯 [결과] AI 모델 정확도: {round(acc * 100, 2)}% (학습데이터: {n_rows}건 / 전체 {len(matrix)}건)")
+    log = load_training_log()
+    last_full = log[(log['mode'].fillna('full') == 'full') & log['train_sec'].notna()]
+    if len(last_full):
+        print(f"⏱️ [시간] 이번 {mode} 학습 {elapsed:.1f}초 | 마지막 전체 학습 {last_full['train_sec'].iloc[-1]:.1f}초")
+    else:
+        print(f"⏱️ [시간] 이번 {mode} 학습 {elapsed:.1f}초")
+    rss, worker_rss = train_matrix.peak_rss_mb()
+    print(f"📏 [메모리] 최대 RSS {rss:.0f}MB (피처 워커 최대 {worker_rss:.0f}MB) | 학습 행렬 {matrix.X.nbytes / 1e6:.0f}MB (디스크)")
+
+    save_training_log(acc, feature_columns, mode=mode, train_rows=n_rows, train_sec=elapsed, peak_rss_mb=rss)
     joblib.dump(model, MODEL_NAME)
+    save_model_meta({
+        "feature_version": features.FEATURE_VERSION, "feature_columns": feature_columns,
+        "last_date": last_date, "trained_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "mode": mode, "n_trees": model.booster_.num_trees()
+    })
     print(f"✅ [완료] {MODEL_NAME} 갱신 완료.")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI 모델 재학습")
+    parser.add_argument("--mode", choices=["auto", "full", "incremental"], default=os.getenv("TRAIN_MODE", "auto"),
+                        help="auto: 정책에 따라 증분/전체 자동 선택")
+    parser.add_argument("--study", choices=["latest", "history"], default=STUDY_SOURCE,
+                        help="history: 포착 이력 인덱스의 과거 포착 종목 전체로 학습")
+    parser.add_argument("--history-days", type=int, default=STUDY_HISTORY_DAYS, help="--study history 조회 기간(일, 0=전체)")
+    parser.add_argument("--feature-workers", type=int, default=FEATURE_WORKERS, help="피처 추출 프로세스 수 (1=순차)")
+    parser.add_argument("--skip-small", action="store_true", default=SKIP_SMALL_INCREMENTS,
+                        help="auto 에서 새 행이 부족하면 전체 학습 대신 기존 모델 유지 (다음 실행까지 누적)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    train_specialized_model()
\ No newline at end of file
+    args = parse_args()
+    train_specialized_model(mode=args.mode, study=args.study, history_days=args.history_days,
+                            feature_workers=args.feature_workers, skip_small=args.skip_small)